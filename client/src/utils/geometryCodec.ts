@@ -0,0 +1,128 @@
+/**
+ * Decoders for the compact geometry formats returned by the geo endpoints
+ * (`geometry_format=polyline | base64 | binary`).
+ *
+ * All decoders return coordinates as [lon, lat] pairs, matching the default
+ * JSON geometry format.
+ */
+
+export type GeometryFormat = "json" | "polyline" | "base64" | "binary";
+
+export const POLYLINE_PRECISION = 5;
+export const BINARY_PRECISION = 6;
+
+/**
+ * Decode a Google encoded polyline.
+ * @param encoded - Encoded polyline string ((lat, lon) pairs).
+ * @param precision - Number of decimal places (default: 5).
+ * @returns Coordinates as [lon, lat] pairs.
+ */
+export const decodePolyline = (
+  encoded: string,
+  precision: number = POLYLINE_PRECISION,
+): [number, number][] => {
+  const factor = 10 ** precision;
+  const coordinates: [number, number][] = [];
+  let index = 0;
+  let lat = 0;
+  let lon = 0;
+
+  const readValue = (): number => {
+    let result = 0;
+    let shift = 0;
+    let chunk: number;
+    do {
+      chunk = encoded.charCodeAt(index++) - 63;
+      result += (chunk & 0x1f) * 2 ** shift;
+      shift += 5;
+    } while (chunk >= 0x20);
+    return result % 2 === 1 ? -(result + 1) / 2 : result / 2;
+  };
+
+  while (index < encoded.length) {
+    lat += readValue();
+    lon += readValue();
+    coordinates.push([lon / factor, lat / factor]);
+  }
+  return coordinates;
+};
+
+/**
+ * Decode the delta-encoded binary geometry format.
+ *
+ * Layout: for each line, a varint point count followed by zigzag-varint
+ * deltas of the interleaved lon/lat values (unsigned LEB128 varints).
+ * @param bytes - Raw bytes (e.g. an `application/octet-stream` response body).
+ * @param precision - Number of decimal places (default: 6).
+ * @returns One array of [lon, lat] pairs per encoded line.
+ */
+export const decodeBinaryGeometry = (
+  bytes: Uint8Array,
+  precision: number = BINARY_PRECISION,
+): [number, number][][] => {
+  const factor = 10 ** precision;
+  const lines: [number, number][][] = [];
+  let index = 0;
+
+  const readVarint = (): number => {
+    let result = 0;
+    let shift = 0;
+    let byte: number;
+    do {
+      byte = bytes[index++] ?? 0;
+      result += (byte & 0x7f) * 2 ** shift;
+      shift += 7;
+    } while (byte & 0x80);
+    return result;
+  };
+  const readZigzag = (): number => {
+    const value = readVarint();
+    return value % 2 === 1 ? -(value + 1) / 2 : value / 2;
+  };
+
+  while (index < bytes.length) {
+    const count = readVarint();
+    const line: [number, number][] = [];
+    let lon = 0;
+    let lat = 0;
+    for (let i = 0; i < count; i++) {
+      lon += readZigzag();
+      lat += readZigzag();
+      line.push([lon / factor, lat / factor]);
+    }
+    lines.push(line);
+  }
+  return lines;
+};
+
+/**
+ * Decode a base64-encoded binary geometry holding a single line.
+ * @param encoded - Base64 string.
+ * @returns Coordinates as [lon, lat] pairs.
+ */
+export const decodeBase64Geometry = (encoded: string): [number, number][] => {
+  const binary = atob(encoded);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return decodeBinaryGeometry(bytes)[0] ?? [];
+};
+
+/**
+ * Decode a geometry field according to its format.
+ * @param geometry - Coordinate list or encoded string.
+ * @param format - Format the geometry was requested in.
+ * @returns Coordinates as [lon, lat] pairs.
+ */
+export const decodeGeometry = (
+  geometry: [number, number][] | string,
+  format: GeometryFormat = "json",
+): [number, number][] => {
+  if (typeof geometry !== "string") {
+    return geometry;
+  }
+  return format === "polyline"
+    ? decodePolyline(geometry)
+    : decodeBase64Geometry(geometry);
+};
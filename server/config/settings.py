@@ -70,6 +70,10 @@ class Settings(BaseSettings):
     )
 
     # Search settings
+    place_index_ttl: int = Field(
+        default=3600,
+        description="Seconds before the in-memory place index is reloaded"
+    )
     default_search_radius: int = Field(
         default=1000,
         description="Default search radius in meters"
@@ -79,6 +83,78 @@ class Settings(BaseSettings):
         description="Maximum search radius in meters"
     )
 
+    # Bus network settings
+    bus_network_watch_interval: int = Field(
+        default=60,
+        description="Seconds between checks of the bus network files for changes"
+    )
+    route_cache_size: int = Field(
+        default=2048,
+        description="Maximum number of cached direct bus route results"
+    )
+    route_cache_ttl: int = Field(
+        default=600,
+        description="Seconds a cached direct bus route result stays valid"
+    )
+    transfer_table_path: str = Field(
+        default="data/transfer_table.npz",
+        description="Line-to-line transfer table (scripts/build_transfer_table.py)"
+    )
+    stop_catchment_path: str = Field(
+        default="data/stop_catchments.npz",
+        description="Places near each stop (scripts/build_stop_catchments.py)"
+    )
+    stop_catchment_radius_meters: float = Field(
+        default=400,
+        description="Walk radius of the stop catchments in meters"
+    )
+    travel_matrix_path: str = Field(
+        default="data/travel_matrix.npz",
+        description="Bus legs between attractions (scripts/build_travel_matrix.py)"
+    )
+    travel_matrix_buffer_miles: float = Field(
+        default=0.25,
+        description="Bus stop search radius around each travel matrix cluster"
+    )
+    travel_matrix_max_leg_miles: float = Field(
+        default=5.0,
+        description="Clusters farther apart than this get no travel matrix bus leg"
+    )
+
+    # Transit routing settings
+    gtfs_feed_dirs: List[str] = Field(
+        default=["datasets/metro_bus", "datasets/metro_rail"],
+        description="Directories holding the extracted GTFS feeds"
+    )
+    gtfs_timetable_store: str = Field(
+        default="datasets/timetable",
+        description="Timetable store directory (scripts/build_timetable_store.py)"
+    )
+    gtfs_shape_store: str = Field(
+        default="datasets/shapes",
+        description="Route geometry store directory (scripts/build_shape_store.py)"
+    )
+    headway_table_path: str = Field(
+        default="datasets/headways.npz",
+        description="Line, stop and time band headways (scripts/build_headway_table.py)"
+    )
+    gtfs_rt_dir: Optional[str] = Field(
+        default=None,
+        description="Directory of GTFS-Realtime TripUpdates/VehiclePositions to poll"
+    )
+    gtfs_timezone: str = Field(
+        default="America/Los_Angeles",
+        description="Timezone of the GTFS service days (the feeds' agency_timezone)"
+    )
+    gtfs_rt_poll_interval: int = Field(
+        default=30,
+        description="Seconds between polls of the GTFS-Realtime feed directory"
+    )
+    transit_max_transfers: int = Field(
+        default=3,
+        description="Maximum number of transfers allowed in a transit journey"
+    )
+
     # Rate limiting
     rate_limit_enabled: bool = Field(
         default=True,
@@ -2,6 +2,7 @@
 
 # Import necessary modules and libraries
 from fastapi import FastAPI  # FastAPI framework for building APIs
+from contextlib import asynccontextmanager  # For the application lifespan handler
 from dotenv import load_dotenv  # For loading environment variables from a .env file
 import os  # For interacting with the operating system
 import logging  # For configuring and handling logging
@@ -12,6 +13,9 @@ from middleware.cors_config import add_cors_middleware
 from routes import api_router  # Main API router for the application
 from fastapi.middleware.cors import CORSMiddleware  # Built-in CORS middleware
 from config.settings import get_settings  # Import settings
+# In-memory bus network shared by the routing endpoints
+from services.bus_network import bus_network_service
+from services.gtfs_realtime import realtime_ingester
 
 # Configure logging for SQLAlchemy
 # Logs all SQL statements generated by SQLAlchemy for debugging purposes
@@ -24,6 +28,26 @@ load_dotenv()
 # Get application settings
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan handler.
+
+    Loads the bus network once at startup and watches its source files for
+    changes, so that routing requests only query in-memory structures.
+    When a GTFS-Realtime directory is configured, its feed files are polled
+    and applied to the live delay table.
+    """
+    bus_network_service.load()
+    bus_network_service.start_watcher(settings.bus_network_watch_interval)
+    if settings.gtfs_rt_dir:
+        realtime_ingester.start_watcher(settings.gtfs_rt_poll_interval)
+    yield
+    realtime_ingester.stop_watcher()
+    bus_network_service.stop_watcher()
+
+
 # Initialize the FastAPI application
 app = FastAPI(
     title=settings.app_name,  # Title of the API
@@ -33,6 +57,7 @@ app = FastAPI(
     redoc_url=settings.redoc_url,  # Path for ReDoc documentation
     openapi_url="/openapi.json",  # Path for OpenAPI schema
     debug=settings.debug,  # Enable debug mode based on settings
+    lifespan=lifespan,  # Load shared data at startup
 )
 
 # Add built-in CORS middleware to the FastAPI app
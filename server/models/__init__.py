@@ -6,6 +6,7 @@ from models.place import Place  # Model for geographic places or locations
 from models.bus_stops import BusStop  # Model for representing bus stops
 from models.bus_route_usage import BusRouteUsage
 from models.review import Review  # Model for storing user reviews
+from models.place_rating import PlaceRating  # Per-place review aggregates
 from models.customer_usage import CustomerUsage
 from models.user import User  # User model representing application users
 from models.olympic_venue import OlympicVenue  # Model for LA 28 Olympic venues
@@ -76,5 +77,6 @@ __all__ = [
     "BusRouteUsage",  # BusRouteUsage model
     "BusStop",  # BusStop model
     "Place",  # Place model
+    "PlaceRating",  # Place review aggregate model
     "OlympicVenue",  # Olympic venue model
 ]
@@ -11,6 +11,8 @@ from scripts.populate_places import main as populate_places
 from scripts.populate_users import main as populate_users  # Populates the Users table
 # Populates the Reviews table
 from scripts.populate_reviews import main as populate_reviews
+# Rebuilds the PlaceRatings aggregates from the Reviews table
+from scripts.backfill_place_ratings import main as backfill_place_ratings
 # Populates the BusStops table
 from scripts.populate_bus_stops import main as populate_bus_stops
 # Populates the BusRouteUsages table
@@ -42,6 +44,7 @@ async def populate_database():
     await populate_places()  # Populate the Places table
     await populate_users()  # Populate the Users table
     await populate_reviews()  # Populate the Reviews table
+    await backfill_place_ratings()  # Aggregate the reviews per place
     await populate_bus_stops()  # Populate the BusStops table
     await populate_bus_route_usages()  # Populate the BusRouteUsages table
 
@@ -0,0 +1,36 @@
+# server/models/place_rating.py
+
+# SQLAlchemy classes for defining columns and constraints
+from sqlalchemy import Column, Integer, ForeignKey
+
+from models.base import Base  # Base class for all database models
+
+
+class PlaceRating(Base):
+    """
+    SQLAlchemy model holding the review aggregate of a place.
+
+    One row per reviewed place, maintained by the review service whenever a
+    review is created, updated or deleted (and rebuilt by
+    scripts/backfill_place_ratings.py), so ratings can be read without
+    aggregating the `reviews` table at request time.
+
+    Attributes:
+        place_id (int): Primary key, the reviewed place.
+        review_count (int): Number of reviews of the place.
+        rating_sum (int): Sum of the ratings of those reviews.
+    """
+    __tablename__ = "place_ratings"  # Name of the table in the database
+
+    # Foreign key linking to the 'places' table, one aggregate per place
+    place_id = Column(
+        # Deletes the aggregate when the place is deleted
+        Integer, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True
+    )
+    review_count = Column(Integer, nullable=False, default=0)  # Number of reviews
+    rating_sum = Column(Integer, nullable=False, default=0)  # Sum of their ratings
+
+    @property
+    def average_rating(self) -> float | None:
+        """Mean rating of the place, or None without reviews."""
+        return self.rating_sum / self.review_count if self.review_count else None
@@ -1,13 +1,16 @@
 # server/routes/geo_routes.py
 
 # FastAPI modules for routing, dependencies, and exceptions
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession  # Asynchronous database session
-from typing import List, Dict, Any  # Type hints for response models
+from typing import List, Dict, Any, Literal  # Type hints for response models
 
 # Import schemas for request and response validation
 from schemas.review import ReviewCreate, Review, ReviewUpdate
 from schemas.place import Place
+from schemas.transit import ODMatrixRequest, ODMatrixResponse
+from config.settings import get_settings  # For the transfer limit
+from services.gtfs_timetable import CLOCK_TIME_PATTERN  # "HH:MM" departure times
 
 # Import geospatial service functions
 from services.geo_service import (
@@ -15,6 +18,16 @@ from services.geo_service import (
     nearest_places,  # Service to find the nearest places
     find_direct_bus_lines,  # Service to find direct bus lines
     direct_bus_routes,  # Service to find the best direct bus route
+    attractions_along_route,  # Service to find places passed on a bus route
+    bus_line_geometry,  # Service to get the geometries of a bus line
+    transit_routes,  # Service to find transit journeys with transfers
+    realtime_status,  # Service to report GTFS-Realtime ingest metrics
+    bus_od_matrix,  # Service to compute direct bus connectivity between many points
+    isochrone,  # Service to compute the area reachable by walking plus bus
+    bus_transfers,  # Service to look up transfer stops between two bus lines
+    stop_catchment_places,  # Service to list the places within walking range of a stop
+    place_bus_stops,  # Service to list the bus stops within walking distance of a place
+    transfer_bus_routes,  # Service to find bus routes with one transfer
     create_attraction_visit_plan,  # Service to create a visit plan for attractions
 )
 
@@ -89,6 +102,14 @@ async def direct_bus_routes_route(
     lat2: float,  # Latitude of the destination location
     long2: float,  # Longitude of the destination location
     buffer_radius: float = 0.5,  # Radius (in miles) to search for bus stops
+    # Map zoom level to simplify the geometry for
+    zoom: int | None = Query(None, ge=0, le=22),
+    tolerance: float | None = Query(None, ge=0),  # Simplification tolerance in degrees
+    # Encoding of the route geometry
+    geometry_format: Literal["json", "polyline", "base64"] = "json",
+    top_k: int = Query(1, ge=1, le=10),  # Number of alternative lines to return
+    # Departure time as "HH:MM"
+    departure_time: str | None = Query(None, pattern=CLOCK_TIME_PATTERN),
     db: AsyncSession = Depends(get_db),  # Database session dependency
 ):
     """
@@ -100,6 +121,18 @@ async def direct_bus_routes_route(
         lat2 (float): Latitude of the destination location.
         long2 (float): Longitude of the destination location.
         buffer_radius (float, optional): Search radius for bus stops (default: 0.5 miles).
+        zoom (int, optional): Map zoom level; the route geometry is simplified
+            to what is visible at that zoom.
+        tolerance (float, optional): Douglas-Peucker tolerance in degrees
+            (overrides zoom).
+        geometry_format (str, optional): "json" (coordinate list, default),
+            "polyline" (Google encoded polyline) or "base64" (delta-encoded binary).
+        top_k (int, optional): Number of routes on distinct lines to return,
+            ranked by total distance (default: 1); extra routes are under
+            "alternatives".
+        departure_time (str, optional): Departure time as "HH:MM" (default: now);
+            when GTFS headways are available, the expected wait ranks infrequent
+            lines lower.
         db (AsyncSession): Database session for executing queries.
 
     Returns:
@@ -116,6 +149,11 @@ async def direct_bus_routes_route(
             lat2=lat2,
             long2=long2,
             buffer_radius=buffer_radius,
+            zoom=zoom,
+            tolerance=tolerance,
+            geometry_format=geometry_format,
+            top_k=top_k,
+            departure_time=departure_time,
         )
     except Exception as e:
         raise HTTPException(
@@ -123,6 +161,366 @@ async def direct_bus_routes_route(
         )
 
 
+@router.get("/attractions_along_route/", response_model=Dict[str, Any])
+async def attractions_along_route_route(
+    lat1: float,  # Latitude of the starting location
+    long1: float,  # Longitude of the starting location
+    lat2: float,  # Latitude of the destination location
+    long2: float,  # Longitude of the destination location
+    buffer_radius: float = 0.5,  # Radius (in miles) to search for bus stops
+    max_distance: float = Query(200.0, gt=0, le=2000),  # Meters from the route
+    place_type: str | None = "tourist attraction",  # Type of places to include
+    limit: int = Query(20, ge=1, le=100),  # Maximum number of places
+    db: AsyncSession = Depends(get_db),  # Database session dependency
+):
+    """
+    Endpoint to retrieve the places passed on the best direct bus route.
+
+    Args:
+        lat1 (float): Latitude of the starting location.
+        long1 (float): Longitude of the starting location.
+        lat2 (float): Latitude of the destination location.
+        long2 (float): Longitude of the destination location.
+        buffer_radius (float, optional): Search radius for bus stops
+            (default: 0.5 miles).
+        max_distance (float, optional): Maximum distance of a place from the
+            ridden part of the route in meters (default: 200).
+        place_type (str, optional): Type of places to include
+            (default: "tourist attraction").
+        limit (int, optional): Maximum number of places (default: 20).
+        db (AsyncSession): Database session for executing queries.
+
+    Returns:
+        Dict[str, Any]: The route and its places, ordered by position along the route.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await attractions_along_route(
+            db=db,
+            lat1=lat1,
+            long1=long1,
+            lat2=lat2,
+            long2=long2,
+            buffer_radius=buffer_radius,
+            max_distance_meters=max_distance,
+            place_type=place_type,
+            limit=limit,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/bus_lines/{route_number}/geometry/")
+async def bus_line_geometry_route(
+    route_number: str,  # Route number of the bus line
+    # Map zoom level to simplify the geometry for
+    zoom: int | None = Query(None, ge=0, le=22),
+    tolerance: float | None = Query(None, ge=0),  # Simplification tolerance in degrees
+    # Encoding of the geometries; "binary" returns application/octet-stream
+    geometry_format: Literal["json", "polyline", "base64", "binary"] = "json",
+):
+    """
+    Endpoint to retrieve the geometries of every variant of a bus line.
+
+    Args:
+        route_number (str): Route number of the bus line.
+        zoom (int, optional): Map zoom level; geometries are simplified to what
+            is visible at that zoom.
+        tolerance (float, optional): Douglas-Peucker tolerance in degrees
+            (overrides zoom).
+        geometry_format (str, optional): "json" (default), "polyline", "base64",
+            or "binary" for a raw application/octet-stream body.
+
+    Returns:
+        Dict[str, Any] | Response: The line's variants, or the binary encoding.
+
+    Raises:
+        HTTPException: If the line does not exist (404 Not Found) or an
+            unexpected error occurs (500).
+    """
+    try:
+        result = await bus_line_geometry(
+            route_number=route_number,
+            zoom=zoom,
+            tolerance=tolerance,
+            geometry_format=geometry_format,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Bus line not found"
+        )
+    if isinstance(result, bytes):
+        return Response(content=result, media_type="application/octet-stream")
+    return result
+
+
+@router.post("/bus_od_matrix/", response_model=ODMatrixResponse)
+async def bus_od_matrix_route(request: ODMatrixRequest):
+    """
+    Endpoint to compute direct bus connectivity between many origins and destinations.
+
+    Replaces one /direct_bus_routes/ call per pair with a single batched
+    computation (e.g. hotels x Olympic venues).
+
+    Args:
+        request (ODMatrixRequest): Origin and destination points and the stop
+            search radius.
+
+    Returns:
+        ODMatrixResponse: Best direct line and walking distance per
+            origin-destination pair.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await bus_od_matrix(
+            origins=[point.model_dump() for point in request.origins],
+            destinations=[point.model_dump() for point in request.destinations],
+            buffer_radius=request.buffer_radius,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/isochrone/", response_model=Dict[str, Any])
+async def isochrone_route(
+    lat: float,  # Latitude of the origin
+    long: float,  # Longitude of the origin
+    minutes: int = Query(15, ge=1, le=90),  # Travel time budget in minutes
+):
+    """
+    Endpoint to retrieve the area reachable within N minutes by walking plus bus.
+
+    Args:
+        lat (float): Latitude of the origin.
+        long (float): Longitude of the origin.
+        minutes (int, optional): Travel time budget in minutes (default: 15).
+
+    Returns:
+        Dict[str, Any]: A GeoJSON Feature with the reachable-area polygon.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await isochrone(lat=lat, long=long, minutes=minutes)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/bus_stops/{stop_number}/places/", response_model=Dict[str, Any])
+async def stop_catchment_places_route(
+    stop_number: str,  # Stop number of the bus stop
+    db: AsyncSession = Depends(get_db),  # Database session dependency
+):
+    """
+    Endpoint to retrieve the places within walking distance of a bus stop.
+
+    Args:
+        stop_number (str): Stop number of the bus stop.
+        db (AsyncSession): Database session for executing queries.
+
+    Returns:
+        Dict[str, Any]: The stop and its places with walking distances, closest first.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await stop_catchment_places(db=db, stop_number=stop_number)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/places/{place_id}/bus_stops/", response_model=Dict[str, Any])
+async def place_bus_stops_route(
+    place_id: int,  # Database id of the place
+):
+    """
+    Endpoint to retrieve the bus stops within walking distance of a place.
+
+    Args:
+        place_id (int): Database id of the place.
+
+    Returns:
+        Dict[str, Any]: The stops with walking distances, closest first.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await place_bus_stops(place_id=place_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/bus_transfers/", response_model=Dict[str, Any])
+async def bus_transfers_route(
+    from_line: str,  # Route number of the line to transfer from
+    to_line: str,  # Route number of the line to transfer to
+):
+    """
+    Endpoint to look up the best transfer stops from one bus line to another.
+
+    Args:
+        from_line (str): Route number of the line to transfer from.
+        to_line (str): Route number of the line to transfer to.
+
+    Returns:
+        Dict[str, Any]: The transfer stop pairs and walking distances, closest first.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await bus_transfers(from_line=from_line, to_line=to_line)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/transfer_bus_routes/", response_model=Dict[str, Any])
+async def transfer_bus_routes_route(
+    lat1: float,  # Latitude of the starting location
+    long1: float,  # Longitude of the starting location
+    lat2: float,  # Latitude of the destination location
+    long2: float,  # Longitude of the destination location
+    buffer_radius: float = 0.5,  # Buffer radius in miles for searching bus stops
+    # Map zoom level to simplify the geometry for
+    zoom: int | None = Query(None, ge=0, le=22),
+    tolerance: float | None = Query(None, ge=0),  # Simplification tolerance in degrees
+    # Encoding of the geometries
+    geometry_format: Literal["json", "polyline", "base64"] = "json",
+):
+    """
+    Endpoint to retrieve the best bus route with one transfer between two locations.
+
+    Used when /direct_bus_routes/ finds no single line; the transfer comes from
+    the precomputed line-to-line transfer table.
+
+    Args:
+        lat1 (float): Latitude of the starting location.
+        long1 (float): Longitude of the starting location.
+        lat2 (float): Latitude of the destination location.
+        long2 (float): Longitude of the destination location.
+        buffer_radius (float, optional): Buffer radius in miles for searching
+            bus stops (default: 0.5).
+        zoom (int, optional): Map zoom level; geometries are simplified to what
+            is visible at that zoom.
+        tolerance (float, optional): Douglas-Peucker tolerance in degrees
+            (overrides zoom).
+        geometry_format (str, optional): "json" (default), "polyline" or "base64".
+
+    Returns:
+        Dict[str, Any]: Both legs and the transfer, or a message if no route is found.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await transfer_bus_routes(
+            lat1=lat1,
+            long1=long1,
+            lat2=lat2,
+            long2=long2,
+            buffer_radius=buffer_radius,
+            zoom=zoom,
+            tolerance=tolerance,
+            geometry_format=geometry_format,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/transit_routes/", response_model=Dict[str, Any])
+async def transit_routes_route(
+    lat1: float,  # Latitude of the starting location
+    long1: float,  # Longitude of the starting location
+    lat2: float,  # Latitude of the destination location
+    long2: float,  # Longitude of the destination location
+    # Departure time as "HH:MM"
+    departure_time: str | None = Query(None, pattern=CLOCK_TIME_PATTERN),
+    # Maximum number of transfers, bounded by the configured maximum
+    max_transfers: int | None = Query(
+        None, ge=0, le=get_settings().transit_max_transfers
+    ),
+):
+    """
+    Endpoint to retrieve the earliest-arrival transit journey between two locations.
+
+    Unlike /direct_bus_routes/, the journey may combine several bus and rail
+    lines with walking transfers between them.
+
+    Args:
+        lat1 (float): Latitude of the starting location.
+        long1 (float): Longitude of the starting location.
+        lat2 (float): Latitude of the destination location.
+        long2 (float): Longitude of the destination location.
+        departure_time (str, optional): Departure time as "HH:MM" (default: now).
+        max_transfers (int, optional): Maximum number of transfers, at most
+            the `transit_max_transfers` setting (default: that setting).
+
+    Returns:
+        Dict[str, Any]: The journey with its walking and transit legs.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await transit_routes(
+            lat1=lat1,
+            long1=long1,
+            lat2=lat2,
+            long2=long2,
+            departure_time=departure_time,
+            max_transfers=max_transfers,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.get("/transit_realtime_status/", response_model=Dict[str, Any])
+async def transit_realtime_status_route():
+    """
+    Endpoint to retrieve the ingest metrics of the GTFS-Realtime feeds.
+
+    Returns:
+        Dict[str, Any]: Per feed file, the entity counts, ingest time and feed
+        age of its last ingest.
+
+    Raises:
+        HTTPException: If an unexpected error occurs (500 Internal Server Error).
+    """
+    try:
+        return await realtime_status()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
 @router.get("/attraction_plan/", response_model=Dict[str, Any])
 async def attraction_plan_route(
     lat: float,  # Latitude of the user's location
@@ -130,6 +528,8 @@ async def attraction_plan_route(
     max_places: int = 5,  # Maximum number of attractions to include in the plan
     # Optional duration for visiting attractions
     visit_duration_hours: float | None = None,
+    # Weight of review quality against distance when choosing attractions
+    rating_weight: float = Query(0.5, ge=0, le=1),
     db: AsyncSession = Depends(get_db),  # Database session dependency
 ):
     """
@@ -140,10 +540,13 @@ async def attraction_plan_route(
         long (float): Longitude of the user's location.
         max_places (int, optional): Maximum number of attractions to include (default: 5).
         visit_duration_hours (float, optional): Duration (in hours) for visiting attractions.
+        rating_weight (float, optional): Weight (0-1) of review quality against
+            distance when choosing attractions (default: 0.5).
         db (AsyncSession): Database session for executing queries.
 
     Returns:
-        Dict[str, Any]: An itinerary with attraction details and timing.
+        Dict[str, Any]: An itinerary with attraction details and timing,
+        including the walking or bus leg to each attraction.
 
     Raises:
         HTTPException: If an unexpected error occurs (500 Internal Server Error).
@@ -155,6 +558,7 @@ async def attraction_plan_route(
             long=long,
             max_places=max_places,
             visit_duration_hours=visit_duration_hours,
+            rating_weight=rating_weight,
         )
     except Exception as e:
         raise HTTPException(
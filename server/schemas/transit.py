@@ -0,0 +1,79 @@
+# server/schemas/transit.py
+
+from typing import List, Optional  # For list and optional fields
+# BaseModel and Field for Pydantic schemas
+from pydantic import BaseModel, Field
+
+
+class Coordinate(BaseModel):
+    """
+    A geographic point.
+
+    Attributes:
+        lat (float): Latitude of the point.
+        long (float): Longitude of the point.
+    """
+    lat: float = Field(
+        ...,  # Field is required
+        ge=-90,  # Minimum latitude
+        le=90,  # Maximum latitude
+        description="Latitude of the point."  # Description for API documentation
+    )
+    long: float = Field(
+        ...,  # Field is required
+        ge=-180,  # Minimum longitude
+        le=180,  # Maximum longitude
+        description="Longitude of the point."  # Description for API documentation
+    )
+
+
+class ODMatrixRequest(BaseModel):
+    """
+    Request body for the direct bus origin-destination matrix.
+
+    Attributes:
+        origins (List[Coordinate]): Origin points (e.g. hotels).
+        destinations (List[Coordinate]): Destination points (e.g. venues).
+        buffer_radius (float): Radius (in miles) to search for bus stops around
+            each point.
+    """
+    origins: List[Coordinate] = Field(
+        ...,  # Field is required
+        min_length=1,  # At least one origin
+        max_length=2000,  # Bound the size of the matrix
+        description="Origin points."  # Description for API documentation
+    )
+    destinations: List[Coordinate] = Field(
+        ...,  # Field is required
+        min_length=1,  # At least one destination
+        max_length=2000,  # Bound the size of the matrix
+        description="Destination points."  # Description for API documentation
+    )
+    buffer_radius: float = Field(
+        0.5,  # Default search radius
+        gt=0,  # Radius must be positive
+        le=2,  # Keep the walking search bounded
+        description="Radius (in miles) to search for bus stops around each point."
+    )
+
+
+class ODMatrixResponse(BaseModel):
+    """
+    Direct bus connectivity between every origin and destination.
+
+    Row i and column j of each matrix describe origin i and destination j.
+
+    Attributes:
+        route_numbers (List[List[Optional[str]]]): Best direct line, or None if
+            no line connects the pair.
+        walking_distance (List[List[Optional[float]]]): Total walk (in miles) to
+            and from the line's stops.
+    """
+    route_numbers: List[List[Optional[str]]] = Field(
+        ...,  # Field is required
+        description="Best direct bus line per origin-destination pair."
+    )
+    walking_distance: List[List[Optional[float]]] = Field(
+        ...,  # Field is required
+        description="Walking distance (in miles) to and from the best line's stops."
+    )
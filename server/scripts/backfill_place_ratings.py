@@ -0,0 +1,56 @@
+# server/scripts/backfill_place_ratings.py
+
+import asyncio  # For asynchronous programming
+import logging  # For logging information and errors
+
+from sqlalchemy import delete, func, insert  # For rebuilding the aggregate table
+from sqlalchemy.exc import SQLAlchemyError  # For handling database exceptions
+from sqlalchemy.future import select  # For aggregating the reviews
+
+# Import application-specific modules
+from config.database import AsyncSessionFactory  # Database session factory
+from models.place_rating import PlaceRating  # Model for the `place_ratings` table
+from models.review import Review  # Model for the `reviews` table
+
+logger = logging.getLogger(__name__)  # Create a logger for this script
+
+
+async def main():
+    """
+    Rebuild the per-place rating aggregates from the `reviews` table.
+
+    The review service keeps the aggregates up to date afterwards; run this
+    after bulk-loading reviews (e.g. scripts/populate_reviews.py), which
+    bypasses the service.
+    """
+    async with AsyncSessionFactory() as db:
+        try:
+            await db.execute(delete(PlaceRating))
+            await db.execute(
+                insert(PlaceRating).from_select(
+                    ["place_id", "review_count", "rating_sum"],
+                    select(
+                        Review.place_id, func.count(Review.id), func.sum(Review.rating)
+                    ).group_by(Review.place_id),
+                )
+            )
+            await db.commit()
+            count = (
+                await db.execute(select(func.count()).select_from(PlaceRating))
+            ).scalar_one()
+            logger.info(f"Rebuilt rating aggregates for {count} places")
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Error rebuilding rating aggregates: {str(e)}")
+            raise
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())  # Run the script using asyncio
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Run the script:
+#    python scripts/backfill_place_ratings.py
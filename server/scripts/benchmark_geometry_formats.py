@@ -0,0 +1,67 @@
+# server/scripts/benchmark_geometry_formats.py
+
+import argparse  # For command-line options
+import json  # For measuring the JSON encoding
+import time  # For timing the encoders
+
+# Import application-specific modules
+from services.bus_network import BUS_LINES_PATH, BUS_STOPS_PATH, load_bus_network
+from services.geometry_codec import encode_binary, encode_geometry
+
+
+def _measure(encode, repeat):
+    """Return (bytes per run, milliseconds per run) of an encoder."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = encode()
+    elapsed = (time.perf_counter() - start) / repeat
+    size = len(payload) if isinstance(payload, bytes) else len(payload.encode("utf-8"))
+    return size, elapsed * 1000
+
+
+def main():
+    """
+    Compare response size and encode time of the geometry formats over every
+    route variant of the bus network.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the geometry response formats"
+    )
+    parser.add_argument("--stops", default=BUS_STOPS_PATH, help="Path to bus_stops.csv")
+    parser.add_argument(
+        "--lines", default=BUS_LINES_PATH, help="Path to bus_lines.geojson"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per format")
+    args = parser.parse_args()
+
+    network = load_bus_network(args.stops, args.lines)
+    lines = [variant["geometry"].tolist() for variant in network.variants]
+    points = sum(len(line) for line in lines)
+    print(f"{len(lines)} route variants, {points} points")
+
+    formats = {
+        "json": lambda: json.dumps(lines),
+        "polyline": lambda: json.dumps(
+            [encode_geometry(line, "polyline") for line in lines]
+        ),
+        "base64": lambda: json.dumps(
+            [encode_geometry(line, "base64") for line in lines]
+        ),
+        "binary": lambda: encode_binary(lines),
+    }
+    baseline = None
+    print(f"{'format':<10}{'bytes':>12}{'ratio':>8}{'encode ms':>12}")
+    for name, encode in formats.items():
+        size, ms = _measure(encode, args.repeat)
+        baseline = baseline or size
+        print(f"{name:<10}{size:>12}{size / baseline:>8.2f}{ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Run the benchmark:
+#    python scripts/benchmark_geometry_formats.py
@@ -0,0 +1,105 @@
+# server/scripts/benchmark_route_scoring.py
+
+import argparse  # For command-line options
+import time  # For timing the scorers
+
+import numpy as np  # For sampling query points
+
+# Import application-specific modules
+from services.bus_network import BUS_LINES_PATH, BUS_STOPS_PATH, load_bus_network
+from services.nearest_bustops import _nearest_stop_per_direction
+
+
+def _candidates(network, user_stops, target_stops):
+    """(user stop, target stop, variant) triples of line directions on both sides."""
+    user_by_key = _nearest_stop_per_direction(user_stops)
+    target_by_key = _nearest_stop_per_direction(target_stops)
+    triples = []
+    for key in sorted(user_by_key.keys() & target_by_key.keys()):
+        for variant_id in network.route_variant_ids.get(str(key[0]), []):
+            triples.append(
+                (user_by_key[key].index, target_by_key[key].index, variant_id)
+            )
+    return triples
+
+
+def _score_loop(network, triples):
+    """Score candidates one at a time, as `_find_best_routes` did before."""
+    return [
+        (
+            network.stop_offset(v, a) + network.stop_offset(v, b)
+            if network.serves_in_order(v, a, b)
+            else np.inf
+        )
+        for a, b, v in triples
+    ]
+
+
+def _score_vectorised(network, triples):
+    """Score all candidates with one `score_variants` call."""
+    from_stops, to_stops, variant_ids = (
+        np.asarray(column, dtype=np.int64) for column in zip(*triples)
+    )
+    offsets, in_order = network.score_variants(variant_ids, from_stops, to_stops)
+    return np.where(in_order, offsets, np.inf)
+
+
+def main():
+    """
+    Compare per-candidate scoring with the vectorised scorer on random
+    origin-destination pairs and check that both give the same scores.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark direct bus route candidate scoring"
+    )
+    parser.add_argument("--stops", default=BUS_STOPS_PATH, help="Path to bus_stops.csv")
+    parser.add_argument(
+        "--lines", default=BUS_LINES_PATH, help="Path to bus_lines.geojson"
+    )
+    parser.add_argument(
+        "--queries", type=int, default=200, help="Number of origin-destination pairs"
+    )
+    parser.add_argument(
+        "--radius", type=float, default=1.0, help="Stop search radius in miles"
+    )
+    args = parser.parse_args()
+
+    network = load_bus_network(args.stops, args.lines)
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, network.stop_count, size=(args.queries, 2))
+    queries = []
+    for origin, destination in picks:
+        user_stops = network.nearest_stop_per_direction(
+            network.stop_lat[origin], network.stop_lon[origin], args.radius
+        )
+        target_stops = network.nearest_stop_per_direction(
+            network.stop_lat[destination], network.stop_lon[destination], args.radius
+        )
+        triples = _candidates(network, user_stops, target_stops)
+        if triples:
+            queries.append(triples)
+    candidates = sum(len(triples) for triples in queries)
+    print(f"{len(queries)} queries, {candidates} candidates")
+
+    timings = {}
+    for name, score in (("loop", _score_loop), ("vectorised", _score_vectorised)):
+        start = time.perf_counter()
+        results = [score(network, triples) for triples in queries]
+        timings[name] = (time.perf_counter() - start) / max(len(queries), 1) * 1000
+        if name == "loop":
+            expected = results
+    mismatches = sum(not np.allclose(a, b) for a, b in zip(expected, results))
+    for name, ms in timings.items():
+        print(f"{name:<12}{ms:>10.3f} ms/query")
+    speedup = timings["loop"] / timings["vectorised"]
+    print(f"speedup     {speedup:>10.1f}x, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Run the benchmark:
+#    python scripts/benchmark_route_scoring.py
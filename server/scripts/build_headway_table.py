@@ -0,0 +1,64 @@
+# server/scripts/build_headway_table.py
+
+import argparse  # For command-line options
+import logging  # For build progress output
+import os  # For checking the feed directories
+from datetime import date  # For the service day
+
+# Import application-specific modules
+from config.settings import get_settings  # Configured feed directories and table path
+from services.gtfs_timetable import build_timetable
+from services.headways import build_headway_table, save_headway_table
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Build the per line, stop and time band headway table from the GTFS feeds.
+    """
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the GTFS headway table")
+    parser.add_argument(
+        "--feed",
+        action="append",
+        dest="feeds",
+        help="GTFS feed directory (repeatable, default: GTFS_FEED_DIRS)",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.headway_table_path,
+        help="Output .npz file (default: HEADWAY_TABLE_PATH)",
+    )
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="Service day as YYYY-MM-DD (default: today)",
+    )
+    args = parser.parse_args()
+
+    feed_dirs = [
+        d
+        for d in args.feeds or settings.gtfs_feed_dirs
+        if os.path.exists(os.path.join(d, "stop_times.txt"))
+    ]
+    if not feed_dirs:
+        raise SystemExit("No GTFS feeds with stop_times.txt found")
+
+    table = build_headway_table(build_timetable(feed_dirs, args.date))
+    save_headway_table(table, args.output)
+    logger.info(
+        f"Wrote headway table {args.output} ({len(table['stop_ids'])} line stops)"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Rebuild the table when the GTFS feeds change (e.g. next to the timetable store):
+#    python scripts/build_headway_table.py
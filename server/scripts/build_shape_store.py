@@ -0,0 +1,67 @@
+# server/scripts/build_shape_store.py
+
+import argparse  # For command-line options
+import logging  # For build progress output
+import os  # For checking the feed directories
+
+# Import application-specific modules
+from config.settings import get_settings  # Configured feed and store directories
+from services.gtfs_shapes import build_shape_arrays, save_shape_store
+
+logger = logging.getLogger(__name__)
+
+
+def build_store(feed_dirs, store_dir):
+    """
+    Convert the shapes of the extracted GTFS feeds into the route geometry store.
+
+    Args:
+        feed_dirs (List[str]): Directories written by `process_gtfs_data`.
+        store_dir (str): Directory to write the store to.
+    """
+    feed_dirs = [d for d in feed_dirs if os.path.exists(os.path.join(d, "shapes.txt"))]
+    if not feed_dirs:
+        raise SystemExit("No GTFS feeds with shapes.txt found")
+
+    arrays = build_shape_arrays(feed_dirs)
+    save_shape_store(arrays, store_dir, feed_dirs)
+    size_mb = sum(array.nbytes for array in arrays.values()) / 1e6
+    logger.info(
+        f"Wrote shape store {store_dir} ({size_mb:.1f} MB, "
+        f"{len(arrays['shape_ids'])} shapes, {len(arrays['coords'])} points)"
+    )
+
+
+def main():
+    """
+    Parse the command-line options and build the store.
+    """
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the GTFS route geometry store")
+    parser.add_argument(
+        "--feed",
+        action="append",
+        dest="feeds",
+        help="GTFS feed directory (repeatable, default: GTFS_FEED_DIRS)",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.gtfs_shape_store,
+        help="Store directory (default: GTFS_SHAPE_STORE)",
+    )
+    args = parser.parse_args()
+
+    build_store(args.feeds or settings.gtfs_feed_dirs, args.output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Build the store after downloading the GTFS feeds:
+#    python scripts/build_shape_store.py
+# 3. The API's bus network watcher picks up the new store; bus_lines.geojson
+#    is only used while no store exists.
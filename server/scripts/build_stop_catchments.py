@@ -0,0 +1,71 @@
+# server/scripts/build_stop_catchments.py
+
+import argparse  # For command-line options
+import asyncio  # For the asynchronous database session
+import logging  # For build progress output
+
+from sqlalchemy.future import select  # For loading the places
+
+# Import application-specific modules
+from config.database import AsyncSessionFactory  # Database session factory
+from config.settings import get_settings  # Configured catchment path and radius
+from models.place import Place  # Model for the `places` table
+from services.bus_network import BUS_STOPS_PATH, load_bus_stops
+from services.stop_catchments import build_stop_catchments, save_stop_catchments
+
+logger = logging.getLogger(__name__)
+
+
+async def load_places():
+    """Return the ids, latitudes and longitudes of all places in the database."""
+    async with AsyncSessionFactory() as db:
+        result = await db.execute(select(Place.id, Place.latitude, Place.longitude))
+        rows = result.all()
+    return (
+        [row.id for row in rows],
+        [row.latitude for row in rows],
+        [row.longitude for row in rows],
+    )
+
+
+def main():
+    """
+    Build the stop catchment table: the places within walking distance of
+    every bus stop row, and the stops within walking distance of every place.
+    """
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the bus stop catchment table")
+    parser.add_argument("--stops", default=BUS_STOPS_PATH, help="Path to bus_stops.csv")
+    parser.add_argument(
+        "--radius",
+        type=float,
+        default=settings.stop_catchment_radius_meters,
+        help="Walk radius in meters (default: STOP_CATCHMENT_RADIUS_METERS)",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.stop_catchment_path,
+        help="Output .npz file (default: STOP_CATCHMENT_PATH)",
+    )
+    args = parser.parse_args()
+
+    # Catchments only need stop locations, not the route geometries
+    network = load_bus_stops(args.stops)
+    place_ids, place_lat, place_lon = asyncio.run(load_places())
+    table = build_stop_catchments(network, place_ids, place_lat, place_lon, args.radius)
+    save_stop_catchments(table, args.output)
+    logger.info(
+        f"Wrote stop catchments {args.output} ({network.stop_count} stops, "
+        f"{len(place_ids)} places, {len(table['place_ids'])} stop-place pairs)"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Rebuild the table whenever bus_stops.csv or the places change:
+#    python scripts/build_stop_catchments.py
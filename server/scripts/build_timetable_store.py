@@ -0,0 +1,89 @@
+# server/scripts/build_timetable_store.py
+
+import argparse  # For command-line options
+import logging  # For build progress output
+import os  # For checking the feed directories
+from datetime import date  # For the service day
+
+# Import application-specific modules
+from config.settings import get_settings  # Configured feed and store directories
+from services.gtfs_timetable import build_timetable_arrays, save_timetable_store
+
+logger = logging.getLogger(__name__)
+
+
+def build_store(feed_dirs, store_dir, service_date):
+    """
+    Convert the extracted GTFS feeds into the memory-mapped timetable store.
+
+    Args:
+        feed_dirs (List[str]): Directories written by `process_gtfs_data`.
+        store_dir (str): Directory to write the store to.
+        service_date (date, optional): Only keep trips running on this day;
+            None keeps every trip.
+    """
+    feed_dirs = [
+        d for d in feed_dirs if os.path.exists(os.path.join(d, "stop_times.txt"))
+    ]
+    if not feed_dirs:
+        raise SystemExit("No GTFS feeds with stop_times.txt found")
+
+    arrays = build_timetable_arrays(feed_dirs, service_date)
+    save_timetable_store(arrays, store_dir, service_date, feed_dirs)
+    size_mb = sum(array.nbytes for array in arrays.values()) / 1e6
+    logger.info(
+        f"Wrote timetable store {store_dir} ({size_mb:.1f} MB, "
+        f"{len(arrays['trip_ids'])} trips, {len(arrays['pattern_route'])} patterns)"
+    )
+
+
+def main():
+    """
+    Parse the command-line options and build the store.
+    """
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Build the memory-mapped GTFS timetable store"
+    )
+    parser.add_argument(
+        "--feed",
+        action="append",
+        dest="feeds",
+        help="GTFS feed directory (repeatable, default: GTFS_FEED_DIRS)",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.gtfs_timetable_store,
+        help="Store directory (default: GTFS_TIMETABLE_STORE)",
+    )
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="Service day as YYYY-MM-DD (default: today)",
+    )
+    parser.add_argument(
+        "--all-days",
+        action="store_true",
+        help="Keep every trip regardless of its service calendar",
+    )
+    args = parser.parse_args()
+
+    build_store(
+        args.feeds or settings.gtfs_feed_dirs,
+        args.output,
+        None if args.all_days else args.date,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Build the store for today's service (e.g. from a daily cron job):
+#    python scripts/build_timetable_store.py
+# 3. The API workers pick up the new store on their next request; they never
+#    build the timetable themselves.
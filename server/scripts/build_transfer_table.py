@@ -0,0 +1,49 @@
+# server/scripts/build_transfer_table.py
+
+import argparse  # For command-line options
+import logging  # For build progress output
+
+# Import application-specific modules
+from config.settings import get_settings  # Configured table path
+from services.bus_network import BUS_LINES_PATH, BUS_STOPS_PATH, load_bus_network
+from services.transfers import build_transfer_table, save_transfer_table
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Build the line-to-line transfer table from the bus stops and lines.
+    """
+    parser = argparse.ArgumentParser(
+        description="Build the line-to-line bus transfer table"
+    )
+    parser.add_argument("--stops", default=BUS_STOPS_PATH, help="Path to bus_stops.csv")
+    parser.add_argument(
+        "--lines", default=BUS_LINES_PATH, help="Path to bus_lines.geojson"
+    )
+    parser.add_argument(
+        "--output",
+        default=get_settings().transfer_table_path,
+        help="Output .npz file (default: TRANSFER_TABLE_PATH)",
+    )
+    args = parser.parse_args()
+
+    network = load_bus_network(args.stops, args.lines)
+    table = build_transfer_table(network)
+    save_transfer_table(table, args.output)
+    logger.info(
+        f"Wrote transfer table {args.output} ({len(table['meters'])} transfers, "
+        f"{len(table['pair_keys'])} line pairs)"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Rebuild the table whenever bus_stops.csv or bus_lines.geojson change:
+#    python scripts/build_transfer_table.py
@@ -0,0 +1,90 @@
+# server/scripts/build_travel_matrix.py
+
+import argparse  # For command-line options
+import asyncio  # For the asynchronous database session
+import logging  # For build progress output
+
+from sqlalchemy.future import select  # For loading the attractions
+
+# Import application-specific modules
+from config.database import AsyncSessionFactory  # Database session factory
+from config.settings import get_settings  # Configured matrix path and radii
+from models.place import Place  # Model for the `places` table
+from services.bus_network import BUS_LINES_PATH, BUS_STOPS_PATH, load_bus_network
+from services.travel_matrix import build_travel_matrix, save_travel_matrix
+
+logger = logging.getLogger(__name__)
+
+
+async def load_attractions(place_type):
+    """Return the latitudes and longitudes of all places of a type."""
+    async with AsyncSessionFactory() as db:
+        result = await db.execute(
+            select(Place.latitude, Place.longitude).where(Place.types == place_type)
+        )
+        rows = result.all()
+    return [row.latitude for row in rows], [row.longitude for row in rows]
+
+
+def main():
+    """
+    Build the travel matrix: the best direct bus leg between every pair of
+    attraction clusters, used to plan the legs of attraction visit plans.
+    """
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the attraction travel matrix")
+    parser.add_argument("--stops", default=BUS_STOPS_PATH, help="Path to bus_stops.csv")
+    parser.add_argument(
+        "--lines",
+        default=BUS_LINES_PATH,
+        help="Path to bus_lines.geojson (only read without a shape store)",
+    )
+    parser.add_argument(
+        "--shapes",
+        default=settings.gtfs_shape_store,
+        help="GTFS shape store directory (default: GTFS_SHAPE_STORE)",
+    )
+    parser.add_argument(
+        "--place-type",
+        default="tourist attraction",
+        help="Type of the places to connect",
+    )
+    parser.add_argument(
+        "--buffer",
+        type=float,
+        default=settings.travel_matrix_buffer_miles,
+        help="Bus stop search radius in miles (default: TRAVEL_MATRIX_BUFFER_MILES)",
+    )
+    parser.add_argument(
+        "--max-leg",
+        type=float,
+        default=settings.travel_matrix_max_leg_miles,
+        help="Longest bus leg in miles (default: TRAVEL_MATRIX_MAX_LEG_MILES)",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.travel_matrix_path,
+        help="Output .npz file (default: TRAVEL_MATRIX_PATH)",
+    )
+    args = parser.parse_args()
+
+    # Same route geometries as the live network, so variants and ride miles match
+    network = load_bus_network(args.stops, args.lines, args.shapes)
+    lat, lon = asyncio.run(load_attractions(args.place_type))
+    table = build_travel_matrix(network, lat, lon, args.buffer, args.max_leg)
+    save_travel_matrix(table, args.output)
+    logger.info(
+        f"Wrote travel matrix {args.output} ({len(lat)} places, "
+        f"{len(table['cluster_keys'])} clusters, {len(table['bus_minutes'])} bus legs)"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
+
+# Instructions for running the script:
+# 1. Open a bash terminal inside the backend container:
+#    docker exec -it navigate_la_backend bash
+# 2. Rebuild the matrix whenever bus_stops.csv, bus_lines.geojson or the places change:
+#    python scripts/build_travel_matrix.py
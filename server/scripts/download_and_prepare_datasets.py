@@ -132,7 +132,8 @@ def process_gtfs_data(zip_path: str, output_dir: str):
         with zipfile.ZipFile(zip_path) as z:
             # Extract key GTFS files
             key_files = ['stops.txt', 'routes.txt',
-                         'trips.txt', 'stop_times.txt', 'shapes.txt']
+                         'trips.txt', 'stop_times.txt', 'shapes.txt',
+                         'calendar.txt', 'calendar_dates.txt']
 
             for filename in key_files:
                 try:
@@ -168,6 +169,7 @@ def process_gtfs_stops(stops_txt_path: str, output_csv: str):
         # Add additional fields if available
         out_df["LINE"] = stops_df.get("route_id", "")
         out_df["DIR"] = stops_df.get("direction_id", "")
+        out_df["PARENT_STATION"] = stops_df.get("parent_station", "")
         out_df["ZONE_ID"] = stops_df.get("zone_id", "")
         out_df["WHEELCHAIR_BOARDING"] = stops_df.get("wheelchair_boarding", 0)
         out_df["STOP_DESC"] = stops_df.get("stop_desc", "")
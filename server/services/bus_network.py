@@ -0,0 +1,989 @@
+# server/services/bus_network.py
+
+import json  # For parsing the bus line GeoJSON
+import logging  # For logging load and reload events
+import os  # For environment variables and file metadata
+import threading  # For the background file-change watcher
+from functools import lru_cache  # For caching trimmed route geometries
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np  # For compact, vectorised stop arrays
+import pandas as pd  # For reading the bus stops CSV
+import shapely  # For preparing route geometries
+from shapely import STRtree  # Spatial index over route geometries
+from shapely.geometry import LineString
+
+from config.settings import get_settings  # For the GTFS shape store location
+from services.gtfs_shapes import load_shape_store, shape_features, shape_store_exists
+from services.gtfs_timetable import csr_ranges  # For expanding station members
+from services.spatial_grid import (  # For batched stop lookups
+    cluster_points,
+    grid_pairs,
+    haversine_meters,
+)
+
+logger = logging.getLogger(__name__)
+
+# Check if we're in development mode (no HDFS)
+is_development = os.getenv("ENVIRONMENT", "development") == "development"
+
+if is_development:
+    # Use local files for development
+    BUS_STOPS_PATH = "data/bus_stops.csv"
+    BUS_LINES_PATH = "data/bus_lines.geojson"
+else:
+    # Use the uploaded datasets on HDFS for production
+    BUS_STOPS_PATH = "hdfs://hadoop:9000/user/hdfs/uploads/bus_stops.csv"
+    BUS_LINES_PATH = "hdfs://hadoop:9000/user/hdfs/uploads/bus_lines.geojson"
+
+EARTH_RADIUS_MILES = 3958.8  # Same radius as the former Spark SQL query
+METERS_PER_MILE = 1609.344
+STOP_COLUMNS = ["STOPNUM", "LINE", "DIR", "STOPNAME", "LAT", "LONG"]
+OPTIONAL_STOP_COLUMNS = ["PARENT_STATION"]  # GTFS parent station, when known
+STATION_RADIUS_METERS = (
+    30  # Stops without a parent station closer than this form one station
+)
+# Maximum distance (in degrees, ~300 m) between a stop and a route variant
+# for the variant to be considered as serving that stop
+ROUTE_MATCH_TOLERANCE = 0.003
+# Douglas-Peucker tolerances (in degrees) of the precomputed geometry levels:
+# full resolution, ~1 m, ~5 m, ~20 m and ~100 m
+SIMPLIFY_TOLERANCES = (0.0, 0.00001, 0.00005, 0.0002, 0.001)
+TRIM_CACHE_SIZE = 4096  # Number of cached trimmed route geometries
+# Unit (lon, lat) heading of the compass codes in the DIR column of bus_stops.csv
+DIRECTION_VECTORS = {
+    "N": (0.0, 1.0),
+    "S": (0.0, -1.0),
+    "E": (1.0, 0.0),
+    "W": (-1.0, 0.0),
+}
+
+
+def _get_spark():
+    """Get or create the Spark session used to read the network from HDFS."""
+    from pyspark.sql import SparkSession  # Only needed when reading from HDFS
+
+    return (
+        SparkSession.builder.appName("DirectBusLinesFinder")
+        .config("spark.driver.memory", "2g")
+        .config("spark.executor.memory", "2g")
+        .config("spark.hadoop.fs.defaultFS", "hdfs://hadoop:9000")
+        .config(
+            "spark.hadoop.fs.hdfs.impl", "org.apache.hadoop.hdfs.DistributedFileSystem"
+        )
+        .config("spark.hadoop.fs.file.impl", "org.apache.hadoop.fs.LocalFileSystem")
+        .config("spark.jars.packages", "org.apache.hadoop:hadoop-client:3.3.1")
+        .getOrCreate()
+    )
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Return a (modification time, size) signature for a local or HDFS file.
+
+    Returns None if the file does not exist, so that a missing file and a
+    changed file can both be detected by comparing signatures.
+    """
+    try:
+        if path.startswith("hdfs://"):
+            spark = _get_spark()
+            hadoop_path = spark._jvm.org.apache.hadoop.fs.Path(path)
+            fs = hadoop_path.getFileSystem(spark._jsc.hadoopConfiguration())
+            status = fs.getFileStatus(hadoop_path)
+            return (int(status.getModificationTime()), int(status.getLen()))
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except Exception:
+        return None
+
+
+def _read_stops(path: str) -> pd.DataFrame:
+    """Read the bus stops CSV (local or HDFS) into a pandas DataFrame."""
+    if path.startswith("hdfs://"):
+        stops_df = _get_spark().read.csv(path, header=True)
+        stops_df = stops_df.select(
+            *[
+                column
+                for column in STOP_COLUMNS + OPTIONAL_STOP_COLUMNS
+                if column in stops_df.columns
+            ]
+        )
+        stops = stops_df.toPandas()
+    else:
+        stops = pd.read_csv(
+            path,
+            usecols=lambda column: column in STOP_COLUMNS + OPTIONAL_STOP_COLUMNS,
+            dtype=str,
+        )
+    return stops
+
+
+def _read_features(path: str) -> List[Dict[str, Any]]:
+    """Read the bus lines GeoJSON (local or HDFS) and return its features."""
+    if path.startswith("hdfs://"):
+        text = _get_spark().read.text(path, wholetext=True).first()[0]
+    else:
+        with open(path, "r", encoding="utf-8") as geojson_file:
+            text = geojson_file.read()
+    return json.loads(text).get("features", [])
+
+
+def cumulative_distances(coords: np.ndarray) -> np.ndarray:
+    """
+    Cumulative planar distance along a line at each of its vertices.
+
+    Distances are in coordinate units, matching shapely's `project`.
+    """
+    segment_lengths = np.hypot(np.diff(coords[:, 0]), np.diff(coords[:, 1]))
+    return np.concatenate(([0.0], np.cumsum(segment_lengths)))
+
+
+def interpolate_along(
+    coords: np.ndarray, cumdist: np.ndarray, measure: float
+) -> List[float]:
+    """Return the point at `measure` along a line, given its cumulative distances."""
+    measure = min(max(measure, 0.0), float(cumdist[-1]))
+    k = int(np.searchsorted(cumdist, measure, side="right")) - 1
+    k = min(max(k, 0), len(cumdist) - 2)
+    segment = cumdist[k + 1] - cumdist[k]
+    t = (measure - cumdist[k]) / segment if segment > 0 else 0.0
+    return (coords[k] + t * (coords[k + 1] - coords[k])).tolist()
+
+
+def slice_line(
+    coords: np.ndarray,
+    cumdist: np.ndarray,
+    start: float,
+    end: float,
+    vertex_tolerances: Optional[np.ndarray] = None,
+    tolerance: float = 0.0,
+) -> List[List[float]]:
+    """
+    Extract the part of a line between two distances along it.
+
+    Equivalent to `shapely.ops.substring` for start <= end, but implemented as
+    a binary search and an array slice over precomputed cumulative distances.
+
+    Args:
+        coords (np.ndarray): Line vertices, shape (n, 2).
+        cumdist (np.ndarray): Cumulative distances of the vertices.
+        start (float): Distance along the line where the slice starts.
+        end (float): Distance along the line where the slice ends.
+        vertex_tolerances (np.ndarray, optional): Output of
+            `douglas_peucker_tolerances`; when given, interior vertices are
+            simplified at `tolerance`.
+        tolerance (float): Simplification tolerance in coordinate units.
+
+    Returns:
+        List[List[float]]: Coordinates of the sliced line.
+    """
+    start, end = min(start, end), max(start, end)
+    start_point = interpolate_along(coords, cumdist, start)
+    if start == end:
+        return [start_point]
+    # Interior vertices strictly between the two distances
+    first = int(np.searchsorted(cumdist, start, side="right"))
+    last = int(np.searchsorted(cumdist, end, side="left"))
+    interior = coords[first:last]
+    if vertex_tolerances is not None and tolerance > 0:
+        interior = interior[vertex_tolerances[first:last] > tolerance]
+    return [start_point] + interior.tolist() + [interpolate_along(coords, cumdist, end)]
+
+
+def douglas_peucker_tolerances(
+    coords: np.ndarray, min_tolerance: float = 0.0
+) -> np.ndarray:
+    """
+    Largest Douglas-Peucker tolerance at which each vertex of a line is kept.
+
+    Douglas-Peucker at tolerance t keeps exactly the vertices whose value is
+    greater than t, so one pass yields every simplification level: a level is
+    a boolean mask instead of a separate copy of the line. A vertex's value is
+    its distance from the chord segment when it splits it, capped by the
+    value of the enclosing split, so the levels are nested. The endpoints are
+    always kept (inf).
+
+    Args:
+        coords (np.ndarray): Line vertices, shape (n, 2).
+        min_tolerance (float): Smallest tolerance that will be queried;
+            segments are not split further below it (their vertices get 0).
+
+    Returns:
+        np.ndarray: Per-vertex tolerances, shape (n,).
+    """
+    n = len(coords)
+    tolerances = np.zeros(n)
+    tolerances[[0, -1]] = np.inf
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        first, last, cap = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = coords[first], coords[last]
+        points = coords[first + 1 : last]
+        # Distance from each vertex to the chord segment (as in GEOS)
+        chord = b - a
+        squared_length = chord @ chord
+        t = (
+            ((points - a) @ chord) / squared_length
+            if squared_length > 0
+            else np.zeros(len(points))
+        )
+        nearest = a + np.clip(t, 0.0, 1.0)[:, None] * chord
+        distances = np.hypot(points[:, 0] - nearest[:, 0], points[:, 1] - nearest[:, 1])
+        k = int(np.argmax(distances))
+        if distances[k] <= min_tolerance:
+            continue
+        split = first + 1 + k
+        value = min(float(distances[k]), cap)
+        tolerances[split] = value
+        stack.append((first, split, value))
+        stack.append((split, last, value))
+    return tolerances
+
+
+def simplify_level(tolerance: float) -> float:
+    """Largest precomputed simplification tolerance not exceeding `tolerance`."""
+    levels = [level for level in SIMPLIFY_TOLERANCES if level <= tolerance]
+    return levels[-1] if levels else 0.0
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    """
+    Simplification tolerance (in degrees) for a web map zoom level.
+
+    Half a 256-pixel tile pixel at `zoom`, so simplification is invisible on
+    the map; snapped to a precomputed level.
+    """
+    return simplify_level(180.0 / (256 * 2**zoom))
+
+
+class StopMatch(NamedTuple):
+    """
+    A bus stop found within the search radius of a query point.
+
+    The field names mirror the columns of the former Spark SQL result rows so
+    that routing code can keep using attribute access (e.g. `stop.LINE`).
+    """
+
+    index: int  # Row index of the stop in the BusNetwork arrays
+    STOPNUM: str
+    LINE: str
+    DIR: str
+    STOPNAME: str
+    LAT: float
+    LONG: float
+    distance: float  # Distance from the query point in miles
+
+
+class BusNetwork:
+    """
+    In-memory model of the bus network.
+
+    Stops are held as parallel NumPy arrays (coordinates in radians are
+    precomputed for the distance kernel, and line names are integer-encoded).
+    Every route variant is built once as a prepared LineString, grouped by
+    route number and indexed in an STRtree. For every (variant, stop of its
+    line) the stop's distance along the variant and its offset from the
+    variant are precomputed, together with the cumulative vertex distances of
+    the variant and its Douglas-Peucker vertex tolerances, so trimming between
+    two stops at any simplification level needs no GEOS calls. Each stop's
+    direction (DIR) is resolved to a direction of travel along every variant,
+    so stop pairs served the wrong way round can be rejected. The
+    structure is built once per load and treated as read-only afterwards, so
+    it can be shared by concurrent requests without locking.
+    """
+
+    def __init__(self, stops: pd.DataFrame, features: List[Dict[str, Any]]):
+        stops = stops.copy()
+        stops["LAT"] = pd.to_numeric(stops["LAT"], errors="coerce")
+        stops["LONG"] = pd.to_numeric(stops["LONG"], errors="coerce")
+        stops = stops.dropna(subset=["LAT", "LONG", "LINE"]).reset_index(drop=True)
+
+        # Stop attributes, one entry per row of bus_stops.csv
+        self.stop_number = stops["STOPNUM"].astype(str).to_numpy(dtype=object)
+        self.stop_name = stops["STOPNAME"].fillna("").astype(str).to_numpy(dtype=object)
+        self.stop_dir = stops["DIR"].fillna("").astype(str).to_numpy(dtype=object)
+        self.stop_lat = stops["LAT"].to_numpy(dtype=np.float64)
+        self.stop_lon = stops["LONG"].to_numpy(dtype=np.float64)
+        self.stop_lat_rad = np.radians(self.stop_lat)
+        self.stop_lon_rad = np.radians(self.stop_lon)
+        self.stop_cos_lat = np.cos(self.stop_lat_rad)
+        # Compass heading of each stop's DIR code, (0, 0) when it is not N/S/E/W
+        self.stop_heading = np.array(
+            [
+                DIRECTION_VECTORS.get(direction.strip()[:1].upper(), (0.0, 0.0))
+                for direction in self.stop_dir
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+        # Integer-encoded line of each stop; line_names maps codes back to names
+        line_names, line_codes = np.unique(
+            stops["LINE"].astype(str).str.strip().to_numpy(dtype=str),
+            return_inverse=True,
+        )
+        self.line_names: List[str] = [str(name) for name in line_names]
+        self.stop_line = line_codes.astype(np.int32)
+
+        # Integer code of each stop's (line, direction)
+        direction_names, direction_codes = np.unique(
+            self.stop_dir.astype(str), return_inverse=True
+        )
+        self.stop_line_direction = (
+            self.stop_line.astype(np.int64) * max(len(direction_names), 1)
+            + direction_codes
+        )
+
+        # Stations: stops sharing a parent station, or otherwise within
+        # STATION_RADIUS_METERS of each other (e.g. the bays of one intersection)
+        parents = (
+            stops["PARENT_STATION"].fillna("").astype(str).to_numpy(dtype=object)
+            if "PARENT_STATION" in stops
+            else None
+        )
+        self.stop_station = cluster_points(
+            self.stop_lat, self.stop_lon, STATION_RADIUS_METERS, parents
+        )
+        station_sizes = np.bincount(self.stop_station)
+        self.station_lat = np.bincount(self.stop_station, self.stop_lat) / np.maximum(
+            station_sizes, 1
+        )
+        self.station_lon = np.bincount(self.stop_station, self.stop_lon) / np.maximum(
+            station_sizes, 1
+        )
+        self.station_stops = np.argsort(self.stop_station, kind="stable")
+        self.station_offsets = np.r_[0, np.cumsum(station_sizes)].astype(np.int64)
+        member_meters = haversine_meters(
+            self.stop_lat,
+            self.stop_lon,
+            self.station_lat[self.stop_station],
+            self.station_lon[self.stop_station],
+        )
+        # Distance from each station's centroid to its farthest member stop
+        self.station_radius_miles = np.zeros(len(station_sizes), dtype=np.float64)
+        np.maximum.at(
+            self.station_radius_miles,
+            self.stop_station,
+            member_meters / METERS_PER_MILE,
+        )
+
+        # Route variants: one prepared LineString per GeoJSON feature, with
+        # variant ids grouped by route number
+        self.variants: List[Dict[str, Any]] = []
+        self.route_lookup: Dict[str, List[Dict[str, Any]]] = {}
+        self.route_variant_ids: Dict[str, List[int]] = {}
+        for feature in features:
+            properties = feature.get("properties") or {}
+            geometry = feature.get("geometry") or {}
+            coordinates = geometry.get("coordinates")
+            if coordinates is None or len(coordinates) < 2:
+                continue
+            route_num = str(properties.get("RouteNumber"))
+            coords = np.asarray(coordinates, dtype=np.float64)[:, :2]
+            route_info = {
+                "id": len(self.variants),
+                "route_number": route_num,
+                "geometry": coords,
+                # Precomputed by the GTFS shape store
+                "cumdist": feature.get("cumdist"),
+                "line": LineString(coords),
+                "name": properties.get("RouteName"),
+                "type": properties.get("MetroBusType"),
+                "category": properties.get("MetroCategory"),
+            }
+            self.variants.append(route_info)
+            self.route_lookup.setdefault(route_num, []).append(route_info)
+            self.route_variant_ids.setdefault(route_num, []).append(route_info["id"])
+
+        self.variant_lines = np.array(
+            [variant["line"] for variant in self.variants], dtype=object
+        )
+        shapely.prepare(self.variant_lines)
+        self.route_tree = STRtree(self.variant_lines)
+
+        self._precompute_linear_references()
+        self._trim_cached = lru_cache(maxsize=TRIM_CACHE_SIZE)(self._trim)
+
+    def _precompute_linear_references(self) -> None:
+        """
+        Locate every stop of a line along each variant of that line.
+
+        Adds to each variant:
+
+        - `cumdist`: cumulative vertex distances.
+        - `vertex_tolerances`: Douglas-Peucker simplification levels.
+        - `stop_ids`: stop row indices of the line's stops.
+        - `stop_measures`: distance of each stop along the variant.
+        - `stop_offsets`: distance of each stop from the variant.
+        - `stop_direction`: +1 if the stop's direction runs towards increasing
+          measures, -1 if it runs the other way, 0 if unknown.
+        - `stop_miles`: distance of each stop along the variant in miles.
+        - `stop_position`: stop row index -> position in those arrays.
+
+        Every variant of a line lists the line's stops in the same order, so
+        the measures, offsets, directions and miles of all variants are also
+        kept as flat arrays: the entry of stop s on variant v is
+        `variant_stop_start[v] + stop_line_rank[s]`. They are computed with
+        one vectorised shapely call over all (variant, stop) pairs and let
+        `score_variants` evaluate many candidates with a single NumPy gather.
+        """
+        stop_points = shapely.points(self.stop_lon, self.stop_lat)
+        line_codes = {name: code for code, name in enumerate(self.line_names)}
+        stops_by_line = np.argsort(self.stop_line, kind="stable")
+        line_bounds = np.searchsorted(
+            self.stop_line[stops_by_line], np.arange(len(self.line_names) + 1)
+        )
+        self.stop_line_rank = np.empty(self.stop_count, dtype=np.int64)
+        self.stop_line_rank[stops_by_line] = (
+            np.arange(self.stop_count) - line_bounds[self.stop_line[stops_by_line]]
+        )
+
+        variant_stops = []
+        for variant in self.variants:
+            code = line_codes.get(variant["route_number"])
+            if code is None:
+                variant_stops.append(np.empty(0, dtype=np.int64))
+            else:
+                variant_stops.append(
+                    stops_by_line[line_bounds[code] : line_bounds[code + 1]]
+                )
+        counts = np.array([len(stop_ids) for stop_ids in variant_stops], dtype=np.int64)
+        self.variant_stop_start = (
+            np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+            if len(counts)
+            else np.empty(0, dtype=np.int64)
+        )
+        flat_stops = (
+            np.concatenate(variant_stops)
+            if variant_stops
+            else np.empty(0, dtype=np.int64)
+        )
+        flat_lines = (
+            np.repeat(self.variant_lines, counts)
+            if len(counts)
+            else np.empty(0, dtype=object)
+        )
+        self.stop_measures = shapely.line_locate_point(
+            flat_lines, stop_points[flat_stops]
+        )
+        self.stop_offsets = shapely.distance(flat_lines, stop_points[flat_stops])
+        self.stop_directions = np.zeros(len(flat_stops), dtype=np.int8)
+        self.stop_miles = np.zeros(len(flat_stops), dtype=np.float64)
+
+        for variant, stop_ids in zip(self.variants, variant_stops):
+            if variant["cumdist"] is None:
+                variant["cumdist"] = cumulative_distances(variant["geometry"])
+            variant["vertex_tolerances"] = douglas_peucker_tolerances(
+                variant["geometry"], SIMPLIFY_TOLERANCES[1]
+            )
+            entries = slice(
+                self.variant_stop_start[variant["id"]],
+                self.variant_stop_start[variant["id"]] + len(stop_ids),
+            )
+            variant["stop_ids"] = stop_ids
+            variant["stop_measures"] = self.stop_measures[entries]
+            variant["stop_offsets"] = self.stop_offsets[entries]
+            self.stop_directions[entries] = self._direction_signs(
+                stop_ids, variant["stop_measures"]
+            )
+            variant["stop_direction"] = self.stop_directions[entries]
+            self.stop_miles[entries] = np.interp(
+                variant["stop_measures"],
+                variant["cumdist"],
+                self._cumulative_miles(variant["geometry"]),
+            )
+            variant["stop_miles"] = self.stop_miles[entries]
+            variant["stop_position"] = {
+                int(stop): position for position, stop in enumerate(stop_ids)
+            }
+
+    @staticmethod
+    def _cumulative_miles(coords: np.ndarray) -> np.ndarray:
+        """Cumulative great-circle distance in miles at each vertex of a line."""
+        segment_meters = haversine_meters(
+            coords[:-1, 1], coords[:-1, 0], coords[1:, 1], coords[1:, 0]
+        )
+        return np.concatenate(([0.0], np.cumsum(segment_meters))) / METERS_PER_MILE
+
+    def _direction_signs(
+        self, stop_ids: np.ndarray, measures: np.ndarray
+    ) -> np.ndarray:
+        """
+        Direction of travel along a variant for each stop of its line.
+
+        Stops are grouped by DIR; a group runs towards increasing measures when
+        the progress of its stops along their compass heading grows with their
+        measure along the variant (positive covariance), and the other way when
+        it shrinks. Groups with an unknown heading or a single stop get 0.
+        """
+        if len(stop_ids) == 0:
+            return np.empty(0, dtype=np.int8)
+        _, group = np.unique(self.stop_dir[stop_ids].astype(str), return_inverse=True)
+        heading = self.stop_heading[stop_ids]
+        progress = (
+            heading[:, 0] * self.stop_lon[stop_ids]
+            + heading[:, 1] * self.stop_lat[stop_ids]
+        )
+
+        counts = np.bincount(group)
+        measure_mean = np.bincount(group, measures) / counts
+        progress_mean = np.bincount(group, progress) / counts
+        covariance = np.bincount(
+            group, (measures - measure_mean[group]) * (progress - progress_mean[group])
+        )
+        signs = np.where(np.abs(covariance) > 1e-12, np.sign(covariance), 0)
+        return signs[group].astype(np.int8)
+
+    @classmethod
+    def empty(cls) -> "BusNetwork":
+        """Create a network with no stops or routes."""
+        return cls(pd.DataFrame(columns=STOP_COLUMNS), [])
+
+    @property
+    def stop_count(self) -> int:
+        """Number of stop rows in the network."""
+        return len(self.stop_lat)
+
+    def distances_from(self, lat: float, lon: float) -> np.ndarray:
+        """
+        Haversine distance in miles from a point to every stop.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+
+        Returns:
+            np.ndarray: Distances in miles, aligned with the stop arrays.
+        """
+        lat_rad = np.radians(lat)
+        dlat = self.stop_lat_rad - lat_rad
+        dlon = self.stop_lon_rad - np.radians(lon)
+        a = (
+            np.sin(dlat / 2) ** 2
+            + np.cos(lat_rad) * self.stop_cos_lat * np.sin(dlon / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def nearest_station(
+        self, lat: float, lon: float, max_meters: float
+    ) -> Optional[int]:
+        """
+        Find the station whose centroid is closest to a point.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            max_meters (float): Largest distance at which a station counts.
+
+        Returns:
+            Optional[int]: The station index, or None if no station is in reach.
+        """
+        if len(self.station_lat) == 0:
+            return None
+        meters = haversine_meters(lat, lon, self.station_lat, self.station_lon)
+        station = int(np.argmin(meters))
+        return station if meters[station] <= max_meters else None
+
+    def nearby_stops(
+        self, lat: float, lon: float, radius_miles: float
+    ) -> List[StopMatch]:
+        """
+        Find all stops within a radius of a point.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            radius_miles (float): Search radius in miles.
+
+        Returns:
+            List[StopMatch]: Stops within the radius, with their distances.
+        """
+        distances = self.distances_from(lat, lon)
+        indices = np.flatnonzero(distances <= radius_miles)
+        return [self.stop_match(int(i), float(distances[i])) for i in indices]
+
+    def nearest_stop_per_direction(
+        self, lat: float, lon: float, radius_miles: float
+    ) -> List[StopMatch]:
+        """
+        Find the closest stop of every (line, direction) within a radius of a point.
+
+        Stations are searched first: only the member stops of stations whose
+        centroid is within the radius plus that station's own radius (its
+        farthest member from the centroid) are measured, and a StopMatch is built
+        only for the closest stop of each line direction.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            radius_miles (float): Search radius in miles.
+
+        Returns:
+            List[StopMatch]: One stop per line direction, with its distance.
+        """
+        station_miles = (
+            haversine_meters(lat, lon, self.station_lat, self.station_lon)
+            / METERS_PER_MILE
+        )
+        # The small margin covers the slightly different Earth radii of the two
+        # distance kernels
+        stations = np.flatnonzero(
+            station_miles <= radius_miles + self.station_radius_miles + 1e-3
+        )
+        members = self.station_stops[
+            csr_ranges(
+                self.station_offsets[stations], self.station_offsets[stations + 1]
+            )
+        ]
+
+        lat_rad = np.radians(lat)
+        dlat = self.stop_lat_rad[members] - lat_rad
+        dlon = self.stop_lon_rad[members] - np.radians(lon)
+        a = (
+            np.sin(dlat / 2) ** 2
+            + np.cos(lat_rad) * self.stop_cos_lat[members] * np.sin(dlon / 2) ** 2
+        )
+        distances = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        within = distances <= radius_miles
+        members, distances = members[within], distances[within]
+
+        # Closest member per line direction
+        keys = self.stop_line_direction[members]
+        order = np.lexsort((distances, keys))
+        first = (
+            order[np.r_[True, keys[order][1:] != keys[order][:-1]]]
+            if len(order)
+            else order
+        )
+        return [self.stop_match(int(members[i]), float(distances[i])) for i in first]
+
+    def line_walking_distances(
+        self, lats: np.ndarray, lons: np.ndarray, radius_miles: float
+    ) -> np.ndarray:
+        """
+        Distance from each point to the closest stop of every line.
+
+        All points are matched against all stops in one grid join, so the
+        cost grows with the number of nearby (point, stop) pairs rather than
+        points x stops.
+
+        Args:
+            lats (np.ndarray): Latitudes of the points.
+            lons (np.ndarray): Longitudes of the points.
+            radius_miles (float): Search radius in miles.
+
+        Returns:
+            np.ndarray: Matrix of shape (points, lines) with distances in
+            miles, or inf where the line has no stop within the radius.
+        """
+        distances = np.full((len(lats), len(self.line_names)), np.inf)
+        point_idx, stop_idx, meters = grid_pairs(
+            lats, lons, self.stop_lat, self.stop_lon, radius_miles * METERS_PER_MILE
+        )
+        np.minimum.at(
+            distances, (point_idx, self.stop_line[stop_idx]), meters / METERS_PER_MILE
+        )
+        return distances
+
+    def variants_near(
+        self,
+        lons: np.ndarray,
+        lats: np.ndarray,
+        max_distance: float = ROUTE_MATCH_TOLERANCE,
+    ) -> List[set]:
+        """
+        Find the route variants passing within `max_distance` of each point.
+
+        Args:
+            lons (np.ndarray): Longitudes of the query points.
+            lats (np.ndarray): Latitudes of the query points.
+            max_distance (float): Search distance in degrees.
+
+        Returns:
+            List[set]: For each query point, the set of nearby variant ids.
+        """
+        nearby = [set() for _ in range(len(lons))]
+        if len(lons) == 0 or len(self.variants) == 0:
+            return nearby
+        query_points = shapely.points(np.asarray(lons), np.asarray(lats))
+        point_idx, variant_idx = self.route_tree.query(
+            query_points, predicate="dwithin", distance=max_distance
+        )
+        for p, v in zip(point_idx.tolist(), variant_idx.tolist()):
+            nearby[p].add(v)
+        return nearby
+
+    def stop_offset(self, variant_id: int, stop_index: int) -> float:
+        """Distance (in degrees) between a stop and a route variant of its line."""
+        variant = self.variants[variant_id]
+        return float(variant["stop_offsets"][variant["stop_position"][stop_index]])
+
+    def serves_in_order(self, variant_id: int, from_stop: int, to_stop: int) -> bool:
+        """
+        Whether a variant reaches `to_stop` after `from_stop` in the boarding direction.
+
+        Stops whose direction along the variant is unknown are not restricted.
+        """
+        variant = self.variants[variant_id]
+        position = variant["stop_position"]
+        start, end = position[from_stop], position[to_stop]
+        sign = int(variant["stop_direction"][start])
+        return (
+            sign == 0
+            or sign * (variant["stop_measures"][end] - variant["stop_measures"][start])
+            > 0
+        )
+
+    def score_variants(
+        self, variant_ids: np.ndarray, from_stops: np.ndarray, to_stops: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised `stop_offset` and `serves_in_order` for many candidates.
+
+        Args:
+            variant_ids (np.ndarray): Variant of each candidate.
+            from_stops (np.ndarray): Boarding stop of each candidate, on the
+                variant's line.
+            to_stops (np.ndarray): Alighting stop of each candidate, on the
+                variant's line.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The summed offsets (in degrees) of both
+            stops from the variant, and whether the variant serves them in order.
+        """
+        start = self.variant_stop_start[variant_ids]
+        board = start + self.stop_line_rank[from_stops]
+        alight = start + self.stop_line_rank[to_stops]
+        offsets = self.stop_offsets[board] + self.stop_offsets[alight]
+        sign = self.stop_directions[board]
+        in_order = (sign == 0) | (
+            sign * (self.stop_measures[alight] - self.stop_measures[board]) > 0
+        )
+        return offsets, in_order
+
+    def ride_distance(self, variant_id: int, from_stop: int, to_stop: int) -> float:
+        """In-vehicle distance in miles between two stops along a route variant."""
+        variant = self.variants[variant_id]
+        position = variant["stop_position"]
+        miles = variant["stop_miles"]
+        return abs(float(miles[position[to_stop]] - miles[position[from_stop]]))
+
+    def trim_between_stops(
+        self, variant_id: int, from_stop: int, to_stop: int, tolerance: float = 0.0
+    ) -> List[List[float]]:
+        """
+        Extract the part of a route variant between two of its line's stops.
+
+        Results are cached per (variant, stops, simplification level); the
+        returned list is shared and must not be modified.
+
+        Args:
+            variant_id (int): Id of the route variant.
+            from_stop (int): Row index of the first stop.
+            to_stop (int): Row index of the second stop.
+            tolerance (float): Douglas-Peucker tolerance in degrees, snapped
+                down to one of `SIMPLIFY_TOLERANCES` (default: full resolution).
+
+        Returns:
+            List[List[float]]: Coordinates of the trimmed route.
+        """
+        return self._trim_cached(
+            variant_id, from_stop, to_stop, simplify_level(tolerance)
+        )
+
+    def _trim(
+        self, variant_id: int, from_stop: int, to_stop: int, tolerance: float
+    ) -> List[List[float]]:
+        variant = self.variants[variant_id]
+        measures = variant["stop_measures"]
+        position = variant["stop_position"]
+        return slice_line(
+            variant["geometry"],
+            variant["cumdist"],
+            float(measures[position[from_stop]]),
+            float(measures[position[to_stop]]),
+            variant["vertex_tolerances"],
+            tolerance,
+        )
+
+    def variant_geometry(self, variant_id: int, tolerance: float = 0.0) -> np.ndarray:
+        """
+        Full geometry of a route variant, simplified at `tolerance` degrees.
+
+        The tolerance is snapped down to one of `SIMPLIFY_TOLERANCES`.
+        """
+        variant = self.variants[variant_id]
+        level = simplify_level(tolerance)
+        if level == 0:
+            return variant["geometry"]
+        return variant["geometry"][variant["vertex_tolerances"] > level]
+
+    def stop_match(self, index: int, distance: float) -> StopMatch:
+        """Build a StopMatch for the stop at `index`."""
+        return StopMatch(
+            index=index,
+            STOPNUM=self.stop_number[index],
+            LINE=self.line_names[self.stop_line[index]],
+            DIR=self.stop_dir[index],
+            STOPNAME=self.stop_name[index],
+            LAT=float(self.stop_lat[index]),
+            LONG=float(self.stop_lon[index]),
+            distance=distance,
+        )
+
+
+def load_bus_network(
+    stops_path: str = BUS_STOPS_PATH,
+    lines_path: str = BUS_LINES_PATH,
+    shape_store: Optional[str] = None,
+) -> BusNetwork:
+    """
+    Load the bus network from the stops CSV and the route geometries.
+
+    Route geometries come from the GTFS shape store built by
+    scripts/build_shape_store.py; bus_lines.geojson is only read when there
+    is no shape store.
+
+    Args:
+        stops_path (str): Path (local or HDFS) to bus_stops.csv.
+        lines_path (str): Path (local or HDFS) to bus_lines.geojson.
+        shape_store (str, optional): Directory of the GTFS shape store.
+
+    Returns:
+        BusNetwork: The loaded network.
+    """
+    stops = _read_stops(stops_path)
+    if shape_store and shape_store_exists(shape_store):
+        features = shape_features(load_shape_store(shape_store))
+    else:
+        features = _read_features(lines_path)
+    network = BusNetwork(stops, features)
+    logger.info(
+        f"Loaded bus network: {network.stop_count} stops, "
+        f"{len(network.route_lookup)} routes"
+    )
+    return network
+
+
+def load_bus_stops(stops_path: str = BUS_STOPS_PATH) -> BusNetwork:
+    """
+    Load a network with the stops of bus_stops.csv but no route geometries.
+
+    For offline jobs that only need stop locations and lines, such as the
+    stop catchment build.
+    """
+    network = BusNetwork(_read_stops(stops_path), [])
+    logger.info(f"Loaded {network.stop_count} bus stops")
+    return network
+
+
+class BusNetworkService:
+    """
+    Holds the current BusNetwork and reloads it when the source files change.
+
+    Requests read `network`, which is swapped atomically after a successful
+    reload; a failed reload keeps serving the previous network.
+    """
+
+    def __init__(
+        self,
+        stops_path: str = BUS_STOPS_PATH,
+        lines_path: str = BUS_LINES_PATH,
+        shape_store: Optional[str] = None,
+    ):
+        self.stops_path = stops_path
+        self.lines_path = lines_path
+        self.shape_store = shape_store
+        self._network: Optional[BusNetwork] = None
+        self._signature: Optional[Tuple[Any, Any]] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def network(self) -> BusNetwork:
+        """The current network, loading it on first access if needed."""
+        if self._network is None:
+            self.load()
+        return self._network
+
+    def _current_signature(self) -> Tuple[Any, Any]:
+        if self.shape_store and shape_store_exists(self.shape_store):
+            # The store is swapped in by renaming, which rewrites its metadata file
+            lines_signature = _file_signature(
+                os.path.join(self.shape_store, "metadata.json")
+            )
+        else:
+            lines_signature = _file_signature(self.lines_path)
+        return (_file_signature(self.stops_path), lines_signature)
+
+    def load(self) -> bool:
+        """
+        (Re)load the network from the source files.
+
+        Returns:
+            bool: True if a new network was loaded, False on failure.
+        """
+        with self._lock:
+            signature = self._current_signature()
+            try:
+                network = load_bus_network(
+                    self.stops_path, self.lines_path, self.shape_store
+                )
+            except Exception as e:
+                logger.error(f"Failed to load bus network: {str(e)}")
+                if self._network is None:
+                    self._network = BusNetwork.empty()
+                return False
+            self._network = network
+            self._signature = signature
+            return True
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the network if either source file has changed since the last load.
+
+        Returns:
+            bool: True if the network was reloaded.
+        """
+        if self._current_signature() == self._signature:
+            return False
+        logger.info("Bus network source files changed, reloading")
+        return self.load()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Bus network watcher error: {str(e)}")
+
+    def start_watcher(self, interval: float = 60) -> None:
+        """Start a background thread that polls the source files for changes."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval,),
+            name="bus-network-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Stop the background watcher thread."""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+# Shared service instance used by the routing code
+bus_network_service = BusNetworkService(shape_store=get_settings().gtfs_shape_store)
+
+
+def get_bus_network() -> BusNetwork:
+    """Return the currently loaded bus network."""
+    return bus_network_service.network
@@ -21,7 +21,34 @@ from services.nearest_restrooms import find_nearest_restrooms
 from schemas.place import Place  # Place schema
 from models.place import Place as PlaceModel  # Place model from the database
 # Function to find bus routes
-from services.nearest_bustops import find_direct_bus_lines
+from services.nearest_bustops import (
+    bus_line_geometries,
+    direct_bus_od_matrix,
+    find_direct_bus_lines,
+    find_one_transfer_route,
+)
+from services.transfers import transfer_service  # Precomputed line-to-line transfers
+from services.bus_network import tolerance_for_zoom
+from services.stop_catchments import stop_catchment_service  # Places near stops
+from services.geometry_codec import (
+    encode_binary,
+    encode_geometry,
+    encode_route_geometry,
+)
+from services.isochrone import transit_isochrone
+from services.itinerary import (  # Attraction plan selection and order
+    plan_visit_order,
+    select_candidates,
+)
+from models.place_rating import PlaceRating  # Precomputed per-place review aggregates
+from services.travel_matrix import travel_matrix_service  # Legs between attractions
+from services.places_index import place_index_service  # STRtree over the places
+from config.settings import get_settings  # For the transit routing defaults
+
+# Import transfer-aware routing over the GTFS timetable
+from services.gtfs_timetable import clock_seconds, get_timetable
+from services.raptor import plan_transit_journey
+from services.gtfs_realtime import apply_realtime_delays, realtime_ingester
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -220,6 +247,11 @@ async def direct_bus_routes(
     lat2: float,
     long2: float,
     buffer_radius: float = 0.5,
+    zoom: int | None = None,
+    tolerance: float | None = None,
+    geometry_format: str = "json",
+    top_k: int = 1,
+    departure_time: str | None = None,
 ) -> Dict[str, Any]:
     """
     Find the best direct bus route between two locations.
@@ -231,24 +263,49 @@ async def direct_bus_routes(
         lat2 (float): Latitude of the destination location.
         long2 (float): Longitude of the destination location.
         buffer_radius (float): Buffer radius in miles for searching bus stops.
+        zoom (int, optional): Map zoom level the geometry is simplified for.
+        tolerance (float, optional): Simplification tolerance in degrees
+            (overrides `zoom`). Full resolution when neither is given.
+        geometry_format (str): "json" (coordinate list), "polyline" (Google
+            encoded polyline) or "base64" (delta-encoded binary, base64).
+        top_k (int): Number of routes on distinct lines to return; routes after
+            the best one are listed under "alternatives".
+        departure_time (str, optional): Departure time as "HH:MM" (default: now),
+            used for the expected wait at the boarding stop.
 
     Returns:
         Dict[str, Any]: Information about the bus route, or a message if no route is found.
     """
+    if tolerance is None:
+        tolerance = tolerance_for_zoom(zoom) if zoom is not None else 0.0
+
     try:
-        # Get best bus route from Spark
-        route_data = await find_direct_bus_lines(
+        # Get best bus route from the in-memory bus network
+        route_data = find_direct_bus_lines(
             user_lat=lat1,
             user_lon=long1,
             target_lat=lat2,
             target_lon=long2,
             buffer_radius_miles=buffer_radius,
+            tolerance=tolerance,
+            top_k=top_k,
+            departure_seconds=clock_seconds(departure_time),
         )
 
         # Check if a route was found
         if "message" in route_data:
             return {"message": "No direct bus routes found"}
 
+        if route_data["status"] == "success":
+            route_data = {
+                **route_data,
+                "data": encode_route_geometry(route_data["data"], geometry_format),
+            }
+            if "alternatives" in route_data:
+                route_data["alternatives"] = [
+                    encode_route_geometry(route, geometry_format)
+                    for route in route_data["alternatives"]
+                ]
         return route_data
 
     except Exception as e:
@@ -256,12 +313,361 @@ async def direct_bus_routes(
         raise
 
 
+async def attractions_along_route(
+    db: AsyncSession,
+    lat1: float,
+    long1: float,
+    lat2: float,
+    long2: float,
+    buffer_radius: float = 0.5,
+    max_distance_meters: float = 200.0,
+    place_type: str | None = "tourist attraction",
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """
+    Find the places passed on the best direct bus route between two locations.
+
+    Args:
+        db (AsyncSession): Database session.
+        lat1 (float): Latitude of the starting location.
+        long1 (float): Longitude of the starting location.
+        lat2 (float): Latitude of the destination location.
+        long2 (float): Longitude of the destination location.
+        buffer_radius (float): Buffer radius in miles for searching bus stops.
+        max_distance_meters (float): Maximum distance of a place from the ridden
+            part of the route, in meters.
+        place_type (str, optional): Only include places of this type
+            (all places if None).
+        limit (int): Maximum number of places to return.
+
+    Returns:
+        Dict[str, Any]: The route and the places along it in the order they are
+        passed, or a message if no route is found.
+    """
+    route_data = find_direct_bus_lines(
+        user_lat=lat1,
+        user_lon=long1,
+        target_lat=lat2,
+        target_lon=long2,
+        buffer_radius_miles=buffer_radius,
+    )
+    if route_data["status"] != "success":
+        return {"message": "No direct bus routes found"}
+
+    route = route_data["data"]
+    index = await place_index_service.index(db)
+    places = index.places_along(
+        route["geometry"], max_distance_meters, place_type, limit
+    )
+    return {
+        "route": {
+            "route_number": route["route_number"],
+            "route_name": route["route_name"],
+            "direction": route["direction"],
+            "origin": route["origin"],
+            "destination": route["destination"],
+            "in_vehicle_distance": route["in_vehicle_distance"],
+        },
+        "total_places": len(places),
+        "places": places,
+    }
+
+
+async def bus_line_geometry(
+    route_number: str,
+    zoom: int | None = None,
+    tolerance: float | None = None,
+    geometry_format: str = "json",
+) -> Dict[str, Any] | bytes | None:
+    """
+    Get the geometries of every variant of a bus line.
+
+    Args:
+        route_number (str): The line's route number.
+        zoom (int, optional): Map zoom level the geometries are simplified for.
+        tolerance (float, optional): Simplification tolerance in degrees
+            (overrides `zoom`).
+        geometry_format (str): "json", "polyline", "base64", or "binary" for the
+            raw bytes of all variants (see `geometry_codec.encode_binary`).
+
+    Returns:
+        Dict[str, Any] | bytes | None: The variants, the binary encoding, or None
+        if the line does not exist.
+    """
+    if tolerance is None:
+        tolerance = tolerance_for_zoom(zoom) if zoom is not None else 0.0
+
+    variants = bus_line_geometries(route_number, tolerance)
+    if variants is None:
+        return None
+    if geometry_format == "binary":
+        return encode_binary([variant["geometry"] for variant in variants])
+    return {
+        "route_number": route_number,
+        "geometry_format": geometry_format,
+        "variants": [
+            {
+                "name": variant["name"],
+                "type": variant["type"],
+                "geometry": encode_geometry(
+                    variant["geometry"].tolist(), geometry_format
+                ),
+            }
+            for variant in variants
+        ],
+    }
+
+
+async def bus_od_matrix(
+    origins: List[Dict[str, float]],
+    destinations: List[Dict[str, float]],
+    buffer_radius: float = 0.5,
+) -> Dict[str, Any]:
+    """
+    Compute direct bus connectivity between many origins and destinations.
+
+    Args:
+        origins (List[Dict[str, float]]): Origin points with "lat" and "long".
+        destinations (List[Dict[str, float]]): Destination points with "lat" and "long".
+        buffer_radius (float): Buffer radius in miles for searching bus stops.
+
+    Returns:
+        Dict[str, Any]: Best direct line and walking distance per
+            origin-destination pair.
+    """
+    return direct_bus_od_matrix(
+        [(point["lat"], point["long"]) for point in origins],
+        [(point["lat"], point["long"]) for point in destinations],
+        buffer_radius,
+    )
+
+
+async def stop_catchment_places(db: AsyncSession, stop_number: str) -> Dict[str, Any]:
+    """
+    List the places within walking distance of a bus stop.
+
+    Args:
+        db (AsyncSession): Database session.
+        stop_number (str): Stop number (STOPNUM of bus_stops.csv).
+
+    Returns:
+        Dict[str, Any]: The stop and its places, closest first, or a message if
+        the stop or the catchment table is not available.
+    """
+    index = stop_catchment_service.index()
+    if index is None:
+        return {"message": "Stop catchments are not available"}
+    network = index.network
+    rows = index.stop_rows(stop_number)
+    if not rows:
+        return {"message": f"Bus stop {stop_number} not found"}
+
+    # Rows of the same stop number (one per line) share their location
+    place_ids, meters = index.places_near_stop(rows[0])
+    result = await db.execute(
+        select(PlaceModel).where(PlaceModel.id.in_(place_ids.tolist()))
+    )
+    places_by_id = {place.id: place for place in result.scalars().all()}
+    stop = network.stop_match(rows[0], 0.0)
+    return {
+        "stop": {
+            "stop_number": stop.STOPNUM,
+            "name": stop.STOPNAME,
+            "lines": sorted(
+                {network.line_names[network.stop_line[row]] for row in rows}
+            ),
+            "coordinates": [stop.LONG, stop.LAT],
+        },
+        "radius_meters": index.radius_meters,
+        "places": [
+            {
+                "id": place.id,
+                "name": place.name,
+                "address": place.address,
+                "types": place.types,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                "walking_distance_meters": round(float(distance), 1),
+            }
+            for place_id, distance in zip(place_ids.tolist(), meters.tolist())
+            if (place := places_by_id.get(place_id)) is not None
+        ],
+    }
+
+
+async def place_bus_stops(place_id: int) -> Dict[str, Any]:
+    """
+    List the bus stops within walking distance of a place.
+
+    Args:
+        place_id (int): Database id of the place.
+
+    Returns:
+        Dict[str, Any]: The stops (one entry per line serving them), closest
+        first, or a message if the catchment table is not available.
+    """
+    index = stop_catchment_service.index()
+    if index is None:
+        return {"message": "Stop catchments are not available"}
+    rows, meters = index.stops_near_place(place_id)
+    stops = []
+    for row, distance in zip(rows.tolist(), meters.tolist()):
+        stop = index.network.stop_match(row, 0.0)
+        stops.append(
+            {
+                "stop_number": stop.STOPNUM,
+                "name": stop.STOPNAME,
+                "line": stop.LINE,
+                "direction": stop.DIR,
+                "coordinates": [stop.LONG, stop.LAT],
+                "walking_distance_meters": round(float(distance), 1),
+            }
+        )
+    return {"place_id": place_id, "radius_meters": index.radius_meters, "stops": stops}
+
+
+async def bus_transfers(from_line: str, to_line: str) -> Dict[str, Any]:
+    """
+    Look up the best transfer stops from one bus line to another.
+
+    Args:
+        from_line (str): Route number of the line to transfer from.
+        to_line (str): Route number of the line to transfer to.
+
+    Returns:
+        Dict[str, Any]: The transfer stop pairs, closest first (none while
+        the transfer table has not been built).
+    """
+    index = transfer_service.index()
+    return {
+        "from_line": from_line,
+        "to_line": to_line,
+        "transfers": index.transfers(from_line, to_line) if index is not None else [],
+    }
+
+
+async def transfer_bus_routes(
+    lat1: float,
+    long1: float,
+    lat2: float,
+    long2: float,
+    buffer_radius: float = 0.5,
+    zoom: int | None = None,
+    tolerance: float | None = None,
+    geometry_format: str = "json",
+) -> Dict[str, Any]:
+    """
+    Find the best bus route with one transfer between two locations.
+
+    Args:
+        lat1 (float): Latitude of the starting location.
+        long1 (float): Longitude of the starting location.
+        lat2 (float): Latitude of the destination location.
+        long2 (float): Longitude of the destination location.
+        buffer_radius (float): Buffer radius in miles for searching bus stops.
+        zoom (int, optional): Map zoom level the geometry is simplified for.
+        tolerance (float, optional): Simplification tolerance in degrees
+            (overrides `zoom`).
+        geometry_format (str): "json", "polyline" or "base64".
+
+    Returns:
+        Dict[str, Any]: Both legs and the transfer, or a message if no route is found.
+    """
+    if tolerance is None:
+        tolerance = tolerance_for_zoom(zoom) if zoom is not None else 0.0
+
+    route_data = find_one_transfer_route(
+        lat1, long1, lat2, long2, buffer_radius, tolerance
+    )
+    if route_data["status"] != "success":
+        return {"message": route_data["data"]["message"]}
+
+    data = dict(route_data["data"])
+    for leg in ("first_leg", "second_leg"):
+        data[leg] = encode_route_geometry(data[leg], geometry_format)
+    return {"status": "success", "data": data}
+
+
+async def isochrone(lat: float, long: float, minutes: int = 15) -> Dict[str, Any]:
+    """
+    Compute the area reachable from a location within a time budget by walking plus bus.
+
+    Args:
+        lat (float): Latitude of the origin.
+        long (float): Longitude of the origin.
+        minutes (int): Travel time budget in minutes.
+
+    Returns:
+        Dict[str, Any]: A GeoJSON Feature with the reachable-area polygon.
+    """
+    return transit_isochrone(lat, long, minutes)
+
+
+async def transit_routes(
+    lat1: float,
+    long1: float,
+    lat2: float,
+    long2: float,
+    departure_time: str | None = None,
+    max_transfers: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Find the earliest-arrival transit journey between two locations, with transfers.
+
+    Args:
+        lat1 (float): Latitude of the starting location.
+        long1 (float): Longitude of the starting location.
+        lat2 (float): Latitude of the destination location.
+        long2 (float): Longitude of the destination location.
+        departure_time (str, optional): Departure time as "HH:MM" (default: now).
+        max_transfers (int, optional): Maximum number of transfers
+            (default: the `transit_max_transfers` setting).
+
+    Returns:
+        Dict[str, Any]: The journey and its legs, or a message if no journey is found.
+        Transit legs carry live delays when GTFS-Realtime feeds are ingested.
+    """
+    timetable = get_timetable()
+    if timetable is None:
+        return {"message": "Transit timetable is not available"}
+
+    if max_transfers is None:
+        max_transfers = get_settings().transit_max_transfers
+
+    journey = plan_transit_journey(
+        timetable,
+        origin_lat=lat1,
+        origin_lon=long1,
+        destination_lat=lat2,
+        destination_lon=long2,
+        departure_time=clock_seconds(departure_time),
+        max_transfers=max_transfers,
+    )
+    if journey is None:
+        return {"message": "No transit routes found"}
+    if get_settings().gtfs_rt_dir:
+        journey = apply_realtime_delays(journey, realtime_ingester.table())
+    return journey
+
+
+async def realtime_status() -> Dict[str, Any]:
+    """
+    Report the GTFS-Realtime ingest metrics of every feed file.
+
+    Returns:
+        Dict[str, Any]: The feed directory and, per feed file, the entity
+        counts, ingest time and feed age of its last ingest.
+    """
+    return realtime_ingester.status()
+
+
 async def create_attraction_visit_plan(
     db: AsyncSession,
     lat: float,
     long: float,
     max_places: int = 5,
     visit_duration_hours: float | None = None,
+    rating_weight: float = 0.5,
 ) -> Dict[str, Any]:
     """
     Create a plan to visit nearby attractions.
@@ -272,9 +678,20 @@ async def create_attraction_visit_plan(
         long (float): Starting longitude.
         max_places (int): Maximum number of places to include in the plan.
         visit_duration_hours (float | None): Total duration of the visit in hours. If None, duration is calculated.
+        rating_weight (float): Weight (0-1) of review quality against distance
+            when choosing the places.
 
     Returns:
         Dict[str, Any]: A dictionary containing the visit plan with suggested order and timing.
+
+    Nearby places are chosen on distance and review quality, read from the
+    precomputed `place_ratings` aggregates (one row per candidate, however
+    many reviews there are). The chosen places are visited in the order of
+    a short walking path from the start location (nearest-neighbour
+    construction improved with 2-opt over their pairwise distance matrix)
+    rather than by distance from the start. Each visit is reached on foot or
+    by direct bus, whichever is faster, looked up in the precomputed
+    attraction travel matrix, and the schedule includes the travel time.
     """
     # Get nearby places
     places = await nearest_places(db, lat, long)
@@ -282,8 +699,33 @@ async def create_attraction_visit_plan(
     if not places:
         return {"message": "No attractions found nearby"}
 
-    # Limit number of places
-    places = places[:max_places]
+    # Pick the best places on distance and rating. Development mock places
+    # carry made-up ids, so a rating only counts when its place row matches
+    # the candidate by name as well as by id.
+    result = await db.execute(
+        select(PlaceRating, PlaceModel.name)
+        .join(PlaceModel, PlaceModel.id == PlaceRating.place_id)
+        .where(PlaceRating.place_id.in_([place.id for place in places]))
+    )
+    ratings = {(rating.place_id, name): rating for rating, name in result.all()}
+    ratings = [ratings.get((place.id, place.name)) for place in places]
+    picked = select_candidates(
+        [place.distance for place in places],
+        [rating.rating_sum if rating else 0 for rating in ratings],
+        [rating.review_count if rating else 0 for rating in ratings],
+        max_places,
+        rating_weight,
+    )
+    places = [places[i] for i in picked.tolist()]
+    ratings = [ratings[i] for i in picked.tolist()]
+
+    # Order the visits; point 0 of the path is the start location
+    order, leg_distances = plan_visit_order(
+        [lat] + [place.latitude for place in places],
+        [long] + [place.longitude for place in places],
+    )
+    places = [places[i - 1] for i in order[1:].tolist()]
+    ratings = [ratings[i - 1] for i in order[1:].tolist()]
 
     # Calculate duration if not specified
     if visit_duration_hours is None:
@@ -301,7 +743,16 @@ async def create_attraction_visit_plan(
     current_time = datetime.now().replace(hour=9, minute=0)
     itinerary = []
 
-    for place, duration in zip(places, visit_times):
+    # Walking or bus legs from the start location through the visits
+    legs = travel_matrix_service.legs(
+        [lat] + [place.latitude for place in places],
+        [long] + [place.longitude for place in places],
+        departure_seconds=current_time.hour * 3600 + current_time.minute * 60,
+    )
+
+    visits = zip(places, ratings, visit_times, leg_distances.tolist(), legs)
+    for place, rating, duration, leg_distance, leg in visits:
+        current_time += timedelta(minutes=leg["minutes"])
         visit = {
             "place": {
                 "name": place.name,
@@ -310,7 +761,11 @@ async def create_attraction_visit_plan(
                 "distance_from_start": place.distance,
                 "latitude": place.latitude,
                 "longitude": place.longitude,
+                "average_rating": rating.average_rating if rating else None,
+                "review_count": rating.review_count if rating else 0,
             },
+            "distance_from_previous": round(leg_distance, 3),
+            "travel_from_previous": leg,
             "start_time": current_time.strftime("%I:%M %p"),
             "end_time": (current_time + timedelta(hours=duration)).strftime("%I:%M %p"),
             "suggested_duration": f"{duration:.1f} hours",
@@ -322,6 +777,8 @@ async def create_attraction_visit_plan(
     return {
         "total_attractions": len(places),
         "total_duration": f"{visit_duration_hours:.1f} hours",
+        "total_travel_distance": round(float(leg_distances.sum()), 3),
+        "total_travel_minutes": round(sum(leg["minutes"] for leg in legs), 1),
         "start_location": {"latitude": lat, "longitude": long},
         "itinerary": itinerary,
     }
@@ -0,0 +1,159 @@
+# server/services/geometry_codec.py
+
+import base64  # For embedding binary geometries in JSON
+from typing import Any, Dict, List, Sequence
+
+import numpy as np  # For vectorised quantisation and varint packing
+
+POLYLINE_PRECISION = 5  # Google encoded polyline precision (~1 m)
+BINARY_PRECISION = 6  # Binary geometry precision (~0.1 m)
+
+
+def _zigzag(deltas: np.ndarray) -> np.ndarray:
+    """Map signed integers to unsigned ones (0, -1, 1, -2, ... -> 0, 1, 2, 3, ...)."""
+    deltas = deltas.astype(np.int64)
+    return ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    magnitude = (values >> np.uint64(1)).astype(np.int64)
+    return magnitude ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def _pack_chunks(
+    values: np.ndarray, bits: int, continuation: int, offset: int
+) -> np.ndarray:
+    """
+    Split unsigned integers into little-endian `bits`-bit chunks.
+
+    Every chunk but the last of each value gets the `continuation` flag; `offset`
+    is added to every chunk. This is the shared core of LEB128 varints
+    (7 bits, 0x80, 0) and Google polylines (5 bits, 0x20, 63).
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint8)
+    values = values.astype(np.uint64)
+    # frexp's exponent is the bit length (exact for values below 2**53)
+    bit_length = np.frexp(values.astype(np.float64))[1].astype(np.int64)
+    n_chunks = np.maximum(1, -(-bit_length // bits))
+    max_chunks = int(n_chunks.max())
+    shifts = (np.arange(max_chunks, dtype=np.uint64) * np.uint64(bits))[None, :]
+    chunks = (values[:, None] >> shifts) & np.uint64((1 << bits) - 1)
+    index = np.arange(max_chunks)[None, :]
+    chunks = chunks | np.where(
+        index < n_chunks[:, None] - 1, np.uint64(continuation), np.uint64(0)
+    )
+    chunks = chunks + np.uint64(offset)
+    return chunks[index < n_chunks[:, None]].astype(np.uint8)
+
+
+def _unpack_chunks(
+    data: np.ndarray, bits: int, continuation: int, offset: int
+) -> np.ndarray:
+    """Inverse of `_pack_chunks`."""
+    chunks = data.astype(np.uint64) - np.uint64(offset)
+    ends = np.flatnonzero((chunks & np.uint64(continuation)) == 0)
+    if len(ends) == 0:
+        return np.empty(0, dtype=np.uint64)
+    starts = np.r_[0, ends[:-1] + 1]
+    position = np.arange(len(chunks)) - np.repeat(starts, ends - starts + 1)
+    payload = (chunks & np.uint64((1 << bits) - 1)) << (
+        position.astype(np.uint64) * np.uint64(bits)
+    )
+    return np.add.reduceat(payload, starts)
+
+
+def encode_polyline(
+    coords: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION
+) -> str:
+    """
+    Encode [lon, lat] coordinates as a Google encoded polyline.
+
+    The polyline stores (lat, lon) pairs, as specified by Google.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    values = np.round(coords[:, ::-1] * 10**precision).astype(np.int64)
+    deltas = np.diff(values, axis=0, prepend=0).ravel()
+    return _pack_chunks(_zigzag(deltas), 5, 0x20, 63).tobytes().decode("ascii")
+
+
+def decode_polyline(
+    encoded: str, precision: int = POLYLINE_PRECISION
+) -> List[List[float]]:
+    """Decode a Google encoded polyline into [lon, lat] coordinates."""
+    data = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8)
+    values = np.cumsum(
+        _unzigzag(_unpack_chunks(data, 5, 0x20, 63)).reshape(-1, 2), axis=0
+    )
+    return (values[:, ::-1] / 10**precision).tolist()
+
+
+def encode_binary(
+    lines: Sequence[Sequence[Sequence[float]]], precision: int = BINARY_PRECISION
+) -> bytes:
+    """
+    Encode one or more lines of [lon, lat] coordinates into a compact binary form.
+
+    Layout: for each line, a varint point count followed by the zigzag-varint
+    deltas of its interleaved lon/lat values at `precision` decimal places
+    (the first point is relative to 0). Varints are unsigned LEB128.
+    """
+    parts = []
+    for coords in lines:
+        values = np.round(
+            np.asarray(coords, dtype=np.float64).reshape(-1, 2) * 10**precision
+        ).astype(np.int64)
+        deltas = _zigzag(np.diff(values, axis=0, prepend=0).ravel())
+        parts.append(_pack_chunks(np.array([len(values)], dtype=np.uint64), 7, 0x80, 0))
+        parts.append(_pack_chunks(deltas, 7, 0x80, 0))
+    return np.concatenate(parts).tobytes() if parts else b""
+
+
+def decode_binary(
+    data: bytes, precision: int = BINARY_PRECISION
+) -> List[List[List[float]]]:
+    """Decode the output of `encode_binary` back into lines of [lon, lat] points."""
+    values = _unpack_chunks(np.frombuffer(data, dtype=np.uint8), 7, 0x80, 0)
+    lines, i = [], 0
+    while i < len(values):
+        count = int(values[i])
+        deltas = _unzigzag(values[i + 1 : i + 1 + 2 * count]).reshape(-1, 2)
+        lines.append((np.cumsum(deltas, axis=0) / 10**precision).tolist())
+        i += 1 + 2 * count
+    return lines
+
+
+def encode_geometry(coords: Sequence[Sequence[float]], geometry_format: str) -> Any:
+    """
+    Encode one line's coordinates for a JSON response.
+
+    Args:
+        coords (Sequence[Sequence[float]]): [lon, lat] coordinates.
+        geometry_format (str): "json" (coordinates unchanged), "polyline"
+            (Google encoded polyline) or "binary"/"base64" (base64 of `encode_binary`).
+
+    Returns:
+        Any: The coordinates or their encoded string.
+    """
+    if geometry_format == "json":
+        return coords
+    if geometry_format == "polyline":
+        return encode_polyline(coords)
+    if geometry_format in ("binary", "base64"):
+        return base64.b64encode(encode_binary([coords])).decode("ascii")
+    raise ValueError(f"Unsupported geometry format: {geometry_format}")
+
+
+def encode_route_geometry(
+    route: Dict[str, Any], geometry_format: str
+) -> Dict[str, Any]:
+    """Return a copy of a route result with `geometry` encoded in `geometry_format`."""
+    if geometry_format == "json":
+        return route
+    encoded = dict(route)
+    encoded["geometry"] = encode_geometry(route["geometry"], geometry_format)
+    encoded["geometry_format"] = (
+        "polyline" if geometry_format == "polyline" else "base64"
+    )
+    return encoded
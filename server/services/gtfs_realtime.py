@@ -0,0 +1,444 @@
+# server/services/gtfs_realtime.py
+
+import logging  # For logging ingest events
+import os  # For scanning the feed directory
+import threading  # For the background poller
+import time  # For feed ages and ingest timings
+from datetime import datetime, timedelta  # For the service day of absolute event times
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo  # For the local time of the service day
+
+import numpy as np  # For the array-backed delay table
+
+from config.settings import get_settings  # For the feed directory and poll interval
+from services.gtfs_timetable import Timetable, get_timetable
+
+logger = logging.getLogger(__name__)
+
+# Files of the feed directory that are parsed
+REALTIME_FILE_SUFFIXES = (".pb", ".pbf", ".bin")
+NO_DATA = 2  # StopTimeUpdate.ScheduleRelationship.NO_DATA
+
+
+class StopTimeEvent(NamedTuple):
+    """
+    The arrival or departure of a trip update at one stop.
+
+    Feeds report either a `delay` or only the absolute `time` of the event;
+    a plain (stop_id, delay) pair is also accepted.
+    """
+
+    stop_id: str
+    delay: Optional[int]  # Seconds late, None when only the time is known
+    time: Optional[int] = None  # POSIX time of the event
+    departure: bool = False  # Whether `time` is a departure rather than an arrival
+
+
+def service_day_starts(event_time: int, start_date: str, timezone: str) -> List[int]:
+    """
+    POSIX times at which the service days an event may belong to start.
+
+    GTFS stop times count from noon minus 12 hours, local time, of the service
+    day. That day is the trip's `start_date` (YYYYMMDD) when the feed gives
+    it; otherwise it is the local day of the event or, for trips running past
+    midnight, the day before.
+    """
+    zone = ZoneInfo(timezone)
+    if start_date:
+        days = [datetime.strptime(start_date, "%Y%m%d").date()]
+    else:
+        local_day = datetime.fromtimestamp(event_time, zone).date()
+        days = [local_day, local_day - timedelta(days=1)]
+    return [
+        int(datetime(d.year, d.month, d.day, 12, tzinfo=zone).timestamp()) - 12 * 3600
+        for d in days
+    ]
+
+
+def _load_bindings():
+    """Import the GTFS-Realtime protobuf bindings, which are only needed for ingest."""
+    try:
+        from google.transit import gtfs_realtime_pb2  # For parsing FeedMessage files
+    except ImportError as e:
+        raise RuntimeError(
+            "gtfs-realtime-bindings is required to ingest GTFS-Realtime feeds"
+        ) from e
+    return gtfs_realtime_pb2
+
+
+class DelayTable:
+    """
+    Live delays of every scheduled stop time of a timetable.
+
+    `delays` is aligned with `Timetable.arrivals`: the stop at position i of
+    trip t (of pattern p) is `pattern_time_offsets[p] + (t - first trip of p)
+    * stops of p + i`. Updates overwrite only the slice of the trip they are
+    about, so applying a feed never rebuilds the table.
+    """
+
+    def __init__(self, timetable: Timetable, timezone: Optional[str] = None):
+        self.timetable = timetable
+        self.timezone = (
+            timezone if timezone is not None else get_settings().gtfs_timezone
+        )
+        n_trips = len(timetable.trip_ids)
+        self.delays = np.zeros(len(timetable.arrivals), dtype=np.int32)
+        self.trip_index = {
+            trip_id: i for i, trip_id in enumerate(timetable.trip_ids.tolist())
+        }
+        self.trip_pattern = np.repeat(
+            np.arange(timetable.pattern_count), np.diff(timetable.pattern_trip_offsets)
+        )
+        self.trip_timestamp = np.zeros(n_trips, dtype=np.int64)
+        self.vehicle_lat = np.full(n_trips, np.nan)
+        self.vehicle_lon = np.full(n_trips, np.nan)
+        self.vehicle_timestamp = np.zeros(n_trips, dtype=np.int64)
+
+    def _trip_times(self, trip: int) -> Tuple[int, np.ndarray]:
+        """Start of a trip's slice of `delays` and the stops of its pattern."""
+        tt = self.timetable
+        pattern = int(self.trip_pattern[trip])
+        stops = tt.pattern_stop_list(pattern)
+        local_trip = trip - int(tt.pattern_trip_offsets[pattern])
+        start = int(tt.pattern_time_offsets[pattern]) + local_trip * len(stops)
+        return start, stops
+
+    def apply_trip_update(
+        self,
+        trip_id: str,
+        stop_delays: Iterable[Tuple],
+        timestamp: int = 0,
+        start_date: str = "",
+    ) -> bool:
+        """
+        Apply the stop time updates of one trip.
+
+        As in GTFS-Realtime, a delay holds for its stop and every later stop
+        up to the next update; earlier stops keep their previous delay. An
+        event with only an absolute time gets the delay against the scheduled
+        time of that stop on the trip's service day.
+
+        Args:
+            trip_id (str): GTFS trip id.
+            stop_delays (Iterable[Tuple]): `StopTimeEvent`s (or (stop_id,
+                delay in seconds) pairs) in stop order.
+            timestamp (int): Feed time of the update; older updates than the
+                last applied one for the trip are ignored.
+            start_date (str): Service day of the trip (YYYYMMDD), if known.
+
+        Returns:
+            bool: True if the update was applied.
+        """
+        trip = self.trip_index.get(trip_id)
+        if trip is None or timestamp < self.trip_timestamp[trip]:
+            return False
+        start, stops = self._trip_times(trip)
+
+        positions, delays = [], []
+        for event in stop_delays:
+            event = StopTimeEvent(*event)
+            stop = self.timetable.stop_index.get(event.stop_id)
+            matches = np.flatnonzero(stops == stop) if stop is not None else []
+            # Loop trips visit a stop twice: take the first visit after the last match
+            later = [int(p) for p in matches if not positions or p > positions[-1]]
+            if not later:
+                continue
+            if event.delay is not None:
+                delay = int(event.delay)
+            elif event.time is not None:
+                times = (
+                    self.timetable.departures
+                    if event.departure
+                    else self.timetable.arrivals
+                )
+                scheduled = int(times[start + later[0]])
+                delay = min(
+                    (
+                        int(event.time) - day_start - scheduled
+                        for day_start in service_day_starts(
+                            int(event.time), start_date, self.timezone
+                        )
+                    ),
+                    key=abs,
+                )
+            else:
+                continue
+            positions.append(later[0])
+            delays.append(delay)
+        if not positions:
+            return False
+
+        ends = positions[1:] + [len(stops)]
+        for position, end, delay in zip(positions, ends, delays):
+            self.delays[start + position : start + end] = delay
+        self.trip_timestamp[trip] = timestamp
+        return True
+
+    def apply_vehicle_position(
+        self, trip_id: str, lat: float, lon: float, timestamp: int = 0
+    ) -> bool:
+        """Record the last reported position of the vehicle serving a trip."""
+        trip = self.trip_index.get(trip_id)
+        if trip is None or timestamp < self.vehicle_timestamp[trip]:
+            return False
+        self.vehicle_lat[trip], self.vehicle_lon[trip] = lat, lon
+        self.vehicle_timestamp[trip] = timestamp
+        return True
+
+    def delay(self, trip_id: str, stop_id: str) -> Optional[int]:
+        """
+        Current delay of a trip at a stop, in seconds.
+
+        Returns:
+            Optional[int]: The delay (0 without updates), or None if the trip
+            does not serve the stop.
+        """
+        trip = self.trip_index.get(trip_id)
+        stop = self.timetable.stop_index.get(stop_id)
+        if trip is None or stop is None:
+            return None
+        start, stops = self._trip_times(trip)
+        matches = np.flatnonzero(stops == stop)
+        return int(self.delays[start + matches[0]]) if len(matches) else None
+
+    def vehicle_position(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        """Last reported position of the vehicle serving a trip, if any."""
+        trip = self.trip_index.get(trip_id)
+        if trip is None or not self.vehicle_timestamp[trip]:
+            return None
+        return {
+            "coordinates": [
+                float(self.vehicle_lon[trip]),
+                float(self.vehicle_lat[trip]),
+            ],
+            "timestamp": int(self.vehicle_timestamp[trip]),
+        }
+
+
+def _shift_time(hhmm: str, seconds: int) -> str:
+    """Shift an HH:MM time by a number of seconds."""
+    hours, minutes = map(int, hhmm.split(":"))
+    total = (hours * 3600 + minutes * 60 + seconds) % (24 * 3600)
+    return f"{total // 3600:02d}:{(total % 3600) // 60:02d}"
+
+
+def apply_realtime_delays(
+    journey: Dict[str, Any], table: Optional[DelayTable]
+) -> Dict[str, Any]:
+    """
+    Add live delays to the transit legs of a journey planned on the schedule.
+
+    Every boarding and alighting stop gets `delay_minutes` and `expected_time`,
+    and the journey `expected_arrival`, shifted by the delay of its last ride.
+    The journey itself is not re-planned, so a missed connection is not
+    detected here.
+    """
+    if table is None:
+        return journey
+    last_delay = None
+    for leg in journey.get("legs", []):
+        if leg["mode"] != "transit":
+            continue
+        for end in ("from", "to"):
+            delay = table.delay(leg["trip_id"], leg[end]["stop_id"])
+            if delay is None:
+                continue
+            leg[end]["delay_minutes"] = round(delay / 60, 1)
+            leg[end]["expected_time"] = _shift_time(leg[end]["time"], delay)
+            if end == "to":
+                last_delay = delay
+        vehicle = table.vehicle_position(leg["trip_id"])
+        if vehicle is not None:
+            leg["vehicle"] = vehicle
+    if last_delay is not None:
+        journey["expected_arrival"] = _shift_time(journey["arrival"], last_delay)
+    return journey
+
+
+def _stop_time_event(stop_update) -> Optional[StopTimeEvent]:
+    """
+    The arrival (or else departure) event of a StopTimeUpdate.
+
+    `delay` is optional in GTFS-Realtime and reads as 0 when absent, so it is
+    only used when the feed sets it; otherwise the event's absolute `time` is
+    kept for `DelayTable.apply_trip_update` to compare with the schedule.
+    """
+    for name in ("arrival", "departure"):
+        if not stop_update.HasField(name):
+            continue
+        event = getattr(stop_update, name)
+        if event.HasField("delay"):
+            return StopTimeEvent(stop_update.stop_id, int(event.delay))
+        if event.HasField("time"):
+            return StopTimeEvent(
+                stop_update.stop_id, None, int(event.time), name == "departure"
+            )
+    return None
+
+
+class RealtimeIngester:
+    """
+    Polls a directory of GTFS-Realtime feed files (TripUpdates and
+    VehiclePositions, as written by a fetcher) and applies every new or
+    changed file to the delay table of the shared timetable.
+
+    Per-feed metrics record how long the last ingest took, how many entities
+    it applied and how old the feed was when it was ingested.
+    """
+
+    def __init__(self, feed_dir: Optional[str] = None):
+        self.feed_dir = feed_dir
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+        self._table: Optional[DelayTable] = None
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def table(self) -> Optional[DelayTable]:
+        """The delay table of the current timetable, or None without a timetable."""
+        timetable = get_timetable()
+        if timetable is None:
+            return None
+        with self._lock:
+            if self._table is None or self._table.timetable is not timetable:
+                # A new service day starts without delays; re-read every feed file
+                self._table = DelayTable(timetable)
+                self._seen.clear()
+            return self._table
+
+    def poll(self) -> int:
+        """
+        Ingest every feed file that changed since the last poll.
+
+        Returns:
+            int: Number of files ingested.
+        """
+        feed_dir = (
+            self.feed_dir if self.feed_dir is not None else get_settings().gtfs_rt_dir
+        )
+        if not feed_dir or not os.path.isdir(feed_dir):
+            return 0
+        table = self.table()
+        if table is None:
+            return 0
+
+        ingested = 0
+        for entry in sorted(os.scandir(feed_dir), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.endswith(REALTIME_FILE_SUFFIXES):
+                continue
+            stat = entry.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            with self._lock:
+                if self._seen.get(entry.path) == signature:
+                    continue
+            try:
+                self._ingest_file(entry.path, entry.name, table)
+                ingested += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to ingest GTFS-Realtime file {entry.path}: {str(e)}"
+                )
+            with self._lock:
+                # A timetable reload swaps in a fresh table and clears _seen; leave the
+                # file unmarked so the next poll applies it to the new table too
+                if self._table is table:
+                    self._seen[entry.path] = signature
+        return ingested
+
+    def _ingest_file(self, path: str, name: str, table: DelayTable) -> None:
+        bindings = _load_bindings()
+        started = time.perf_counter()
+        feed = bindings.FeedMessage()
+        with open(path, "rb") as feed_file:
+            feed.ParseFromString(feed_file.read())
+
+        feed_timestamp = int(feed.header.timestamp)
+        trip_updates = vehicle_positions = applied = 0
+        with self._lock:
+            for entity in feed.entity:
+                if entity.HasField("trip_update"):
+                    trip_updates += 1
+                    update = entity.trip_update
+                    stop_delays = []
+                    for stop_update in update.stop_time_update:
+                        if (
+                            stop_update.schedule_relationship == NO_DATA
+                            or not stop_update.stop_id
+                        ):
+                            continue
+                        event = _stop_time_event(stop_update)
+                        if event is not None:
+                            stop_delays.append(event)
+                    applied += table.apply_trip_update(
+                        update.trip.trip_id,
+                        stop_delays,
+                        int(update.timestamp) or feed_timestamp,
+                        update.trip.start_date,
+                    )
+                if entity.HasField("vehicle") and entity.vehicle.HasField("position"):
+                    vehicle_positions += 1
+                    vehicle = entity.vehicle
+                    applied += table.apply_vehicle_position(
+                        vehicle.trip.trip_id,
+                        vehicle.position.latitude,
+                        vehicle.position.longitude,
+                        int(vehicle.timestamp) or feed_timestamp,
+                    )
+
+        now = time.time()
+        previous = self.metrics.get(name, {})
+        self.metrics[name] = {
+            "trip_updates": trip_updates,
+            "vehicle_positions": vehicle_positions,
+            "applied": applied,
+            "ingest_ms": round((time.perf_counter() - started) * 1000, 2),
+            "feed_timestamp": feed_timestamp,
+            "feed_age_seconds": (
+                round(now - feed_timestamp, 1) if feed_timestamp else None
+            ),
+            "ingested_at": now,
+            "ingest_count": previous.get("ingest_count", 0) + 1,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Ingest metrics of every feed file."""
+        return {
+            "feed_dir": (
+                self.feed_dir
+                if self.feed_dir is not None
+                else get_settings().gtfs_rt_dir
+            ),
+            "feeds": dict(self.metrics),
+        }
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"GTFS-Realtime watcher error: {str(e)}")
+
+    def start_watcher(self, interval: float = 30) -> None:
+        """Start a background thread that polls the feed directory."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval,),
+            name="gtfs-realtime-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Stop the background watcher thread."""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+# Shared ingester used by the transit router
+realtime_ingester = RealtimeIngester()
@@ -0,0 +1,229 @@
+# server/services/gtfs_shapes.py
+
+import json  # For the shape store metadata
+import logging  # For logging build and load events
+import os  # For file paths
+import shutil  # For replacing a shape store atomically
+from typing import Any, Dict, List, Sequence
+
+import numpy as np  # For the array-backed shape store
+import pandas as pd  # For reading the GTFS text files
+
+logger = logging.getLogger(__name__)
+
+# GTFS route_type codes reported as rail; every other type is reported as bus
+RAIL_ROUTE_TYPES = {"0", "1", "2", "12"}
+
+# Arrays of a shape store. Shape i has the points `offsets[i]:offsets[i + 1]`
+# of `coords` ([lon, lat]) and `cumdist` (cumulative planar distance in degrees,
+# restarting at 0 for each shape).
+SHAPE_FIELDS = (
+    "shape_ids",
+    "route_numbers",
+    "route_names",
+    "route_types",
+    "categories",
+    "offsets",
+    "coords",
+    "cumdist",
+)
+
+
+def _read_shapes(gtfs_dir: str) -> pd.DataFrame:
+    """Read shapes.txt of one feed, sorted by shape and point sequence."""
+    shapes = pd.read_csv(
+        os.path.join(gtfs_dir, "shapes.txt"),
+        usecols=["shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence"],
+        dtype={
+            "shape_id": str,
+            "shape_pt_lat": np.float64,
+            "shape_pt_lon": np.float64,
+            "shape_pt_sequence": np.int64,
+        },
+    )
+    return shapes.dropna().sort_values(["shape_id", "shape_pt_sequence"], kind="stable")
+
+
+def _read_shape_routes(gtfs_dir: str) -> pd.DataFrame:
+    """Link every shape of one feed to the route of the first trip using it."""
+    trips = pd.read_csv(
+        os.path.join(gtfs_dir, "trips.txt"), usecols=["route_id", "shape_id"], dtype=str
+    )
+    routes = pd.read_csv(
+        os.path.join(gtfs_dir, "routes.txt"), dtype=str
+    ).drop_duplicates("route_id")
+    for column in ("route_short_name", "route_long_name", "route_desc", "route_type"):
+        if column not in routes:
+            routes[column] = ""
+    routes = routes.fillna("")
+    linked = (
+        trips.dropna()
+        .drop_duplicates("shape_id")
+        .merge(routes, on="route_id", how="left")
+    )
+    linked = linked.fillna("")
+    short_names = linked["route_short_name"].str.strip()
+    return pd.DataFrame(
+        {
+            "shape_id": linked["shape_id"],
+            "route_number": short_names.where(short_names != "", linked["route_id"]),
+            "route_name": linked["route_long_name"],
+            "route_type": linked["route_desc"],
+            "category": np.where(
+                linked["route_type"].isin(RAIL_ROUTE_TYPES), "Rail", "Bus"
+            ),
+        }
+    )
+
+
+def build_shape_arrays(feed_dirs: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Convert the shapes of one or more GTFS feeds into shape store arrays.
+
+    Only shapes used by at least one trip are kept; each is labelled with the
+    short name of its route, which is the LINE of bus_stops.csv.
+
+    Args:
+        feed_dirs (Sequence[str]): Directories with shapes.txt, trips.txt and
+            routes.txt.
+
+    Returns:
+        Dict[str, np.ndarray]: The arrays listed in `SHAPE_FIELDS`.
+    """
+    frames = []
+    for gtfs_dir in feed_dirs:
+        shapes = _read_shapes(gtfs_dir)
+        frames.append(
+            shapes.merge(_read_shape_routes(gtfs_dir), on="shape_id", how="inner")
+        )
+    points = (
+        pd.concat(frames, ignore_index=True)
+        if frames
+        else pd.DataFrame(
+            columns=[
+                "shape_id",
+                "shape_pt_lat",
+                "shape_pt_lon",
+                "route_number",
+                "route_name",
+                "route_type",
+                "category",
+            ]
+        )
+    )
+
+    shape_ids = points["shape_id"].to_numpy(dtype=str)
+    starts = (
+        np.flatnonzero(np.r_[True, shape_ids[1:] != shape_ids[:-1]])
+        if len(points)
+        else np.empty(0, dtype=np.int64)
+    )
+    coords = np.column_stack(
+        [
+            points["shape_pt_lon"].to_numpy(dtype=np.float64),
+            points["shape_pt_lat"].to_numpy(dtype=np.float64),
+        ]
+    )
+
+    # Cumulative distances of all shapes at once, restarting at each shape start
+    segment_lengths = np.r_[
+        0.0, np.hypot(np.diff(coords[:, 0]), np.diff(coords[:, 1]))
+    ][: len(coords)]
+    segment_lengths[starts] = 0.0
+    cumdist = np.cumsum(segment_lengths)
+    if len(starts):
+        cumdist -= np.repeat(cumdist[starts], np.diff(np.r_[starts, len(coords)]))
+
+    def text(column):
+        return points[column].iloc[starts].fillna("").astype(str).to_numpy(dtype=str)
+
+    return {
+        "shape_ids": shape_ids[starts],
+        "route_numbers": text("route_number"),
+        "route_names": text("route_name"),
+        "route_types": text("route_type"),
+        "categories": text("category"),
+        "offsets": np.r_[starts, len(coords)].astype(np.int64),
+        "coords": coords,
+        "cumdist": cumdist,
+    }
+
+
+def save_shape_store(
+    arrays: Dict[str, np.ndarray], store_dir: str, feed_dirs: Sequence[str] = ()
+):
+    """
+    Save shape arrays as a directory of .npy files plus metadata.
+
+    Like the timetable store, the store is written to a staging directory and
+    swapped in by renaming, so readers never see a partial store.
+    """
+    store_dir = os.path.normpath(store_dir)
+    staging_dir = f"{store_dir}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for name in SHAPE_FIELDS:
+        np.save(
+            os.path.join(staging_dir, f"{name}.npy"), np.ascontiguousarray(arrays[name])
+        )
+    metadata = {
+        "feed_dirs": list(feed_dirs),
+        "fields": list(SHAPE_FIELDS),
+        "shape_count": len(arrays["shape_ids"]),
+    }
+    with open(
+        os.path.join(staging_dir, "metadata.json"), "w", encoding="utf-8"
+    ) as metadata_file:
+        json.dump(metadata, metadata_file)
+
+    previous_dir = f"{store_dir}.old"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(store_dir):
+        os.rename(store_dir, previous_dir)
+    os.rename(staging_dir, store_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+
+def shape_store_exists(store_dir: str) -> bool:
+    """Whether `store_dir` holds a complete shape store."""
+    return os.path.exists(os.path.join(store_dir, "metadata.json"))
+
+
+def load_shape_store(store_dir: str) -> Dict[str, np.ndarray]:
+    """Memory-map the arrays of a shape store written by `save_shape_store`."""
+    return {
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+        for name in SHAPE_FIELDS
+    }
+
+
+def shape_features(arrays: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Present the shapes of a store as bus line features.
+
+    The features carry the properties of bus_lines.geojson (RouteNumber,
+    RouteName, MetroBusType, MetroCategory), so `BusNetwork` can build its
+    route variants from either source, plus each shape's precomputed `cumdist`.
+    """
+    offsets = arrays["offsets"]
+    features = []
+    for i in range(len(arrays["shape_ids"])):
+        start, end = int(offsets[i]), int(offsets[i + 1])
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "ShapeId": str(arrays["shape_ids"][i]),
+                    "RouteNumber": str(arrays["route_numbers"][i]),
+                    "RouteName": str(arrays["route_names"][i]),
+                    "MetroBusType": str(arrays["route_types"][i]) or None,
+                    "MetroCategory": str(arrays["categories"][i]),
+                },
+                "geometry": {
+                    "type": "LineString",
+                    "coordinates": arrays["coords"][start:end],
+                },
+                "cumdist": arrays["cumdist"][start:end],
+            }
+        )
+    return features
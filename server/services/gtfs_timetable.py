@@ -0,0 +1,687 @@
+# server/services/gtfs_timetable.py
+
+import json  # For the timetable store metadata
+import logging  # For logging build progress
+import os  # For file paths
+import re  # For validating "HH:MM" departure times
+import shutil  # For replacing a timetable store atomically
+import threading  # For guarding the lazily built shared timetable
+from datetime import date, datetime  # For the active service day and the current time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np  # For the array-backed timetable
+import pandas as pd  # For reading the GTFS text files
+
+from config.settings import get_settings  # For the configured GTFS feed directories
+from services.spatial_grid import grid_pairs  # For walking transfers between stops
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_RADIUS_METERS = 250  # Maximum walking distance of a transfer between stops
+WALK_SPEED_MPS = 1.3  # Walking speed used for transfers and access/egress legs
+INF_TIME = np.iinfo(np.int32).max  # "Unreachable" time value
+# "HH:MM" departure times accepted by the API
+CLOCK_TIME_PATTERN = r"^([01]?\d|2[0-3]):[0-5]\d$"
+
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+
+def parse_gtfs_times(values: pd.Series) -> np.ndarray:
+    """
+    Convert GTFS "HH:MM:SS" times to seconds after midnight.
+
+    Hours may exceed 24 for trips running past midnight. Missing or
+    malformed values are returned as -1.
+    """
+    parts = values.fillna("").astype(str).str.strip().str.split(":", expand=True)
+    if parts.shape[1] < 3:
+        return np.full(len(values), -1, dtype=np.int64)
+    hours = pd.to_numeric(parts[0], errors="coerce")
+    minutes = pd.to_numeric(parts[1], errors="coerce")
+    seconds = pd.to_numeric(parts[2], errors="coerce")
+    total = hours * 3600 + minutes * 60 + seconds
+    return total.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def clock_seconds(clock_time: Optional[str] = None) -> int:
+    """
+    Convert an "HH:MM" clock time to seconds after midnight.
+
+    Args:
+        clock_time (str, optional): Time of day as "HH:MM" (default: now).
+
+    Returns:
+        int: Seconds after midnight.
+
+    Raises:
+        ValueError: If `clock_time` is not a valid "HH:MM" time.
+    """
+    if not clock_time:
+        now = datetime.now()
+        return now.hour * 3600 + now.minute * 60 + now.second
+    if not re.match(CLOCK_TIME_PATTERN, clock_time.strip()):
+        raise ValueError(f"Invalid time {clock_time!r}, expected HH:MM")
+    hours, minutes = clock_time.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60
+
+
+def _fill_missing_times(times: np.ndarray) -> np.ndarray:
+    """Linearly interpolate missing (-1) times between timed stops."""
+    missing = times < 0
+    if not missing.any() or missing.all():
+        return times
+    positions = np.arange(len(times))
+    filled = times.astype(np.float64)
+    filled[missing] = np.interp(
+        positions[missing], positions[~missing], filled[~missing]
+    )
+    return np.round(filled).astype(np.int64)
+
+
+def active_service_ids(gtfs_dir: str, service_date: date) -> Optional[set]:
+    """
+    Return the service ids running on `service_date`.
+
+    Uses calendar.txt and calendar_dates.txt when present. Returns None when
+    the feed has neither file, meaning all trips are kept.
+    """
+    calendar_path = os.path.join(gtfs_dir, "calendar.txt")
+    dates_path = os.path.join(gtfs_dir, "calendar_dates.txt")
+    if not os.path.exists(calendar_path) and not os.path.exists(dates_path):
+        return None
+
+    day = int(service_date.strftime("%Y%m%d"))
+    services = set()
+    if os.path.exists(calendar_path):
+        calendar = pd.read_csv(calendar_path, dtype={"service_id": str})
+        running = (
+            (calendar[WEEKDAYS[service_date.weekday()]] == 1)
+            & (calendar["start_date"].astype(int) <= day)
+            & (calendar["end_date"].astype(int) >= day)
+        )
+        services.update(calendar.loc[running, "service_id"])
+    if os.path.exists(dates_path):
+        exceptions = pd.read_csv(dates_path, dtype={"service_id": str})
+        exceptions = exceptions[exceptions["date"].astype(int) == day]
+        services.update(exceptions.loc[exceptions["exception_type"] == 1, "service_id"])
+        services.difference_update(
+            exceptions.loc[exceptions["exception_type"] == 2, "service_id"]
+        )
+    return services
+
+
+def csr_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenate the index ranges [starts[i], ends[i]) into one array."""
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+class Timetable:
+    """
+    Array-backed GTFS timetable for RAPTOR routing.
+
+    Trips with identical stop sequences on the same route are grouped into
+    patterns, split further so that no trip overtakes another (every
+    departure column of a pattern is then sorted). Per-pattern stop lists,
+    trip times and the stop -> pattern incidence are stored as flat arrays
+    with offset (CSR) indices:
+
+    - stops: `stop_ids`, `stop_names`, `stop_feeds`, `stop_lat`, `stop_lon`
+    - routes: `route_ids`, `route_short_names`, `route_long_names`, `route_types`
+    - trips: `trip_ids`; trips of pattern p are `pattern_trip_offsets[p]:[p + 1]`
+    - patterns: `pattern_route`, `pattern_stops` (by `pattern_stop_offsets`),
+      and trip-major `arrivals` / `departures` (by `pattern_time_offsets`)
+    - `stop_patterns` / `stop_pattern_positions` (by `stop_pattern_offsets`)
+    - walking transfers: `transfer_stops` / `transfer_seconds` (by `transfer_offsets`)
+    """
+
+    FIELDS = (
+        "stop_ids",
+        "stop_names",
+        "stop_feeds",
+        "stop_lat",
+        "stop_lon",
+        "route_ids",
+        "route_short_names",
+        "route_long_names",
+        "route_types",
+        "trip_ids",
+        "pattern_route",
+        "pattern_stop_offsets",
+        "pattern_stops",
+        "pattern_trip_offsets",
+        "pattern_time_offsets",
+        "arrivals",
+        "departures",
+        "stop_pattern_offsets",
+        "stop_patterns",
+        "stop_pattern_positions",
+        "transfer_offsets",
+        "transfer_stops",
+        "transfer_seconds",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+        self.stop_index: Dict[str, int] = {}
+        for i, (feed, stop_id) in enumerate(
+            zip(self.stop_feeds.tolist(), self.stop_ids.tolist())
+        ):
+            self.stop_index[f"{feed}:{stop_id}"] = i
+            self.stop_index.setdefault(stop_id, i)
+
+    @property
+    def stop_count(self) -> int:
+        """Number of stops."""
+        return len(self.stop_ids)
+
+    @property
+    def pattern_count(self) -> int:
+        """Number of patterns."""
+        return len(self.pattern_route)
+
+    def pattern_times(self, pattern: int):
+        """
+        Return the (arrivals, departures) matrices of a pattern.
+
+        Both have shape (trips, stops) and are views into the flat arrays.
+        """
+        n_stops = int(
+            self.pattern_stop_offsets[pattern + 1] - self.pattern_stop_offsets[pattern]
+        )
+        n_trips = int(
+            self.pattern_trip_offsets[pattern + 1] - self.pattern_trip_offsets[pattern]
+        )
+        start = int(self.pattern_time_offsets[pattern])
+        end = start + n_trips * n_stops
+        return (
+            self.arrivals[start:end].reshape(n_trips, n_stops),
+            self.departures[start:end].reshape(n_trips, n_stops),
+        )
+
+    def pattern_stop_list(self, pattern: int) -> np.ndarray:
+        """Stops served by a pattern, in order."""
+        return self.pattern_stops[
+            self.pattern_stop_offsets[pattern] : self.pattern_stop_offsets[pattern + 1]
+        ]
+
+    def scheduled_running_time(
+        self, route_short_name: str, from_stop_id: str, to_stop_id: str
+    ) -> Optional[int]:
+        """
+        Median scheduled in-vehicle time between two stops of a route.
+
+        Every pattern of the route that serves `to_stop_id` after `from_stop_id`
+        contributes the arrival minus departure time of each of its trips.
+
+        Args:
+            route_short_name (str): Route short name (the LINE of bus_stops.csv).
+            from_stop_id (str): GTFS stop id of the boarding stop.
+            to_stop_id (str): GTFS stop id of the alighting stop.
+
+        Returns:
+            Optional[int]: Running time in seconds, or None if no trip serves the pair.
+        """
+        from_stop = self.stop_index.get(str(from_stop_id))
+        to_stop = self.stop_index.get(str(to_stop_id))
+        if from_stop is None or to_stop is None:
+            return None
+
+        samples = []
+        start, end = (
+            self.stop_pattern_offsets[from_stop],
+            self.stop_pattern_offsets[from_stop + 1],
+        )
+        for pattern, position in zip(
+            self.stop_patterns[start:end].tolist(),
+            self.stop_pattern_positions[start:end].tolist(),
+        ):
+            if self.route_short_names[self.pattern_route[pattern]] != route_short_name:
+                continue
+            later = np.flatnonzero(
+                self.pattern_stop_list(pattern)[position + 1 :] == to_stop
+            )
+            if len(later) == 0:
+                continue
+            arrivals, departures = self.pattern_times(pattern)
+            durations = arrivals[:, position + 1 + later[0]] - departures[:, position]
+            samples.append(durations[durations >= 0])
+        samples = np.concatenate(samples) if samples else np.empty(0)
+        return int(np.median(samples)) if len(samples) else None
+
+
+def _read_feed(gtfs_dir: str, service_date: Optional[date]):
+    """Read the GTFS files of one feed, keeping the trips active on `service_date`."""
+    stops = pd.read_csv(
+        os.path.join(gtfs_dir, "stops.txt"),
+        usecols=["stop_id", "stop_name", "stop_lat", "stop_lon"],
+        dtype={"stop_id": str, "stop_name": str},
+    ).drop_duplicates("stop_id")
+    routes = pd.read_csv(
+        os.path.join(gtfs_dir, "routes.txt"), dtype=str
+    ).drop_duplicates("route_id")
+    trips = pd.read_csv(
+        os.path.join(gtfs_dir, "trips.txt"),
+        usecols=["route_id", "service_id", "trip_id"],
+        dtype=str,
+    ).drop_duplicates("trip_id")
+    if service_date is not None:
+        services = active_service_ids(gtfs_dir, service_date)
+        if services is not None:
+            trips = trips[trips["service_id"].isin(services)]
+    stop_times = pd.read_csv(
+        os.path.join(gtfs_dir, "stop_times.txt"),
+        usecols=[
+            "trip_id",
+            "arrival_time",
+            "departure_time",
+            "stop_id",
+            "stop_sequence",
+        ],
+        dtype={
+            "trip_id": str,
+            "arrival_time": str,
+            "departure_time": str,
+            "stop_id": str,
+            "stop_sequence": np.int64,
+        },
+    )
+    stop_times = stop_times[stop_times["trip_id"].isin(trips["trip_id"])]
+    return stops, routes, trips, stop_times
+
+
+def build_timetable_arrays(
+    feed_dirs: Sequence[str], service_date: Optional[date] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Build the Timetable arrays from one or more extracted GTFS feeds.
+
+    Args:
+        feed_dirs (Sequence[str]): Directories containing the GTFS text files
+            written by `process_gtfs_data`.
+        service_date (date, optional): Only keep trips running on this date
+            (when the feed has calendar files). Defaults to all trips.
+
+    Returns:
+        Dict[str, np.ndarray]: The arrays listed in `Timetable.FIELDS`.
+    """
+    stop_frames, route_frames = [], []
+    trip_route_codes, trip_id_list = [], []
+    st_trip, st_stop, st_arr, st_dep = [], [], [], []
+    stop_offset = route_offset = trip_offset = 0
+
+    for gtfs_dir in feed_dirs:
+        feed = os.path.basename(os.path.normpath(gtfs_dir))
+        stops, routes, trips, stop_times = _read_feed(gtfs_dir, service_date)
+        logger.info(
+            f"GTFS feed {feed}: {len(stops)} stops, {len(trips)} trips, "
+            f"{len(stop_times)} stop times"
+        )
+
+        stops = stops.assign(feed=feed)
+        stop_codes = pd.Series(
+            np.arange(len(stops)) + stop_offset, index=stops["stop_id"].to_numpy()
+        )
+        route_codes = pd.Series(
+            np.arange(len(routes)) + route_offset, index=routes["route_id"].to_numpy()
+        )
+        trips = trips[trips["route_id"].isin(route_codes.index)]
+        trip_codes = pd.Series(
+            np.arange(len(trips)) + trip_offset, index=trips["trip_id"].to_numpy()
+        )
+
+        stop_times = stop_times[
+            stop_times["stop_id"].isin(stop_codes.index)
+            & stop_times["trip_id"].isin(trip_codes.index)
+        ]
+        st_trip.append(
+            trip_codes.reindex(stop_times["trip_id"]).to_numpy(dtype=np.int64)
+        )
+        st_stop.append(
+            stop_codes.reindex(stop_times["stop_id"]).to_numpy(dtype=np.int64)
+        )
+        sequence = stop_times["stop_sequence"].to_numpy(dtype=np.int64)
+        order = np.lexsort((sequence, st_trip[-1]))
+        st_trip[-1], st_stop[-1] = st_trip[-1][order], st_stop[-1][order]
+        arrivals = parse_gtfs_times(stop_times["arrival_time"])[order]
+        departures = parse_gtfs_times(stop_times["departure_time"])[order]
+        arrivals = np.where(arrivals < 0, departures, arrivals)
+        departures = np.where(departures < 0, arrivals, departures)
+        st_arr.append(_fill_missing_times(arrivals))
+        st_dep.append(_fill_missing_times(departures))
+
+        stop_frames.append(stops)
+        route_frames.append(routes)
+        trip_route_codes.append(
+            route_codes.reindex(trips["route_id"]).to_numpy(dtype=np.int64)
+        )
+        trip_id_list.append(trips["trip_id"].to_numpy(dtype=str))
+        stop_offset += len(stops)
+        route_offset += len(routes)
+        trip_offset += len(trips)
+
+    stops = (
+        pd.concat(stop_frames, ignore_index=True)
+        if stop_frames
+        else pd.DataFrame(
+            columns=["stop_id", "stop_name", "stop_lat", "stop_lon", "feed"]
+        )
+    )
+    routes = (
+        pd.concat(route_frames, ignore_index=True)
+        if route_frames
+        else pd.DataFrame(columns=["route_id"])
+    )
+    trip_route = (
+        np.concatenate(trip_route_codes) if trip_route_codes else np.empty(0, np.int64)
+    )
+    raw_trip_ids = np.concatenate(trip_id_list) if trip_id_list else np.empty(0, str)
+    st_trip = np.concatenate(st_trip) if st_trip else np.empty(0, np.int64)
+    st_stop = np.concatenate(st_stop) if st_stop else np.empty(0, np.int64)
+    st_arr = np.concatenate(st_arr) if st_arr else np.empty(0, np.int64)
+    st_dep = np.concatenate(st_dep) if st_dep else np.empty(0, np.int64)
+
+    # Group trips into patterns keyed by (route, stop sequence)
+    trip_starts = (
+        np.flatnonzero(np.r_[True, np.diff(st_trip) != 0])
+        if len(st_trip)
+        else np.empty(0, np.int64)
+    )
+    trip_ends = np.r_[trip_starts[1:], len(st_trip)]
+    pattern_keys: Dict[tuple, int] = {}
+    pattern_members: List[List[int]] = []
+    for start, end in zip(trip_starts.tolist(), trip_ends.tolist()):
+        if end - start < 2:
+            continue
+        key = (int(trip_route[st_trip[start]]), st_stop[start:end].tobytes())
+        pattern = pattern_keys.setdefault(key, len(pattern_members))
+        if pattern == len(pattern_members):
+            pattern_members.append([])
+        pattern_members[pattern].append(start)
+
+    # Split patterns into non-overtaking sub-patterns and lay out the arrays
+    pattern_route, pattern_stops, pattern_stop_offsets = [], [], [0]
+    pattern_trip_offsets, pattern_time_offsets = [0], [0]
+    trip_ids, arrivals, departures = [], [], []
+    for (route_code, _), starts in zip(pattern_keys.keys(), pattern_members):
+        n_stops = int(trip_ends[np.searchsorted(trip_starts, starts[0])] - starts[0])
+        starts = sorted(starts, key=lambda s: (st_dep[s], st_arr[s + n_stops - 1]))
+        lanes: List[List[int]] = []
+        for start in starts:
+            for lane in lanes:
+                last = lane[-1]
+                if np.all(
+                    st_dep[start : start + n_stops] >= st_dep[last : last + n_stops]
+                ) and np.all(
+                    st_arr[start : start + n_stops] >= st_arr[last : last + n_stops]
+                ):
+                    lane.append(start)
+                    break
+            else:
+                lanes.append([start])
+        for lane in lanes:
+            pattern_route.append(route_code)
+            pattern_stops.append(st_stop[lane[0] : lane[0] + n_stops])
+            pattern_stop_offsets.append(pattern_stop_offsets[-1] + n_stops)
+            pattern_trip_offsets.append(pattern_trip_offsets[-1] + len(lane))
+            pattern_time_offsets.append(pattern_time_offsets[-1] + len(lane) * n_stops)
+            for start in lane:
+                trip_ids.append(raw_trip_ids[st_trip[start]])
+                arrivals.append(st_arr[start : start + n_stops])
+                departures.append(st_dep[start : start + n_stops])
+
+    n_stops_total = len(stops)
+    pattern_stops = (
+        np.concatenate(pattern_stops).astype(np.int32)
+        if pattern_stops
+        else np.empty(0, np.int32)
+    )
+    pattern_stop_offsets = np.asarray(pattern_stop_offsets, dtype=np.int64)
+
+    # Stop -> (pattern, position) incidence, sorted by stop
+    pattern_of_entry = np.repeat(
+        np.arange(len(pattern_route)), np.diff(pattern_stop_offsets)
+    )
+    position_of_entry = np.arange(len(pattern_stops)) - np.repeat(
+        pattern_stop_offsets[:-1], np.diff(pattern_stop_offsets)
+    )
+    order = np.lexsort((position_of_entry, pattern_of_entry, pattern_stops))
+    stop_pattern_offsets = np.concatenate(
+        ([0], np.cumsum(np.bincount(pattern_stops, minlength=n_stops_total)))
+    ).astype(np.int64)
+
+    # Walking transfers between nearby stops
+    stop_lat = stops["stop_lat"].to_numpy(dtype=np.float64)
+    stop_lon = stops["stop_lon"].to_numpy(dtype=np.float64)
+    src, dst, meters = grid_pairs(
+        stop_lat, stop_lon, stop_lat, stop_lon, TRANSFER_RADIUS_METERS
+    )
+    keep = src != dst
+    src, dst, meters = src[keep], dst[keep], meters[keep]
+    order_t = np.lexsort((dst, src))
+    transfer_offsets = np.concatenate(
+        ([0], np.cumsum(np.bincount(src, minlength=n_stops_total)))
+    ).astype(np.int64)
+
+    def text(frame, column):
+        if column not in frame:
+            return np.full(len(frame), "", dtype=str)
+        return frame[column].fillna("").astype(str).to_numpy(dtype=str)
+
+    return {
+        "stop_ids": text(stops, "stop_id"),
+        "stop_names": text(stops, "stop_name"),
+        "stop_feeds": text(stops, "feed"),
+        "stop_lat": stop_lat,
+        "stop_lon": stop_lon,
+        "route_ids": text(routes, "route_id"),
+        "route_short_names": text(routes, "route_short_name"),
+        "route_long_names": text(routes, "route_long_name"),
+        "route_types": pd.to_numeric(
+            pd.Series(text(routes, "route_type")), errors="coerce"
+        )
+        .fillna(3)
+        .to_numpy(dtype=np.int16),
+        "trip_ids": np.asarray(trip_ids, dtype=str),
+        "pattern_route": np.asarray(pattern_route, dtype=np.int32),
+        "pattern_stop_offsets": pattern_stop_offsets,
+        "pattern_stops": pattern_stops,
+        "pattern_trip_offsets": np.asarray(pattern_trip_offsets, dtype=np.int64),
+        "pattern_time_offsets": np.asarray(pattern_time_offsets, dtype=np.int64),
+        "arrivals": (
+            np.concatenate(arrivals).astype(np.int32)
+            if arrivals
+            else np.empty(0, np.int32)
+        ),
+        "departures": (
+            np.concatenate(departures).astype(np.int32)
+            if departures
+            else np.empty(0, np.int32)
+        ),
+        "stop_pattern_offsets": stop_pattern_offsets,
+        "stop_patterns": pattern_of_entry[order].astype(np.int32),
+        "stop_pattern_positions": position_of_entry[order].astype(np.int32),
+        "transfer_offsets": transfer_offsets,
+        "transfer_stops": dst[order_t].astype(np.int32),
+        "transfer_seconds": np.ceil(meters[order_t] / WALK_SPEED_MPS).astype(np.int32),
+    }
+
+
+def save_timetable_store(
+    arrays: Dict[str, np.ndarray],
+    store_dir: str,
+    service_date: Optional[date] = None,
+    feed_dirs: Sequence[str] = (),
+):
+    """
+    Save timetable arrays as a directory of .npy files plus metadata.
+
+    Every array has a fixed-width dtype (integers or fixed-length strings), so
+    `load_timetable_store` can memory-map it and all API workers share the same
+    pages through the OS page cache. The store is written to a staging
+    directory and swapped in by renaming, so readers never see a partial store.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): The arrays listed in `Timetable.FIELDS`.
+        store_dir (str): Directory to write the store to.
+        service_date (date, optional): Service day the trips were filtered to.
+        feed_dirs (Sequence[str]): GTFS feeds the store was built from.
+    """
+    store_dir = os.path.normpath(store_dir)
+    staging_dir = f"{store_dir}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for name in Timetable.FIELDS:
+        np.save(
+            os.path.join(staging_dir, f"{name}.npy"), np.ascontiguousarray(arrays[name])
+        )
+    metadata = {
+        "service_date": service_date.isoformat() if service_date else None,
+        "feed_dirs": list(feed_dirs),
+        "fields": list(Timetable.FIELDS),
+    }
+    with open(
+        os.path.join(staging_dir, "metadata.json"), "w", encoding="utf-8"
+    ) as metadata_file:
+        json.dump(metadata, metadata_file)
+
+    previous_dir = f"{store_dir}.old"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(store_dir):
+        os.rename(store_dir, previous_dir)
+    os.rename(staging_dir, store_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+
+def read_store_metadata(store_dir: str) -> Optional[dict]:
+    """Return the metadata of a timetable store, or None if there is no store."""
+    try:
+        with open(
+            os.path.join(store_dir, "metadata.json"), encoding="utf-8"
+        ) as metadata_file:
+            return json.load(metadata_file)
+    except (OSError, ValueError):
+        return None
+
+
+def load_timetable_store(store_dir: str) -> Timetable:
+    """
+    Load a timetable store written by `save_timetable_store`.
+
+    The arrays are memory-mapped read-only rather than read into memory.
+    """
+    arrays = {
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+        for name in Timetable.FIELDS
+    }
+    timetable = Timetable(arrays)
+    logger.info(
+        f"Loaded timetable store {store_dir}: {timetable.stop_count} stops, "
+        f"{timetable.pattern_count} patterns, {len(timetable.trip_ids)} trips"
+    )
+    return timetable
+
+
+def build_timetable(
+    feed_dirs: Sequence[str], service_date: Optional[date] = None
+) -> Timetable:
+    """Build a Timetable from one or more extracted GTFS feeds."""
+    timetable = Timetable(build_timetable_arrays(feed_dirs, service_date))
+    logger.info(
+        f"Built timetable: {timetable.stop_count} stops, "
+        f"{timetable.pattern_count} patterns, {len(timetable.trip_ids)} trips"
+    )
+    return timetable
+
+
+class TimetableService:
+    """
+    Holds the shared Timetable, memory-mapped from the store built offline by
+    scripts/build_timetable_store.py.
+
+    The timetable is never built in the API process: building it reads every
+    stop_times.txt and costs gigabytes per worker. The store is reloaded when
+    the build job replaces it; a store built for another service day keeps
+    being served (with a warning) until the job writes a new one.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None):
+        self.store_dir = store_dir
+        self._timetable: Optional[Timetable] = None
+        self._signature = None
+        self._service_date: Optional[str] = None
+        self._warned = None
+        self._lock = threading.Lock()
+
+    def _store_signature(self, store_dir: str):
+        """Identity of the current store, or None if there is none."""
+        try:
+            stat = os.stat(os.path.join(store_dir, "metadata.json"))
+        except OSError:
+            return None
+        return store_dir, stat.st_mtime_ns, stat.st_size
+
+    def _warn_once(self, key, message: str) -> None:
+        if self._warned != key:
+            logger.warning(message)
+            self._warned = key
+
+    @property
+    def timetable(self) -> Optional[Timetable]:
+        """
+        The shared timetable, or None if no store has been built.
+
+        A store replaced by the build job is picked up on the next access.
+        """
+        store_dir = (
+            self.store_dir
+            if self.store_dir is not None
+            else get_settings().gtfs_timetable_store
+        )
+        signature = self._store_signature(store_dir)
+        today = date.today()
+        with self._lock:
+            if signature is None:
+                self._warn_once(
+                    ("missing", store_dir),
+                    f"Timetable store {store_dir} not found, transit routing is "
+                    "unavailable; build it with scripts/build_timetable_store.py",
+                )
+                return self._timetable
+            if signature != self._signature:
+                metadata = read_store_metadata(store_dir)
+                if metadata is not None:
+                    self._timetable = load_timetable_store(store_dir)
+                    self._signature = signature
+                    self._service_date = metadata.get("service_date")
+            current_dates = (None, today.isoformat())
+            if self._timetable is not None and self._service_date not in current_dates:
+                self._warn_once(
+                    ("stale", self._signature, today),
+                    f"Timetable store {store_dir} is for {self._service_date}, not "
+                    f"{today}; serving it until scripts/build_timetable_store.py "
+                    "rebuilds it",
+                )
+            return self._timetable
+
+
+# Shared service instance used by the transit router
+timetable_service = TimetableService()
+
+
+def get_timetable() -> Optional[Timetable]:
+    """Return the shared timetable loaded from the store, or None if there is none."""
+    return timetable_service.timetable
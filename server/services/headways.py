@@ -0,0 +1,169 @@
+# server/services/headways.py
+
+import logging  # For logging build and load events
+import os  # For checking the table file
+import threading  # For guarding the shared table
+from typing import Dict, Optional
+
+import numpy as np  # For the compact headway table
+
+from config.settings import get_settings  # For the table path
+from services.gtfs_timetable import Timetable
+
+logger = logging.getLogger(__name__)
+
+# Time bands (seconds after midnight): early, AM peak, midday, PM peak,
+# evening and night. GTFS times past 24:00 (late trips of the service day)
+# are folded back onto the clock, so a 25:00 departure counts at 01:00.
+HEADWAY_BAND_EDGES = np.array([0, 6, 9, 15, 19, 22, 24]) * 3600
+DAY_SECONDS = 24 * 3600
+# Wait assumed when a line does not run at a stop in the band
+MAX_EXPECTED_WAIT_MINUTES = 60.0
+
+TABLE_FIELDS = ("route_names", "stop_ids", "headways")
+
+
+def time_band(seconds: int) -> int:
+    """Index of the time band containing a time of day in seconds."""
+    clock = seconds % DAY_SECONDS
+    band = int(np.searchsorted(HEADWAY_BAND_EDGES, clock, side="right")) - 1
+    return min(max(band, 0), len(HEADWAY_BAND_EDGES) - 2)
+
+
+def build_headway_table(timetable: Timetable) -> Dict[str, np.ndarray]:
+    """
+    Count the departures of every route at every stop per time band.
+
+    Departures after 24:00 are counted in the band of their clock time, the
+    same band `time_band` returns for a query at that time.
+
+    Args:
+        timetable (Timetable): The timetable of the service day.
+
+    Returns:
+        Dict[str, np.ndarray]: `route_names` and `stop_ids` (one row per route
+        and stop it serves) and `headways`, the mean seconds between departures
+        of each row per band (shape rows x bands, inf without departures).
+    """
+    n_bands = len(HEADWAY_BAND_EDGES) - 1
+    n_stops = timetable.stop_count
+    keys = []
+    for pattern in range(timetable.pattern_count):
+        _, departures = timetable.pattern_times(pattern)
+        stops = np.broadcast_to(timetable.pattern_stop_list(pattern), departures.shape)
+        valid = departures >= 0
+        clock = departures[valid] % DAY_SECONDS
+        bands = np.searchsorted(HEADWAY_BAND_EDGES, clock, side="right") - 1
+        bands = np.clip(bands, 0, n_bands - 1)
+        route = int(timetable.pattern_route[pattern])
+        keys.append((route * n_stops + stops[valid].astype(np.int64)) * n_bands + bands)
+    keys, counts = np.unique(
+        np.concatenate(keys) if keys else np.empty(0, np.int64), return_counts=True
+    )
+
+    rows, row_of_key = np.unique(keys // n_bands, return_inverse=True)
+    departures = np.zeros((len(rows), n_bands))
+    departures[row_of_key, keys % n_bands] = counts
+    band_seconds = np.diff(HEADWAY_BAND_EDGES).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        headways = np.where(departures > 0, band_seconds / departures, np.inf)
+    return {
+        "route_names": np.asarray(timetable.route_short_names)[rows // n_stops].astype(
+            str
+        ),
+        "stop_ids": np.asarray(timetable.stop_ids)[rows % n_stops].astype(str),
+        "headways": headways.astype(np.float32),
+    }
+
+
+def save_headway_table(table: Dict[str, np.ndarray], path: str) -> None:
+    """
+    Save a headway table as a compressed .npz file.
+
+    The file is written next to `path` and renamed into place, so API workers
+    reloading the table never read a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    staging_path = f"{path}.tmp"
+    with open(staging_path, "wb") as table_file:
+        np.savez_compressed(table_file, **table)
+    os.replace(staging_path, path)
+
+
+def load_headway_table(path: str) -> Dict[str, np.ndarray]:
+    """Load a headway table written by `save_headway_table`."""
+    with np.load(path) as data:
+        return {name: data[name] for name in TABLE_FIELDS}
+
+
+class HeadwayTable:
+    """Constant-time lookup of the expected wait for a line at a stop."""
+
+    def __init__(self, table: Dict[str, np.ndarray]):
+        self.headways = table["headways"]
+        self.rows = {
+            (route, stop): row
+            for row, (route, stop) in enumerate(
+                zip(table["route_names"].tolist(), table["stop_ids"].tolist())
+            )
+        }
+
+    def expected_wait_minutes(
+        self, line: str, stop_id: str, band: int
+    ) -> Optional[float]:
+        """
+        Expected wait (half the headway) for a line at a stop in a time band.
+
+        Returns:
+            Optional[float]: Minutes, capped at `MAX_EXPECTED_WAIT_MINUTES` (also
+            used when the line does not run in the band), or None if the
+            timetable does not know the line at this stop.
+        """
+        row = self.rows.get((line, stop_id))
+        if row is None:
+            return None
+        return min(float(self.headways[row, band]) / 120, MAX_EXPECTED_WAIT_MINUTES)
+
+
+class HeadwayService:
+    """
+    Loads the headway table built offline by scripts/build_headway_table.py.
+
+    The table is never derived in the API process; it is reloaded when the
+    build job replaces the file, and routing goes without expected waits
+    while there is no file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._table: Optional[HeadwayTable] = None
+        self._signature = None
+        self._warned = None
+        self._lock = threading.Lock()
+
+    def table(self) -> Optional[HeadwayTable]:
+        """The headway table, or None if the file has not been built."""
+        path = self.path if self.path is not None else get_settings().headway_table_path
+        with self._lock:
+            if not os.path.exists(path):
+                if self._warned != path:
+                    logger.warning(
+                        f"Headway table {path} not found, "
+                        "build it with scripts/build_headway_table.py"
+                    )
+                    self._warned = path
+                self._table, self._signature = None, None
+                return None
+            stat = os.stat(path)
+            signature = (path, stat.st_mtime_ns, stat.st_size)
+            if self._table is None or self._signature != signature:
+                self._table = HeadwayTable(load_headway_table(path))
+                self._signature = signature
+                logger.info(
+                    f"Loaded headway table {path} ({len(self._table.rows)} line stops)"
+                )
+            return self._table
+
+
+# Shared service instance
+headway_service = HeadwayService()
@@ -0,0 +1,255 @@
+# server/services/isochrone.py
+
+import heapq  # For the bounded shortest-path expansion
+import threading  # For guarding the shared index and its cache
+from collections import OrderedDict  # For the LRU result cache
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np  # For the stop graph arrays
+import shapely  # For building the reachable-area polygon
+from shapely.geometry import mapping
+
+from services.bus_network import ROUTE_MATCH_TOLERANCE, BusNetwork, get_bus_network
+from services.gtfs_timetable import WALK_SPEED_MPS
+from services.route_cache import CLUSTER_CELL_DEGREES  # Cell size of cached origins
+from services.spatial_grid import METERS_PER_DEGREE, grid_pairs, haversine_meters
+from services.transfers import TRANSFER_RADIUS_METERS  # Longest transfer walk
+
+BUS_SPEED_MPS = 5.4  # Average bus speed including stops (~12 mph)
+BOARDING_WAIT_SECONDS = 300  # Expected wait when boarding or changing lines
+MAX_WALK_METERS = 800  # Maximum walk from the origin or from the last stop
+CACHE_SIZE = 256  # Number of cached isochrones
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, weights: np.ndarray, n_nodes: int):
+    """Build (offsets, targets, weights) adjacency arrays sorted by source."""
+    order = np.argsort(sources, kind="stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n_nodes))))
+    return offsets.astype(np.int64), targets[order].astype(np.int64), weights[order]
+
+
+class IsochroneIndex:
+    """
+    Stop graph and isochrone cache for one BusNetwork.
+
+    Every stop row of the network is two nodes: standing at the stop (row s)
+    and on board a bus at the stop (row s + stop_count). Boarding edges cost
+    the boarding wait and alighting edges nothing; ride edges join
+    consecutive on-board nodes of a line along each of its route variants in
+    the direction of service given by the stops' DIR (both ways only where
+    it is unknown), weighted by in-vehicle time; walk edges join stops of
+    different lines within `TRANSFER_RADIUS_METERS`, weighted by walking
+    time. The wait is thus charged only when a bus is taken.
+    Results are cached per origin cell and time budget; a reloaded network
+    gets a new index, so the cache never serves stale results.
+    """
+
+    def __init__(self, network: BusNetwork):
+        self.network = network
+        n_stops = network.stop_count
+        sources, targets, seconds = [], [], []
+
+        # Ride edges between consecutive on-board nodes along each variant,
+        # forwards for stops running towards increasing measures (+1) and
+        # backwards for the others (-1); stops of unknown direction (0) join
+        # both chains
+        for variant in network.variants:
+            served = variant["stop_offsets"] <= ROUTE_MATCH_TOLERANCE
+            if served.sum() < 2:
+                continue
+            stop_ids = variant["stop_ids"][served]
+            measures = variant["stop_measures"][served]
+            directions = variant["stop_direction"][served]
+            order = np.argsort(measures, kind="stable")
+            stop_ids, measures, directions = (
+                stop_ids[order],
+                measures[order],
+                directions[order],
+            )
+            # Convert measures (degrees along the line) to meters
+            coords = variant["geometry"]
+            length_m = haversine_meters(
+                coords[:-1, 1], coords[:-1, 0], coords[1:, 1], coords[1:, 0]
+            ).sum()
+            meters_per_unit = (
+                length_m / variant["cumdist"][-1] if variant["cumdist"][-1] > 0 else 0.0
+            )
+            for sign in (1, -1):
+                chain = (directions == sign) | (directions == 0)
+                if chain.sum() < 2:
+                    continue
+                nodes = stop_ids[chain] + n_stops
+                ride = np.diff(measures[chain]) * meters_per_unit / BUS_SPEED_MPS
+                sources.append(nodes[:-1] if sign > 0 else nodes[1:])
+                targets.append(nodes[1:] if sign > 0 else nodes[:-1])
+                seconds.append(ride)
+
+        # Boarding and alighting edges between the two nodes of each stop
+        stops = np.arange(n_stops, dtype=np.int64)
+        sources += [stops, stops + n_stops]
+        targets += [stops + n_stops, stops]
+        seconds += [np.full(n_stops, float(BOARDING_WAIT_SECONDS)), np.zeros(n_stops)]
+
+        # Walk edges between stops of different lines
+        i, j, meters = grid_pairs(
+            network.stop_lat,
+            network.stop_lon,
+            network.stop_lat,
+            network.stop_lon,
+            TRANSFER_RADIUS_METERS,
+        )
+        transfer = network.stop_line[i] != network.stop_line[j]
+        sources.append(i[transfer])
+        targets.append(j[transfer])
+        seconds.append(meters[transfer] / WALK_SPEED_MPS)
+
+        self.offsets, self.targets, self.seconds = _csr(
+            np.concatenate(sources).astype(np.int64),
+            np.concatenate(targets),
+            np.concatenate(seconds),
+            2 * n_stops,
+        )
+        self._cache: "OrderedDict[Tuple[int, int, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reachable_stops(
+        self, lat: float, lon: float, budget_seconds: float
+    ) -> Dict[int, float]:
+        """
+        Earliest time (seconds) at which each stop can be left on foot.
+
+        A Dijkstra expansion from the stops within walking distance of the
+        origin, pruned at `budget_seconds`. Only stops left on foot are
+        returned; the on-board nodes are internal to the search.
+        """
+        network = self.network
+        walk_m = min(MAX_WALK_METERS, budget_seconds * WALK_SPEED_MPS)
+        meters = haversine_meters(lat, lon, network.stop_lat, network.stop_lon)
+        access = np.flatnonzero(meters <= walk_m)
+
+        best: Dict[int, float] = {}
+        heap = [(float(meters[s] / WALK_SPEED_MPS), int(s)) for s in access]
+        heapq.heapify(heap)
+        while heap:
+            time, stop = heapq.heappop(heap)
+            if time > budget_seconds or stop in best:
+                continue
+            best[stop] = time
+            start, end = self.offsets[stop], self.offsets[stop + 1]
+            for target, seconds in zip(
+                self.targets[start:end].tolist(), self.seconds[start:end].tolist()
+            ):
+                arrival = time + seconds
+                if arrival <= budget_seconds and target not in best:
+                    heapq.heappush(heap, (arrival, target))
+        return {stop: time for stop, time in best.items() if stop < network.stop_count}
+
+    def isochrone(self, lat: float, lon: float, minutes: int) -> Dict[str, Any]:
+        """
+        Area reachable from a point within `minutes` by walking plus bus.
+
+        The origin is snapped to the centre of its cache cell, so nearby
+        requests share one cached result.
+
+        Args:
+            lat (float): Latitude of the origin.
+            lon (float): Longitude of the origin.
+            minutes (int): Travel time budget in minutes.
+
+        Returns:
+            Dict[str, Any]: A GeoJSON Feature with the reachable-area polygon.
+        """
+        key = (
+            int(np.floor(lat / CLUSTER_CELL_DEGREES)),
+            int(np.floor(lon / CLUSTER_CELL_DEGREES)),
+            int(minutes),
+        )
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        cell_lat = (key[0] + 0.5) * CLUSTER_CELL_DEGREES
+        cell_lon = (key[1] + 0.5) * CLUSTER_CELL_DEGREES
+        result = self._compute(cell_lat, cell_lon, minutes)
+
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, lat: float, lon: float, minutes: int) -> Dict[str, Any]:
+        network = self.network
+        budget = minutes * 60.0
+        reached = self.reachable_stops(lat, lon, budget)
+
+        # Walking circles around the origin and every reached stop, in a local
+        # equirectangular projection (meters) around the origin
+        stops = np.fromiter(reached.keys(), dtype=np.int64, count=len(reached))
+        left = budget - np.fromiter(
+            reached.values(), dtype=np.float64, count=len(reached)
+        )
+        radii = np.minimum(MAX_WALK_METERS, np.r_[budget, left] * WALK_SPEED_MPS)
+        lats = np.r_[lat, network.stop_lat[stops]]
+        lons = np.r_[lon, network.stop_lon[stops]]
+        keep = radii > 1
+        scale_x = METERS_PER_DEGREE * np.cos(np.radians(lat))
+        circles = shapely.buffer(
+            shapely.points(
+                (lons[keep] - lon) * scale_x, (lats[keep] - lat) * METERS_PER_DEGREE
+            ),
+            radii[keep],
+            quad_segs=4,
+        )
+        area = shapely.union_all(circles)
+        area = shapely.transform(
+            area,
+            lambda xy: np.c_[
+                xy[:, 0] / scale_x + lon, xy[:, 1] / METERS_PER_DEGREE + lat
+            ],
+        )
+        area = shapely.simplify(area, 0.0002)
+
+        return {
+            "type": "Feature",
+            "geometry": mapping(area),
+            "properties": {
+                "origin": [lon, lat],
+                "minutes": minutes,
+                "reachable_stops": len(reached),
+                "reachable_lines": sorted(
+                    {network.line_names[c] for c in network.stop_line[stops].tolist()}
+                ),
+            },
+        }
+
+
+_index: Optional[IsochroneIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_isochrone_index() -> IsochroneIndex:
+    """Return the isochrone index of the current bus network, rebuilt after a reload."""
+    global _index
+    network = get_bus_network()
+    with _index_lock:
+        if _index is None or _index.network is not network:
+            _index = IsochroneIndex(network)
+        return _index
+
+
+def transit_isochrone(lat: float, lon: float, minutes: int) -> Dict[str, Any]:
+    """
+    Area reachable from a point within `minutes` by walking plus bus.
+
+    Args:
+        lat (float): Latitude of the origin.
+        lon (float): Longitude of the origin.
+        minutes (int): Travel time budget in minutes.
+
+    Returns:
+        Dict[str, Any]: A GeoJSON Feature with the reachable-area polygon.
+    """
+    return get_isochrone_index().isochrone(lat, lon, minutes)
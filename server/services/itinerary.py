@@ -0,0 +1,132 @@
+# server/services/itinerary.py
+
+from typing import Sequence, Tuple
+
+import numpy as np  # For the distance matrix and 2-opt moves
+
+from services.bus_network import METERS_PER_MILE
+from services.spatial_grid import haversine_meters  # Vectorised great-circle distances
+
+RATING_PRIOR_MEAN = 3.0  # Rating assumed for places without reviews
+RATING_PRIOR_WEIGHT = 5.0  # Number of reviews the prior rating counts as
+
+
+def distance_matrix_miles(lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+    """Pairwise great-circle distances in miles, computed in one broadcast haversine."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return (
+        haversine_meters(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+        / METERS_PER_MILE
+    )
+
+
+def path_length(distances: np.ndarray, order: Sequence[int]) -> float:
+    """Length of the open path visiting `order`."""
+    order = np.asarray(order)
+    return float(distances[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbour_order(distances: np.ndarray, start: int = 0) -> np.ndarray:
+    """Greedy path from `start`, always moving to the closest unvisited point."""
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        remaining = np.where(visited, np.inf, distances[order[-1]])
+        order.append(int(np.argmin(remaining)))
+        visited[order[-1]] = True
+    return np.asarray(order, dtype=np.int64)
+
+
+def two_opt(
+    distances: np.ndarray, order: Sequence[int], max_rounds: int = 1000
+) -> np.ndarray:
+    """
+    Improve an open path with 2-opt moves, keeping its first point fixed.
+
+    Reversing `order[i:j + 1]` replaces edges (i - 1, i) and (j, j + 1) with
+    (i - 1, j) and (i, j + 1); the path has no edge after its last point.
+    Every round evaluates all moves at once as a matrix and applies the best
+    one, until no move shortens the path.
+    """
+    order = np.array(order, dtype=np.int64)
+    n = len(order)
+    if n < 3:
+        return order
+    i = np.arange(1, n)[:, None]
+    j = np.arange(1, n)[None, :]
+    valid = j > i
+    for _ in range(max_rounds):
+        before = order[i - 1]
+        first, last = order[i], order[j]
+        after = order[np.minimum(j + 1, n - 1)]
+        has_after = j + 1 < n
+        delta = (
+            distances[before, last]
+            - distances[before, first]
+            + np.where(has_after, distances[first, after] - distances[last, after], 0.0)
+        )
+        delta = np.where(valid, delta, np.inf)
+        best = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[best] >= -1e-12:
+            break
+        start, end = best[0] + 1, best[1] + 1
+        order[start : end + 1] = order[start : end + 1][::-1]
+    return order
+
+
+def select_candidates(
+    distances: Sequence[float],
+    rating_sums: Sequence[float],
+    review_counts: Sequence[float],
+    count: int,
+    rating_weight: float = 0.5,
+) -> np.ndarray:
+    """
+    Pick the best candidate places on a mix of distance and review quality.
+
+    Each candidate scores `(1 - rating_weight) * closeness + rating_weight *
+    quality`, both in [0, 1]: closeness is 1 at the start location and 0 at the
+    farthest candidate; quality maps the Bayesian average rating (the ratings
+    plus `RATING_PRIOR_WEIGHT` reviews of `RATING_PRIOR_MEAN`) from 1-5 to 0-1,
+    so a single 5-star review does not outrank many 4.5-star ones.
+
+    Args:
+        distances (Sequence[float]): Distance of each candidate from the start.
+        rating_sums (Sequence[float]): Sum of each candidate's review ratings.
+        review_counts (Sequence[float]): Number of reviews of each candidate.
+        count (int): Number of candidates to pick.
+        rating_weight (float): Weight of review quality against distance.
+
+    Returns:
+        np.ndarray: Indices of the picked candidates, best first.
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    farthest = distances.max() if len(distances) else 0.0
+    closeness = 1.0 - distances / farthest if farthest > 0 else np.ones(len(distances))
+    sums = np.asarray(rating_sums, dtype=np.float64)
+    counts = np.asarray(review_counts, dtype=np.float64)
+    rating = (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + sums) / (
+        RATING_PRIOR_WEIGHT + counts
+    )
+    scores = (1.0 - rating_weight) * closeness + rating_weight * (rating - 1.0) / 4.0
+    return np.argsort(-scores, kind="stable")[:count]
+
+
+def plan_visit_order(
+    lat: Sequence[float], lon: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Order visits to points with nearest-neighbour construction plus 2-opt.
+
+    Point 0 is the start location; the path does not return to it.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The visiting order (starting with 0) and
+        the distance in miles of each leg (leg k ends at `order[k + 1]`).
+    """
+    distances = distance_matrix_miles(lat, lon)
+    order = two_opt(distances, nearest_neighbour_order(distances, 0))
+    return order, distances[order[:-1], order[1:]]
@@ -1,195 +1,432 @@
 # server/services/nearest_bustops.py
 
-from pyspark.sql import SparkSession  # For working with Spark dataframes
-from shapely.geometry import LineString, Point  # For route and point geometries
-from shapely.ops import substring  # For extracting a portion of a geometry
-import json  # For handling JSON data
-import os
-
-# Check if we're in development mode (no HDFS)
-is_development = os.getenv('ENVIRONMENT', 'development') == 'development'
-
-if is_development:
-    # Use local Spark configuration for development
-    spark = (
-        SparkSession.builder.appName("DirectBusLinesFinder")
-        .config("spark.driver.memory", "1g")
-        .config("spark.executor.memory", "1g")
-        .config("spark.sql.adaptive.enabled", "false")
-        .config("spark.sql.adaptive.coalescePartitions.enabled", "false")
-        .master("local[*]")
-        .getOrCreate()
-    )
-else:
-    # Use HDFS configuration for production
-    spark = (
-        SparkSession.builder.appName("DirectBusLinesFinder")
-        .config("spark.driver.memory", "2g")
-        .config("spark.executor.memory", "2g")
-        .config("spark.hadoop.fs.defaultFS", "hdfs://hadoop:9000")
-        .config("spark.hadoop.fs.hdfs.impl", "org.apache.hadoop.hdfs.DistributedFileSystem")
-        .config("spark.hadoop.fs.file.impl", "org.apache.hadoop.fs.LocalFileSystem")
-        .config("spark.jars.packages", "org.apache.hadoop:hadoop-client:3.3.1")
-        .getOrCreate()
-    )
-
-
-def trim_route_geometry(route_coords, origin_point, destination_point):
-    """
-    Extracts the portion of route geometry between origin and destination points.
-    Returns only the route coordinates without including the origin and destination points.
+import heapq  # For the bounded top-k heap
+import logging  # For reporting unavailable schedule data
+
+import numpy as np  # For the origin-destination matrices
+
+# In-memory bus network, loaded once at startup
+from services.bus_network import METERS_PER_MILE, get_bus_network, simplify_level
+
+# Scheduled running times and the default departure time
+from services.gtfs_timetable import WALK_SPEED_MPS, clock_seconds, get_timetable
+from services.headways import headway_service, time_band  # For expected waits
+
+# For repeated corridors
+from services.route_cache import buffer_bucket, endpoint_key, route_cache
+from services.spatial_grid import haversine_meters  # For patching walking distances
+from services.transfers import (  # Precomputed line-to-line transfers
+    TRANSFER_RADIUS_METERS,
+    transfer_service,
+)
+
+OD_MATRIX_CHUNK_CELLS = 4_000_000  # Bound on origins x destinations x lines per chunk
+# In-vehicle speed (including stops) when no schedule is available
+AVERAGE_BUS_SPEED_MPH = 12.0
+# Miles walked per minute; converts expected waits into the distance-based route score
+WALK_MILES_PER_MINUTE = WALK_SPEED_MPS * 60 / METERS_PER_MILE
+
+logger = logging.getLogger(__name__)
+_reported_failures = set()  # Schedule data failures already logged
+
+
+def _report_once(source, error):
+    """Log that optional schedule data is unavailable, once per source and error."""
+    key = (source, str(error))
+    if key not in _reported_failures:
+        _reported_failures.add(key)
+        logger.warning(f"{source} unavailable, routing without it: {str(error)}")
+
+
+def _nearest_stop_per_direction(stops):
+    """
+    Group stops by (LINE, DIR), keeping only the closest stop of each line direction.
 
     Args:
-        route_coords (list): List of coordinates representing the route.
-        origin_point (tuple): Origin point (longitude, latitude).
-        destination_point (tuple): Destination point (longitude, latitude).
+        stops (list): Stops with LINE, DIR and distance attributes.
 
     Returns:
-        list: List of coordinates for the trimmed route.
-    """
-    # Create LineString from route coordinates
-    route_line = LineString(route_coords)
-
-    # Find the nearest points on the route to origin and destination
-    # Distance along route to origin
-    origin_dist = route_line.project(Point(origin_point))
-    # Distance along route to destination
-    dest_dist = route_line.project(Point(destination_point))
-
-    # Ensure origin comes before destination
-    start_dist = min(origin_dist, dest_dist)
-    end_dist = max(origin_dist, dest_dist)
-
-    # Extract the portion of the route between these points
-    trimmed_line = substring(route_line, start_dist, end_dist)
-
-    # Get the coordinates without adding origin and destination points
-    return list(trimmed_line.coords)
-
-
-def _create_nearby_stops_query(lat, lon, buffer_radius_miles):
-    """Create SQL query to find stops within buffer radius."""
-    return f"""
-    SELECT STOPNUM, LINE, DIR, STOPNAME, LAT, LONG,
-           (3958.8 * acos(
-               cos(radians({lat})) * cos(radians(LAT)) *
-               cos(radians(LONG) - radians({lon})) +
-               sin(radians({lat})) * sin(radians(LAT))
-           )) AS distance
-    FROM bus_stops
-    WHERE (3958.8 * acos(
-               cos(radians({lat})) * cos(radians(LAT)) *
-               cos(radians(LONG) - radians({lon})) +
-               sin(radians({lat})) * sin(radians(LAT))
-           )) <= {buffer_radius_miles}
-    """
-
-
-def _load_route_geometries():
-    """Load and process bus route geometries from HDFS."""
-    geojson_path = "hdfs://hadoop:9000/user/hdfs/uploads/bus_lines.geojson"
-    route_df = spark.read.option("multiline", "true").json(geojson_path)
-    features = route_df.select("features").first()[0]
-
-    route_lookup = {}
-    for feature in features:
-        route_num = str(feature.properties.RouteNumber)
-        route_info = {
-            "geometry": feature.geometry.coordinates,
-            "name": feature.properties.RouteName,
-            "type": feature.properties.MetroBusType,
-            "category": feature.properties.MetroCategory,
-        }
-        if route_num not in route_lookup:
-            route_lookup[route_num] = []
-        route_lookup[route_num].append(route_info)
-
-    return route_lookup
-
-
-def _find_best_route(user_stops, target_stops, route_lookup):
-    """Find the best route with shortest total distance."""
-    best_route = None
-    min_total_distance = float("inf")
-
-    for user_stop in user_stops:
-        for target_stop in target_stops:
-            if user_stop.LINE == target_stop.LINE:
-                total_distance = user_stop.distance + target_stop.distance
-
-                for route_info in route_lookup.get(str(user_stop.LINE), []):
-                    origin_point = Point(
-                        float(user_stop.LONG), float(user_stop.LAT))
-                    dest_point = Point(
-                        float(target_stop.LONG), float(target_stop.LAT))
-                    route_line = LineString(route_info["geometry"])
-
-                    origin_dist_to_route = origin_point.distance(route_line)
-                    dest_dist_to_route = dest_point.distance(route_line)
-                    adjusted_total_distance = total_distance + \
-                        origin_dist_to_route + dest_dist_to_route
-
-                    if adjusted_total_distance < min_total_distance:
-                        min_total_distance = adjusted_total_distance
-                        best_route = {
-                            "route_number": user_stop.LINE,
-                            "route_name": route_info["name"],
-                            "route_type": route_info["type"],
-                            "category": route_info["category"],
-                            "geometry": trim_route_geometry(
-                                route_info["geometry"],
-                                [float(user_stop.LONG), float(user_stop.LAT)],
-                                [float(target_stop.LONG),
-                                 float(target_stop.LAT)],
-                            ),
-                            "origin": {
-                                "stop_number": user_stop.STOPNUM,
-                                "name": user_stop.STOPNAME,
-                                "distance": float(user_stop.distance),
-                                "coordinates": [float(user_stop.LONG), float(user_stop.LAT)],
-                            },
-                            "destination": {
-                                "stop_number": target_stop.STOPNUM,
-                                "name": target_stop.STOPNAME,
-                                "distance": float(target_stop.distance),
-                                "coordinates": [float(target_stop.LONG), float(target_stop.LAT)],
-                            },
-                        }
-
-    return best_route
+        dict: Mapping of (line, direction) to its closest stop.
+    """
+    nearest = {}
+    for stop in stops:
+        key = (stop.LINE, stop.DIR)
+        current = nearest.get(key)
+        if current is None or stop.distance < current.distance:
+            nearest[key] = stop
+    return nearest
+
+
+def _travel_time(user_stop, target_stop, ride_miles, timetable, wait_minutes=None):
+    """
+    Estimate the in-vehicle and door-to-door travel time of a route in minutes.
+
+    The in-vehicle time is the scheduled running time between the two stops
+    when the GTFS timetable serves them on this line, and otherwise the ride
+    distance at `AVERAGE_BUS_SPEED_MPH`. Walks use the transit router's speed;
+    the expected wait at the boarding stop is added when known.
+
+    Returns:
+        tuple: (in-vehicle minutes, total minutes, whether the schedule was used).
+    """
+    seconds = None
+    if timetable is not None:
+        seconds = timetable.scheduled_running_time(
+            user_stop.LINE, user_stop.STOPNUM, target_stop.STOPNUM
+        )
+    ride_minutes = (
+        seconds / 60 if seconds is not None else ride_miles / AVERAGE_BUS_SPEED_MPH * 60
+    )
+    walk_minutes = (
+        (user_stop.distance + target_stop.distance)
+        * METERS_PER_MILE
+        / WALK_SPEED_MPS
+        / 60
+    )
+    total_minutes = walk_minutes + ride_minutes + (wait_minutes or 0.0)
+    return ride_minutes, total_minutes, seconds is not None
+
+
+def _current_timetable():
+    """
+    The GTFS timetable if its prebuilt store is available; routing works without it.
+
+    Only the memory-mapped store is loaded here, the timetable is never built
+    on the request path.
+    """
+    try:
+        return get_timetable()
+    except Exception as e:
+        _report_once("GTFS timetable", e)
+        return None
+
+
+def _current_headways():
+    """The prebuilt headway table if one is available; routing works without it."""
+    try:
+        return headway_service.table()
+    except Exception as e:
+        _report_once("Headway table", e)
+        return None
+
+
+def _build_route_result(
+    user_stop,
+    target_stop,
+    route_info,
+    network,
+    tolerance=0.0,
+    timetable=None,
+    wait_minutes=None,
+):
+    """Build the response dictionary for a route between two stops."""
+    ride_miles = network.ride_distance(
+        route_info["id"], user_stop.index, target_stop.index
+    )
+    ride_minutes, travel_minutes, scheduled = _travel_time(
+        user_stop, target_stop, ride_miles, timetable, wait_minutes
+    )
+    return {
+        "route_number": user_stop.LINE,
+        "route_name": route_info["name"],
+        "route_type": route_info["type"],
+        "category": route_info["category"],
+        "direction": user_stop.DIR,
+        "geometry": network.trim_between_stops(
+            route_info["id"], user_stop.index, target_stop.index, tolerance
+        ),
+        "origin": {
+            "stop_number": user_stop.STOPNUM,
+            "name": user_stop.STOPNAME,
+            "distance": float(user_stop.distance),
+            "coordinates": [float(user_stop.LONG), float(user_stop.LAT)],
+        },
+        "destination": {
+            "stop_number": target_stop.STOPNUM,
+            "name": target_stop.STOPNAME,
+            "distance": float(target_stop.distance),
+            "coordinates": [float(target_stop.LONG), float(target_stop.LAT)],
+        },
+        "in_vehicle_distance": round(ride_miles, 4),
+        "in_vehicle_minutes": round(ride_minutes, 1),
+        "expected_wait_minutes": (
+            round(wait_minutes, 1) if wait_minutes is not None else None
+        ),
+        "travel_minutes": round(travel_minutes, 1),
+        "schedule_based": scheduled,
+    }
+
+
+def _find_best_routes(
+    user_stops, target_stops, network, k=1, tolerance=0.0, headways=None, band=0
+):
+    """
+    Find the k best routes on distinct lines, ranked by total distance.
+
+    With a headway table, the expected wait at the user stop in time band
+    `band` is added to the score as the distance walked in that time (one dict
+    lookup per candidate), so infrequent lines rank below frequent ones.
+
+    Stops on each side are hash-grouped by (LINE, DIR), keeping the closest
+    stop per line direction, and only line directions present on both sides
+    are scored. A candidate's walking distance (user stop + target stop) is a
+    lower bound on its score, since the stop-to-route offsets added to it are
+    non-negative. Candidates are therefore visited in lower-bound order while a
+    bounded heap holds the k best lines so far; the scan stops as soon as the
+    next lower bound cannot beat the k-th best. Geometry is trimmed only for
+    the k winners.
+
+    Candidate variants of a matched line are those that the network's STRtree
+    reports near both stops. If no variant of the line passes near both stops,
+    all of its variants are considered. Variants that do not reach the target
+    stop after the user stop in the stops' direction of travel are pruned.
+    All (line direction, variant) candidates are scored in one vectorised
+    call against the network's precomputed linear references, and the best
+    variant of each line direction is picked in NumPy; ride distances and the
+    trimmed geometry come from the same references. Waits are non-negative
+    too, so the walking distance stays a lower bound of the score.
+    """
+    user_by_key = _nearest_stop_per_direction(user_stops)
+    target_by_key = _nearest_stop_per_direction(target_stops)
+    keys = sorted(
+        user_by_key.keys() & target_by_key.keys(),
+        key=lambda key: (user_by_key[key].distance + target_by_key[key].distance, key),
+    )
+    if not keys:
+        return []
+
+    # One index query per side for all matched line directions
+    user_matched = [user_by_key[key] for key in keys]
+    target_matched = [target_by_key[key] for key in keys]
+    near_user = network.variants_near(
+        [stop.LONG for stop in user_matched], [stop.LAT for stop in user_matched]
+    )
+    near_target = network.variants_near(
+        [stop.LONG for stop in target_matched], [stop.LAT for stop in target_matched]
+    )
+
+    # Candidate variants of every matched line direction, scored in one call
+    pair_key, pair_variant = [], []
+    for i, (line, _) in enumerate(keys):
+        variant_ids = network.route_variant_ids.get(str(line), [])
+        candidates = [
+            v for v in variant_ids if v in near_user[i] and v in near_target[i]
+        ]
+        candidates = candidates or variant_ids
+        pair_key.extend([i] * len(candidates))
+        pair_variant.extend(candidates)
+    pair_key = np.asarray(pair_key, dtype=np.int64)
+    pair_variant = np.asarray(pair_variant, dtype=np.int64)
+    user_index = np.array([stop.index for stop in user_matched], dtype=np.int64)
+    target_index = np.array([stop.index for stop in target_matched], dtype=np.int64)
+    walking = np.array(
+        [
+            user_matched[i].distance + target_matched[i].distance
+            for i in range(len(keys))
+        ]
+    )
+    offsets, in_order = network.score_variants(
+        pair_variant, user_index[pair_key], target_index[pair_key]
+    )
+
+    # Best in-order variant per line direction (lowest total, then lowest variant id)
+    pair_key, pair_variant = pair_key[in_order], pair_variant[in_order]
+    totals = walking[pair_key] + offsets[in_order]
+    order = np.lexsort((pair_variant, totals, pair_key))
+    first = (
+        order[np.r_[True, pair_key[order][1:] != pair_key[order][:-1]]]
+        if len(order)
+        else order
+    )
+    best_distances = np.full(len(keys), np.inf)
+    best_variants = np.full(len(keys), -1, dtype=np.int64)
+    best_distances[pair_key[first]] = totals[first]
+    best_variants[pair_key[first]] = pair_variant[first]
+
+    # Max-heap (negated scores) of the k best lines found so far, and each line's entry
+    heap = []
+    entries = {}
+    scored = {}  # Candidate -> (total distance, expected wait in minutes)
+    for i, (line, _) in enumerate(keys):
+        if len(heap) == k and walking[i] >= -heap[0][0]:
+            break  # No remaining line can enter the top k
+        if best_variants[i] < 0:
+            continue
+
+        user_stop = user_matched[i]
+        best_distance, best_variant = float(best_distances[i]), int(best_variants[i])
+        wait = (
+            headways.expected_wait_minutes(line, user_stop.STOPNUM, band)
+            if headways
+            else None
+        )
+        scored[i] = (best_distance, wait)
+        entry = (
+            -(best_distance + (wait or 0.0) * WALK_MILES_PER_MINUTE),
+            -i,
+            best_variant,
+        )
+        previous = entries.get(line)
+        if previous is not None:
+            # The line already ranks through another direction; keep the better one
+            if entry > previous:
+                heap[heap.index(previous)] = entry
+                heapq.heapify(heap)
+                entries[line] = entry
+        elif len(heap) < k:
+            heapq.heappush(heap, entry)
+            entries[line] = entry
+        elif entry > heap[0]:
+            dropped = heapq.heapreplace(heap, entry)
+            del entries[keys[-dropped[1]][0]]
+            entries[line] = entry
+
+    # Trim the geometry only for the winning candidates, best first
+    timetable = _current_timetable() if heap else None
+    routes = []
+    for _, neg_i, variant_id in sorted(heap, reverse=True):
+        distance, wait = scored[-neg_i]
+        route = _build_route_result(
+            user_matched[-neg_i],
+            target_matched[-neg_i],
+            network.variants[variant_id],
+            network,
+            tolerance,
+            timetable,
+            wait,
+        )
+        route["total_distance"] = float(distance)
+        routes.append(route)
+    return routes
+
+
+def _patch_walking_distances(route, user_lat, user_lon, target_lat, target_lon):
+    """
+    Copy of a cached route result with the walks measured from the caller's own points.
+
+    The total distance and travel time change by the difference in walking distance.
+    """
+    origin, destination = route["origin"], route["destination"]
+    origin_miles = (
+        float(
+            haversine_meters(
+                user_lat, user_lon, origin["coordinates"][1], origin["coordinates"][0]
+            )
+        )
+        / METERS_PER_MILE
+    )
+    destination_miles = (
+        float(
+            haversine_meters(
+                target_lat,
+                target_lon,
+                destination["coordinates"][1],
+                destination["coordinates"][0],
+            )
+        )
+        / METERS_PER_MILE
+    )
+    walk_change = (
+        origin_miles + destination_miles - origin["distance"] - destination["distance"]
+    )
+    return {
+        **route,
+        "origin": {**origin, "distance": origin_miles},
+        "destination": {**destination, "distance": destination_miles},
+        "total_distance": route["total_distance"] + walk_change,
+        "travel_minutes": round(
+            route["travel_minutes"]
+            + walk_change * METERS_PER_MILE / WALK_SPEED_MPS / 60,
+            1,
+        ),
+    }
+
+
+def _route_score(route):
+    """Ranking score of a route: total distance plus the expected wait as walking."""
+    return (
+        route["total_distance"]
+        + (route["expected_wait_minutes"] or 0.0) * WALK_MILES_PER_MINUTE
+    )
 
 
 def find_direct_bus_lines(
-    user_lat, user_lon, target_lat, target_lon, buffer_radius_miles
+    user_lat,
+    user_lon,
+    target_lat,
+    target_lon,
+    buffer_radius_miles,
+    tolerance=0.0,
+    top_k=1,
+    departure_seconds=None,
 ):
     """
     Finds the best direct bus route connecting user and target areas within a buffer radius.
-    Returns the route with the shortest total distance to both stops.
+    Returns the route with the shortest total distance to both stops, with its
+    geometry simplified at `tolerance` degrees (default: full resolution).
+    With `top_k` > 1, the next best routes on other lines are returned, ranked,
+    under "alternatives". When GTFS headways are available, the expected wait
+    at `departure_seconds` (default: now) is part of the ranking.
+
+    Results are cached by the stop cluster (station) nearest to each endpoint
+    and the buffer bucket, so that repeated queries along a popular corridor
+    skip the stop search, candidate loop and trimming; on a hit the walking
+    distances are recomputed for the caller's exact points, and the routes are
+    searched afresh if any of their stops lies outside the caller's own
+    buffer radius.
     """
     try:
-        # Read bus stops data from HDFS
-        hdfs_file_path = "hdfs://hadoop:9000/user/hdfs/uploads/bus_stops.csv"
-        bus_stops_df = spark.read.csv(
-            hdfs_file_path, header=True, inferSchema=True)
-        bus_stops_df.createOrReplaceTempView("bus_stops")
-
-        # Get nearby stops for user and target locations
-        user_query = _create_nearby_stops_query(
-            user_lat, user_lon, buffer_radius_miles)
-        target_query = _create_nearby_stops_query(
-            target_lat, target_lon, buffer_radius_miles)
-
-        user_stops = spark.sql(user_query).collect()
-        target_stops = spark.sql(target_query).collect()
-
-        # Load route geometries and find best route
-        route_lookup = _load_route_geometries()
-        best_route = _find_best_route(user_stops, target_stops, route_lookup)
-
-        if best_route is None:
+        network = get_bus_network()
+        headways = _current_headways()
+        band = time_band(
+            clock_seconds() if departure_seconds is None else departure_seconds
+        )
+        key = (
+            endpoint_key(network, user_lat, user_lon),
+            endpoint_key(network, target_lat, target_lon),
+            buffer_bucket(buffer_radius_miles),
+            simplify_level(tolerance),
+            top_k,
+            band if headways is not None else None,
+        )
+        cached = route_cache.get(network, key)
+        routes = None
+        if cached is not None:
+            patched = [
+                _patch_walking_distances(
+                    route, user_lat, user_lon, target_lat, target_lon
+                )
+                for route in cached
+            ]
+            if all(
+                route["origin"]["distance"] <= buffer_radius_miles
+                and route["destination"]["distance"] <= buffer_radius_miles
+                for route in patched
+            ):
+                routes = sorted(patched, key=_route_score)
+        if routes is None:
+            # Get the closest stop of each line direction near the user and target
+            # locations, searching stations before their member stops
+            user_stops = network.nearest_stop_per_direction(
+                user_lat, user_lon, buffer_radius_miles
+            )
+            target_stops = network.nearest_stop_per_direction(
+                target_lat, target_lon, buffer_radius_miles
+            )
+
+            # Find the best route over the preloaded, indexed route geometries
+            routes = _find_best_routes(
+                user_stops, target_stops, network, top_k, tolerance, headways, band
+            )
+            route_cache.put(network, key, routes)
+
+        if not routes:
             return {"status": "error", "data": {"message": "No direct bus routes found"}}
 
-        return {"status": "success", "data": best_route}
+        result = {"status": "success", "data": routes[0]}
+        if top_k > 1:
+            result["alternatives"] = routes[1:]
+        return result
 
     except Exception as e:
         print(f"Error finding direct bus lines: {str(e)}")
@@ -197,3 +434,218 @@ def find_direct_bus_lines(
             "status": "error",
             "data": {"message": f"Error finding direct bus lines: {str(e)}"},
         }
+
+
+def find_one_transfer_route(
+    user_lat, user_lon, target_lat, target_lon, buffer_radius_miles, tolerance=0.0
+):
+    """
+    Suggest a route with one transfer between two bus lines.
+
+    Lines near the origin and near the destination are joined through the
+    precomputed transfer table, minimising the total walk (to the first line,
+    between the transfer stops and from the second line) in one vectorised
+    pass over the table.
+
+    Returns:
+        dict: {"status": "success", "data": {"first_leg", "transfer", "second_leg",
+        "total_walking_distance"}} or an error status with a message.
+    """
+    try:
+        network = get_bus_network()
+        index = transfer_service.index()
+        if index is None:
+            return {
+                "status": "error",
+                "data": {"message": "Transfer table unavailable"},
+            }
+        origin_walk = network.line_walking_distances(
+            np.array([user_lat]), np.array([user_lon]), buffer_radius_miles
+        )[0]
+        destination_walk = network.line_walking_distances(
+            np.array([target_lat]), np.array([target_lon]), buffer_radius_miles
+        )[0]
+
+        t = index.best_transfer(origin_walk, destination_walk)
+        if t is None:
+            return {
+                "status": "error",
+                "data": {"message": "No one-transfer bus routes found"},
+            }
+
+        first_line = network.line_names[index.from_line[t]]
+        second_line = network.line_names[index.to_line[t]]
+        user_stops = [
+            stop
+            for stop in network.nearby_stops(user_lat, user_lon, buffer_radius_miles)
+            if stop.LINE == first_line
+        ]
+        target_stops = [
+            stop
+            for stop in network.nearby_stops(
+                target_lat, target_lon, buffer_radius_miles
+            )
+            if stop.LINE == second_line
+        ]
+
+        # Both directions of each line are offered around the transfer stops (the
+        # table keeps the closest pair, which may face the wrong way); boarding
+        # distances are measured from the alighting stop
+        transfer_radius = TRANSFER_RADIUS_METERS / METERS_PER_MILE
+        alight_stop = network.stop_match(int(index.from_stop[t]), 0.0)
+        board_stop = network.stop_match(int(index.to_stop[t]), 0.0)
+        alight = [
+            stop
+            for stop in network.nearby_stops(
+                alight_stop.LAT, alight_stop.LONG, transfer_radius
+            )
+            if stop.LINE == first_line
+        ]
+        from_alight = network.distances_from(alight_stop.LAT, alight_stop.LONG)
+        board = [
+            stop._replace(distance=float(from_alight[stop.index]))
+            for stop in network.nearby_stops(
+                board_stop.LAT, board_stop.LONG, transfer_radius
+            )
+            if stop.LINE == second_line
+        ]
+
+        headways = _current_headways()
+        band = time_band(clock_seconds())
+        first_leg = _find_best_routes(
+            user_stops, alight, network, 1, tolerance, headways, band
+        )
+        second_leg = _find_best_routes(
+            board, target_stops, network, 1, tolerance, headways, band
+        )
+        if not first_leg or not second_leg:
+            return {
+                "status": "error",
+                "data": {"message": "No one-transfer bus routes found"},
+            }
+        first_leg, second_leg = first_leg[0], second_leg[0]
+        transfer_miles = (
+            first_leg["destination"]["distance"] + second_leg["origin"]["distance"]
+        )
+
+        return {
+            "status": "success",
+            "data": {
+                "first_leg": first_leg,
+                "transfer": {
+                    "from_stop": first_leg["destination"],
+                    "to_stop": second_leg["origin"],
+                    "walking_distance": round(transfer_miles, 4),
+                },
+                "second_leg": second_leg,
+                "total_walking_distance": round(
+                    first_leg["origin"]["distance"]
+                    + transfer_miles
+                    + second_leg["destination"]["distance"],
+                    4,
+                ),
+                # The transfer walk is counted in the second leg (its origin distance)
+                "travel_minutes": round(
+                    first_leg["travel_minutes"] + second_leg["travel_minutes"], 1
+                ),
+            },
+        }
+
+    except Exception as e:
+        logger.error(f"Error finding one-transfer bus routes: {str(e)}")
+        return {
+            "status": "error",
+            "data": {"message": f"Error finding one-transfer bus routes: {str(e)}"},
+        }
+
+
+def direct_bus_od_matrix(origins, destinations, buffer_radius_miles):
+    """
+    Find the best direct bus line for every origin-destination pair.
+
+    Nearby stops of all points are found in one vectorised pass, reduced to
+    the walking distance to the closest stop of each line, and the line sets
+    of every pair are intersected as a min over (origin + destination)
+    distances. Like `find_direct_bus_lines`, a pair is connected when a line
+    has stops near both points; the best line is the one with the shortest
+    total walk.
+
+    Args:
+        origins (list): Origin points as (lat, lon) pairs.
+        destinations (list): Destination points as (lat, lon) pairs.
+        buffer_radius_miles (float): Search radius for bus stops around each point.
+
+    Returns:
+        dict: `route_numbers` and `walking_distance` matrices (origins x
+        destinations), with None for pairs without a direct line.
+    """
+    network = get_bus_network()
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+    origin_walk = network.line_walking_distances(
+        origins[:, 0], origins[:, 1], buffer_radius_miles
+    )
+    destination_walk = network.line_walking_distances(
+        destinations[:, 0], destinations[:, 1], buffer_radius_miles
+    )
+
+    # Only lines reachable from some origin and some destination matter
+    lines = np.flatnonzero(
+        np.isfinite(origin_walk).any(axis=0) & np.isfinite(destination_walk).any(axis=0)
+    )
+    origin_walk = origin_walk[:, lines]
+    destination_walk = destination_walk[:, lines]
+
+    best_line = np.full((len(origins), len(destinations)), -1, dtype=np.int64)
+    best_walk = np.full((len(origins), len(destinations)), np.inf)
+    if len(lines):
+        rows = max(1, OD_MATRIX_CHUNK_CELLS // (len(destinations) * len(lines)))
+        for start in range(0, len(origins), rows):
+            total = (
+                origin_walk[start : start + rows, None, :]
+                + destination_walk[None, :, :]
+            )
+            best = np.argmin(total, axis=2)
+            best_line[start : start + rows] = lines[best]
+            best_walk[start : start + rows] = np.take_along_axis(
+                total, best[..., None], axis=2
+            )[..., 0]
+
+    connected = np.isfinite(best_walk)
+    route_numbers = np.where(
+        connected,
+        np.asarray(network.line_names + [None], dtype=object)[best_line],
+        None,
+    )
+    walking_distance = np.where(connected, np.round(best_walk, 4), None)
+    return {
+        "route_numbers": route_numbers.tolist(),
+        "walking_distance": walking_distance.tolist(),
+    }
+
+
+def bus_line_geometries(route_number, tolerance=0.0):
+    """
+    Geometries of every variant of a bus line.
+
+    Args:
+        route_number (str): The line's route number.
+        tolerance (float): Simplification tolerance in degrees
+            (default: full resolution).
+
+    Returns:
+        list: One dict per variant with its name, type and coordinate array,
+        or None if the line does not exist.
+    """
+    network = get_bus_network()
+    variant_ids = network.route_variant_ids.get(str(route_number))
+    if not variant_ids:
+        return None
+    return [
+        {
+            "name": network.variants[variant_id]["name"],
+            "type": network.variants[variant_id]["type"],
+            "geometry": network.variant_geometry(variant_id, tolerance),
+        }
+        for variant_id in variant_ids
+    ]
@@ -0,0 +1,172 @@
+# server/services/places_index.py
+
+import time  # For expiring the in-memory index
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np  # For the place attribute arrays
+import shapely  # For vectorised distances and linear referencing
+from shapely import STRtree  # Spatial index over place points
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select  # For loading the places
+
+from config.settings import get_settings  # For the index lifetime
+from models.place import Place as PlaceModel  # Place model from the database
+from services.bus_network import METERS_PER_MILE
+from services.spatial_grid import METERS_PER_DEGREE
+
+MILES_PER_DEGREE = METERS_PER_DEGREE / METERS_PER_MILE
+
+
+class PlaceIndex:
+    """
+    In-memory STRtree over place points.
+
+    Longitudes are scaled by the cosine of the places' mean latitude, so that
+    within the city one unit is the same ground distance in every direction
+    and buffer distances can be given in meters.
+    """
+
+    def __init__(self, rows: Sequence[Any]):
+        self.ids = np.array([row.id for row in rows], dtype=np.int64)
+        self.names = np.array([row.name for row in rows], dtype=object)
+        self.addresses = np.array([row.address for row in rows], dtype=object)
+        self.types = np.array([row.types or "" for row in rows], dtype=object)
+        self.lat = np.array([row.latitude for row in rows], dtype=np.float64)
+        self.lon = np.array([row.longitude for row in rows], dtype=np.float64)
+        self.type_sets = [
+            {value.strip().lower() for value in types.split(",") if value.strip()}
+            for types in self.types
+        ]
+        self.lon_scale = (
+            float(np.cos(np.radians(self.lat.mean()))) if len(rows) else 1.0
+        )
+        self.points = shapely.points(self.lon * self.lon_scale, self.lat)
+        self.tree = STRtree(self.points)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _scaled(self, coordinates: Sequence[Sequence[float]]) -> np.ndarray:
+        """A [lon, lat] coordinate list in the index's scaled plane."""
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        return np.column_stack([coords[:, 0] * self.lon_scale, coords[:, 1]])
+
+    def places_along(
+        self,
+        coordinates: Sequence[Sequence[float]],
+        max_distance_meters: float,
+        place_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the places within a distance of a route, in the order they are passed.
+
+        The route's buffer is evaluated as a `dwithin` query of its segments
+        against the STRtree (segment envelopes stay small, unlike the envelope
+        of the whole route). Each (segment, place) pair found is projected onto
+        its segment in NumPy, and a place's position along the route and its
+        distance from it come from its nearest segment, the same linear
+        referencing `line_locate_point` does without testing every segment.
+
+        Args:
+            coordinates (Sequence[Sequence[float]]): Route geometry as [lon, lat]
+                points.
+            max_distance_meters (float): Buffer distance around the route in meters.
+            place_type (str, optional): Only keep places with this type.
+            limit (int, optional): Maximum number of places to return.
+
+        Returns:
+            List[Dict[str, Any]]: The places ordered by `along_route_miles`.
+        """
+        coords = self._scaled(coordinates)
+        if len(coords) < 2 or len(self) == 0:
+            return []
+        starts, ends = coords[:-1], coords[1:]
+        segments = shapely.linestrings(np.stack([starts, ends], axis=1))
+        segment_idx, hits = self.tree.query(
+            segments,
+            predicate="dwithin",
+            distance=max_distance_meters / METERS_PER_DEGREE,
+        )
+        if place_type:
+            wanted = place_type.strip().lower()
+            keep = np.array(
+                [wanted in self.type_sets[i] for i in hits.tolist()], dtype=bool
+            )
+            segment_idx, hits = segment_idx[keep], hits[keep]
+        if len(hits) == 0:
+            return []
+
+        # Project every place onto each segment it was found near
+        vectors = ends - starts
+        lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+        cumdist = np.concatenate(([0.0], np.cumsum(lengths)))
+        places = np.column_stack([self.lon[hits] * self.lon_scale, self.lat[hits]])
+        relative = places - starts[segment_idx]
+        squared = np.maximum(lengths[segment_idx] ** 2, 1e-24)
+        t = np.clip(
+            np.einsum("ij,ij->i", relative, vectors[segment_idx]) / squared, 0.0, 1.0
+        )
+        pair_offsets = np.hypot(*(relative - t[:, None] * vectors[segment_idx]).T)
+        pair_measures = cumdist[segment_idx] + t * lengths[segment_idx]
+
+        # Nearest segment of each place (the first one along the route on ties)
+        nearest = np.lexsort((pair_measures, pair_offsets, hits))
+        first = nearest[np.r_[True, hits[nearest][1:] != hits[nearest][:-1]]]
+        hits, measures, offsets = hits[first], pair_measures[first], pair_offsets[first]
+        order = np.lexsort((offsets, measures))[:limit]
+        return [
+            {
+                "id": int(self.ids[i]),
+                "name": self.names[i],
+                "address": self.addresses[i],
+                "types": self.types[i],
+                "latitude": float(self.lat[i]),
+                "longitude": float(self.lon[i]),
+                "distance_from_route": round(float(offset) * METERS_PER_DEGREE, 1),
+                "along_route_miles": round(float(measure) * MILES_PER_DEGREE, 3),
+            }
+            for i, measure, offset in zip(hits[order], measures[order], offsets[order])
+        ]
+
+
+class PlaceIndexService:
+    """
+    Holds the place index, rebuilt from the database once it is older than
+    the `place_index_ttl` setting.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self._index: Optional[PlaceIndex] = None
+        self._loaded_at = 0.0
+
+    async def index(self, db: AsyncSession) -> PlaceIndex:
+        """Return the place index, loading it from the database when needed."""
+        ttl = (
+            self.ttl_seconds
+            if self.ttl_seconds is not None
+            else get_settings().place_index_ttl
+        )
+        if self._index is None or time.monotonic() - self._loaded_at > ttl:
+            result = await db.execute(
+                select(
+                    PlaceModel.id,
+                    PlaceModel.name,
+                    PlaceModel.address,
+                    PlaceModel.types,
+                    PlaceModel.latitude,
+                    PlaceModel.longitude,
+                )
+            )
+            self._index = PlaceIndex(result.all())
+            self._loaded_at = time.monotonic()
+        return self._index
+
+    def invalidate(self) -> None:
+        """Force the next request to reload the places."""
+        self._index = None
+
+
+# Shared place index used by the route queries
+place_index_service = PlaceIndexService()
@@ -0,0 +1,413 @@
+# server/services/raptor.py
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # For the round-based label arrays
+
+from services.gtfs_timetable import INF_TIME, WALK_SPEED_MPS, Timetable, csr_ranges
+from services.spatial_grid import haversine_meters  # For access and egress walks
+
+ACCESS_RADIUS_METERS = 800  # Maximum walk to the first and from the last stop
+
+# Kinds of label stored per round and stop
+LABEL_NONE = 0  # Carried over unchanged from the previous round
+LABEL_ACCESS = 1  # Reached by walking from the origin
+LABEL_RIDE = 2  # Reached by riding a trip
+LABEL_WALK = 3  # Reached by a walking transfer from another stop
+
+
+class RaptorResult:
+    """
+    Labels computed by a RAPTOR run.
+
+    `arrival[k, s]` is the earliest arrival at stop s using at most k trips.
+    The parent arrays record how each label was reached so that journeys can
+    be reconstructed.
+    """
+
+    def __init__(self, rounds: int, n_stops: int):
+        shape = (rounds + 1, n_stops)
+        self.arrival = np.full(shape, INF_TIME, dtype=np.int64)
+        self.kind = np.zeros(shape, dtype=np.int8)
+        self.pattern = np.full(shape, -1, dtype=np.int32)
+        self.trip = np.full(shape, -1, dtype=np.int32)
+        self.board_pos = np.full(shape, -1, dtype=np.int32)
+        self.alight_pos = np.full(shape, -1, dtype=np.int32)
+        self.from_stop = np.full(shape, -1, dtype=np.int32)
+        self.target_arrival = INF_TIME
+        self.target_round = -1
+        self.target_stop = -1
+
+
+def run_raptor(
+    timetable: Timetable,
+    access: Dict[int, int],
+    egress: Dict[int, int],
+    max_rounds: int,
+) -> RaptorResult:
+    """
+    Earliest-arrival RAPTOR over an array-backed timetable.
+
+    Each round k scans every pattern serving a stop improved in round k - 1,
+    boarding the earliest catchable trip at each improved stop (a binary
+    search over the pattern's sorted departure column), then relaxes walking
+    transfers from the stops improved by riding. No priority queue is used.
+
+    Args:
+        timetable (Timetable): The timetable to route over.
+        access (Dict[int, int]): Arrival time (seconds) at each initial stop.
+        egress (Dict[int, int]): Walking time (seconds) from each final stop
+            to the destination.
+        max_rounds (int): Maximum number of trips (transfers + 1).
+
+    Returns:
+        RaptorResult: The labels, with the best destination arrival.
+    """
+    tt = timetable
+    result = RaptorResult(max_rounds, tt.stop_count)
+    best = np.full(tt.stop_count, INF_TIME, dtype=np.int64)
+    # Transfers are not transitively closed, so rides keep their own best
+    # labels: a ride that does not improve a stop may still lead to a better walk
+    best_ride = np.full(tt.stop_count, INF_TIME, dtype=np.int64)
+    ride_time = np.full(tt.stop_count, INF_TIME, dtype=np.int64)
+    ridden = np.zeros(tt.stop_count, dtype=bool)
+    marked = np.zeros(tt.stop_count, dtype=bool)
+
+    for stop, time in access.items():
+        if time < result.arrival[0, stop]:
+            result.arrival[0, stop] = time
+            result.kind[0, stop] = LABEL_ACCESS
+            best[stop] = time
+            marked[stop] = True
+
+    egress_stops = np.fromiter(egress.keys(), dtype=np.int64, count=len(egress))
+    egress_seconds = np.fromiter(egress.values(), dtype=np.int64, count=len(egress))
+
+    for k in range(1, max_rounds + 1):
+        previous = result.arrival[k - 1]
+        current = result.arrival[k]
+        current[:] = previous
+        marked_stops = np.flatnonzero(marked)
+        if len(marked_stops) == 0:
+            # Nothing changes any more; later rounds carry the labels over
+            result.arrival[k:] = previous
+            break
+        marked[:] = False
+        ridden[:] = False
+
+        # Collect (pattern, boarding position) for every marked stop
+        entries = csr_ranges(
+            tt.stop_pattern_offsets[marked_stops],
+            tt.stop_pattern_offsets[marked_stops + 1],
+        )
+        patterns = tt.stop_patterns[entries]
+        positions = tt.stop_pattern_positions[entries]
+        order = np.lexsort((positions, patterns))
+        patterns, positions = patterns[order], positions[order]
+        group_starts = (
+            np.flatnonzero(np.r_[True, np.diff(patterns) != 0])
+            if len(patterns)
+            else patterns
+        )
+        group_ends = np.r_[group_starts[1:], len(patterns)]
+
+        for g_start, g_end in zip(group_starts.tolist(), group_ends.tolist()):
+            pattern = int(patterns[g_start])
+            stops = tt.pattern_stop_list(pattern)
+            arrivals, departures = tt.pattern_times(pattern)
+            n_stops = len(stops)
+            trip_arrival = np.full(n_stops, INF_TIME, dtype=np.int64)
+            trip_index = np.full(n_stops, -1, dtype=np.int64)
+            trip_board = np.full(n_stops, -1, dtype=np.int64)
+
+            for board in positions[g_start:g_end].tolist():
+                if board >= n_stops - 1:
+                    continue
+                ready = previous[stops[board]]
+                trip = int(np.searchsorted(departures[:, board], ready, side="left"))
+                if trip >= len(departures):
+                    continue
+                segment = arrivals[trip, board + 1 :]
+                better = segment < trip_arrival[board + 1 :]
+                trip_arrival[board + 1 :][better] = segment[better]
+                trip_index[board + 1 :][better] = trip
+                trip_board[board + 1 :][better] = board
+
+            # Local and target pruning
+            bound = np.minimum(best_ride[stops], result.target_arrival)
+            improved = np.flatnonzero(trip_arrival < bound)
+            if len(improved) == 0:
+                continue
+            improved_stops = stops[improved]
+            arrival = trip_arrival[improved]
+            best_ride[improved_stops] = arrival
+            ride_time[improved_stops] = arrival
+            ridden[improved_stops] = True
+            result.pattern[k, improved_stops] = pattern
+            result.trip[k, improved_stops] = (
+                tt.pattern_trip_offsets[pattern] + trip_index[improved]
+            )
+            result.board_pos[k, improved_stops] = trip_board[improved]
+            result.alight_pos[k, improved_stops] = improved
+
+            faster = arrival < best[improved_stops]
+            improved_stops, arrival = improved_stops[faster], arrival[faster]
+            current[improved_stops] = arrival
+            best[improved_stops] = arrival
+            result.kind[k, improved_stops] = LABEL_RIDE
+            marked[improved_stops] = True
+
+        # Walking transfers from the stops improved by riding in this round
+        ridden_stops = np.flatnonzero(ridden)
+        if len(ridden_stops):
+            starts, ends = (
+                tt.transfer_offsets[ridden_stops],
+                tt.transfer_offsets[ridden_stops + 1],
+            )
+            edges = csr_ranges(starts, ends)
+            sources = np.repeat(ridden_stops, ends - starts)
+            targets = tt.transfer_stops[edges].astype(np.int64)
+            walk_arrival = ride_time[sources] + tt.transfer_seconds[edges]
+            better = walk_arrival < np.minimum(best[targets], result.target_arrival)
+            sources, targets, walk_arrival = (
+                sources[better],
+                targets[better],
+                walk_arrival[better],
+            )
+            # Assign slowest first so that the fastest transfer to a stop wins
+            order = np.argsort(-walk_arrival, kind="stable")
+            sources, targets, walk_arrival = (
+                sources[order],
+                targets[order],
+                walk_arrival[order],
+            )
+            current[targets] = walk_arrival
+            best[targets] = np.minimum(best[targets], walk_arrival)
+            result.kind[k, targets] = LABEL_WALK
+            result.from_stop[k, targets] = sources
+            marked[targets] = True
+
+        # Best arrival at the destination after this round
+        if len(egress_stops):
+            at_target = current[egress_stops] + egress_seconds
+            i = int(np.argmin(at_target))
+            if at_target[i] < result.target_arrival:
+                result.target_arrival = int(at_target[i])
+                result.target_round = k
+                result.target_stop = int(egress_stops[i])
+
+    return result
+
+
+def format_time(seconds: int) -> str:
+    """Format seconds after midnight as HH:MM (wrapping past midnight)."""
+    seconds = int(seconds)
+    return f"{(seconds // 3600) % 24:02d}:{(seconds % 3600) // 60:02d}"
+
+
+def _stop_info(timetable: Timetable, stop: int, time: int) -> Dict[str, Any]:
+    return {
+        "stop_id": str(timetable.stop_ids[stop]),
+        "name": str(timetable.stop_names[stop]),
+        "coordinates": [
+            float(timetable.stop_lon[stop]),
+            float(timetable.stop_lat[stop]),
+        ],
+        "time": format_time(time),
+    }
+
+
+def _walk_leg(
+    from_info: Dict[str, Any], to_info: Dict[str, Any], seconds: int
+) -> Dict[str, Any]:
+    return {
+        "mode": "walk",
+        "from": from_info,
+        "to": to_info,
+        "duration_minutes": round(seconds / 60, 1),
+        "distance_meters": round(seconds * WALK_SPEED_MPS),
+    }
+
+
+def _ride_arrival(timetable: Timetable, result: RaptorResult, k: int, stop: int) -> int:
+    """Scheduled arrival of the trip that reached `stop` in round k."""
+    pattern = int(result.pattern[k, stop])
+    local_trip = int(result.trip[k, stop]) - int(
+        timetable.pattern_trip_offsets[pattern]
+    )
+    arrivals, _ = timetable.pattern_times(pattern)
+    return int(arrivals[local_trip, result.alight_pos[k, stop]])
+
+
+def reconstruct_journey(
+    timetable: Timetable,
+    result: RaptorResult,
+    origin: List[float],
+    destination: List[float],
+    departure_time: int,
+    egress: Dict[int, int],
+) -> Optional[Dict[str, Any]]:
+    """
+    Rebuild the legs of the best journey found by `run_raptor`.
+
+    Args:
+        timetable (Timetable): The timetable used for routing.
+        result (RaptorResult): The RAPTOR labels.
+        origin (List[float]): Origin as [longitude, latitude].
+        destination (List[float]): Destination as [longitude, latitude].
+        departure_time (int): Departure time in seconds after midnight.
+        egress (Dict[int, int]): Walking seconds from final stops to the destination.
+
+    Returns:
+        Optional[Dict[str, Any]]: The journey, or None if the destination was not
+            reached.
+    """
+    if result.target_round < 0:
+        return None
+    tt = timetable
+    stop, k = result.target_stop, result.target_round
+    arrival_at_stop = int(result.arrival[k, stop])
+    legs = [
+        _walk_leg(
+            _stop_info(tt, stop, arrival_at_stop),
+            {
+                "name": "Destination",
+                "coordinates": destination,
+                "time": format_time(result.target_arrival),
+            },
+            egress[stop],
+        )
+    ]
+
+    after_walk = False
+    while True:
+        # The source of a walk always rode in the same round; its ride details
+        # are kept even if a faster walk later replaced its label
+        kind = LABEL_RIDE if after_walk else result.kind[k, stop]
+        after_walk = False
+        if kind == LABEL_NONE:
+            k -= 1
+        elif kind == LABEL_ACCESS:
+            legs.append(
+                _walk_leg(
+                    {
+                        "name": "Origin",
+                        "coordinates": origin,
+                        "time": format_time(departure_time),
+                    },
+                    _stop_info(tt, stop, int(result.arrival[k, stop])),
+                    int(result.arrival[k, stop]) - departure_time,
+                )
+            )
+            break
+        elif kind == LABEL_WALK:
+            source = int(result.from_stop[k, stop])
+            source_arrival = _ride_arrival(tt, result, k, source)
+            legs.append(
+                _walk_leg(
+                    _stop_info(tt, source, source_arrival),
+                    _stop_info(tt, stop, int(result.arrival[k, stop])),
+                    int(result.arrival[k, stop]) - source_arrival,
+                )
+            )
+            stop = source
+            after_walk = True
+        else:
+            pattern = int(result.pattern[k, stop])
+            trip = int(result.trip[k, stop])
+            board, alight = int(result.board_pos[k, stop]), int(
+                result.alight_pos[k, stop]
+            )
+            stops = tt.pattern_stop_list(pattern)
+            arrivals, departures = tt.pattern_times(pattern)
+            local_trip = trip - int(tt.pattern_trip_offsets[pattern])
+            route = int(tt.pattern_route[pattern])
+            legs.append(
+                {
+                    "mode": "transit",
+                    "route_id": str(tt.route_ids[route]),
+                    "route_number": str(tt.route_short_names[route])
+                    or str(tt.route_ids[route]),
+                    "route_name": str(tt.route_long_names[route]),
+                    "trip_id": str(tt.trip_ids[trip]),
+                    "from": _stop_info(
+                        tt, int(stops[board]), int(departures[local_trip, board])
+                    ),
+                    "to": _stop_info(
+                        tt, int(stops[alight]), int(arrivals[local_trip, alight])
+                    ),
+                    "stops": alight - board,
+                }
+            )
+            stop = int(stops[board])
+            k -= 1
+
+    legs.reverse()
+    # Drop zero-length walks (e.g. when the origin is at a stop)
+    legs = [
+        leg for leg in legs if leg["mode"] == "transit" or leg["duration_minutes"] > 0
+    ]
+    transit_legs = sum(1 for leg in legs if leg["mode"] == "transit")
+    return {
+        "departure": format_time(departure_time),
+        "arrival": format_time(result.target_arrival),
+        "duration_minutes": round((result.target_arrival - departure_time) / 60, 1),
+        "transfers": max(transit_legs - 1, 0),
+        "legs": legs,
+    }
+
+
+def _walkable_stops(
+    timetable: Timetable, lat: float, lon: float, radius_m: float
+) -> Dict[int, int]:
+    """Walking seconds to every stop within `radius_m` meters of a point."""
+    meters = haversine_meters(lat, lon, timetable.stop_lat, timetable.stop_lon)
+    stops = np.flatnonzero(meters <= radius_m)
+    seconds = np.ceil(meters[stops] / WALK_SPEED_MPS).astype(np.int64)
+    return dict(zip(stops.tolist(), seconds.tolist()))
+
+
+def plan_transit_journey(
+    timetable: Timetable,
+    origin_lat: float,
+    origin_lon: float,
+    destination_lat: float,
+    destination_lon: float,
+    departure_time: int,
+    max_transfers: int = 2,
+    access_radius_m: float = ACCESS_RADIUS_METERS,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the earliest-arrival transit journey between two points.
+
+    Args:
+        timetable (Timetable): The timetable to route over.
+        origin_lat (float): Latitude of the origin.
+        origin_lon (float): Longitude of the origin.
+        destination_lat (float): Latitude of the destination.
+        destination_lon (float): Longitude of the destination.
+        departure_time (int): Departure time in seconds after midnight.
+        max_transfers (int): Maximum number of transfers.
+        access_radius_m (float): Maximum walk to and from stops, in meters.
+
+    Returns:
+        Optional[Dict[str, Any]]: The journey with its legs, or None if no
+        journey was found.
+    """
+    access_walks = _walkable_stops(timetable, origin_lat, origin_lon, access_radius_m)
+    egress = _walkable_stops(
+        timetable, destination_lat, destination_lon, access_radius_m
+    )
+    if not access_walks or not egress:
+        return None
+
+    access = {stop: departure_time + seconds for stop, seconds in access_walks.items()}
+    result = run_raptor(timetable, access, egress, max_transfers + 1)
+    return reconstruct_journey(
+        timetable,
+        result,
+        [origin_lon, origin_lat],
+        [destination_lon, destination_lat],
+        departure_time,
+        egress,
+    )
@@ -3,10 +3,15 @@
 # Import for asynchronous database session management
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select  # Import to construct SQL queries
+from sqlalchemy import update  # Import to increment the rating aggregates
+# Import dialect inserts for upserting the rating aggregates
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 # Import for handling SQLAlchemy-specific errors
 from sqlalchemy.exc import SQLAlchemyError
 
 from models.review import Review as ReviewModel  # Import the Review model
+from models.place_rating import PlaceRating  # Import the per-place review aggregate
 # Import Pydantic schemas for review creation and updates
 from schemas.review import ReviewCreate, ReviewUpdate
 
@@ -36,6 +41,52 @@ class ReviewDeletionError(ReviewError):
     pass
 
 
+async def _adjust_place_rating(
+    db: AsyncSession, place_id: int, count_delta: int, rating_delta: int
+) -> None:
+    """
+    Apply a review change to the rating aggregate of a place.
+
+    The aggregate is updated in the caller's transaction with an in-place
+    increment. Added reviews use a single INSERT ... ON CONFLICT DO UPDATE,
+    so concurrent first reviews of a place cannot both insert the row;
+    removals only decrement an existing row.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        place_id (int): The reviewed place.
+        count_delta (int): Change in the number of reviews (+1 or -1).
+        rating_delta (int): Change in the sum of ratings.
+    """
+    if count_delta <= 0:
+        await db.execute(
+            update(PlaceRating)
+            .where(PlaceRating.place_id == place_id)
+            .values(
+                review_count=PlaceRating.review_count + count_delta,
+                rating_sum=PlaceRating.rating_sum + rating_delta,
+            )
+        )
+        return
+
+    dialect_insert = (
+        sqlite_insert if db.get_bind().dialect.name == "sqlite" else postgresql_insert
+    )
+    statement = dialect_insert(PlaceRating).values(
+        place_id=place_id, review_count=count_delta, rating_sum=rating_delta
+    )
+    excluded = statement.excluded
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[PlaceRating.place_id],
+            set_={
+                "review_count": PlaceRating.review_count + excluded.review_count,
+                "rating_sum": PlaceRating.rating_sum + excluded.rating_sum,
+            },
+        )
+    )
+
+
 async def create_review(db: AsyncSession, review: ReviewCreate) -> ReviewModel:
     """
     Create a new review record in the database.
@@ -54,6 +105,8 @@ async def create_review(db: AsyncSession, review: ReviewCreate) -> ReviewModel:
         # Create a new review instance using data from the schema
         db_review = ReviewModel(**review.dict())
         db.add(db_review)  # Add the review to the database session
+        # Count the review in the place's rating aggregate
+        await _adjust_place_rating(db, db_review.place_id, 1, db_review.rating)
         await db.commit()  # Commit the transaction to save changes
         # Refresh the instance to retrieve updated state
         await db.refresh(db_review)
@@ -106,12 +159,18 @@ async def update_review(db: AsyncSession, review_id: int, review: ReviewUpdate)
         result = await db.execute(select(ReviewModel).filter(ReviewModel.id == review_id))
         db_review = result.scalars().first()
         if db_review:
+            previous_place_id, previous_rating = db_review.place_id, db_review.rating
             # Update the fields provided in the schema
             update_data = review.dict(
                 exclude_unset=True)  # Exclude unset fields
             for key, value in update_data.items():
                 # Update the attributes of the review
                 setattr(db_review, key, value)
+            # Move the review's rating in the aggregates if it changed
+            previous = (previous_place_id, previous_rating)
+            if (db_review.place_id, db_review.rating) != previous:
+                await _adjust_place_rating(db, previous_place_id, -1, -previous_rating)
+                await _adjust_place_rating(db, db_review.place_id, 1, db_review.rating)
             await db.commit()  # Commit the transaction to save changes
             # Refresh the instance to retrieve updated state
             await db.refresh(db_review)
@@ -142,6 +201,8 @@ async def delete_review(db: AsyncSession, review_id: int) -> bool:
         result = await db.execute(select(ReviewModel).filter(ReviewModel.id == review_id))
         db_review = result.scalars().first()
         if db_review:
+            # Remove the review from the place's rating aggregate
+            await _adjust_place_rating(db, db_review.place_id, -1, -db_review.rating)
             await db.delete(db_review)  # Mark the review for deletion
             await db.commit()  # Commit the transaction to save changes
             return True  # Return True to indicate successful deletion
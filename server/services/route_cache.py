@@ -0,0 +1,113 @@
+# server/services/route_cache.py
+
+import threading  # For guarding the shared cache
+import time  # For entry expiry
+from collections import OrderedDict  # For LRU ordering
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np  # For snapping points to clusters
+
+from config.settings import get_settings  # For the cache size and TTL
+
+CLUSTER_CELL_DEGREES = 0.002  # Size of the grid cells points are clustered by (~200 m)
+STATION_SNAP_METERS = 200  # Route endpoints this close to a station are keyed by it
+BUFFER_BUCKET_MILES = 0.1  # Buffer radii are rounded to multiples of this
+
+
+def cluster_key(lat: float, lon: float) -> Tuple[int, int]:
+    """Id of the grid cell (stop cluster) containing a point."""
+    return int(np.floor(lat / CLUSTER_CELL_DEGREES)), int(
+        np.floor(lon / CLUSTER_CELL_DEGREES)
+    )
+
+
+def endpoint_key(network: Any, lat: float, lon: float) -> Tuple[Any, ...]:
+    """
+    Cache key of a route endpoint: the stop cluster (station) nearest to it.
+
+    Endpoints farther than `STATION_SNAP_METERS` from every station fall back
+    to their grid cell, so distant points do not share one station's entries.
+
+    Args:
+        network (Any): The bus network whose stations are used.
+        lat (float): Latitude of the endpoint.
+        lon (float): Longitude of the endpoint.
+
+    Returns:
+        Tuple[Any, ...]: ("station", index) or ("cell", row, column).
+    """
+    station = network.nearest_station(lat, lon, STATION_SNAP_METERS)
+    if station is not None:
+        return ("station", station)
+    return ("cell",) + cluster_key(lat, lon)
+
+
+def buffer_bucket(buffer_radius_miles: float) -> int:
+    """Bucket of a buffer radius, so nearly equal radii share cache entries."""
+    return int(round(buffer_radius_miles / BUFFER_BUCKET_MILES))
+
+
+class RouteResultCache:
+    """
+    LRU cache of route results with a time-to-live.
+
+    Entries belong to the bus network they were computed on: the first access
+    with a different network object (after a reload) empties the cache.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._network: Any = None
+        self._lock = threading.Lock()
+
+    def _check_network(self, network: Any) -> None:
+        if network is not self._network:
+            self._entries.clear()
+            self._network = network
+
+    def get(self, network: Any, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for `key`, or None if it is missing or expired.
+
+        Args:
+            network (Any): The network the caller is routing on.
+            key (Hashable): The cache key.
+        """
+        with self._lock:
+            self._check_network(network)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, network: Any, key: Hashable, value: Any) -> None:
+        """Store a value computed on `network`, evicting the least recently used."""
+        with self._lock:
+            self._check_network(network)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared cache of direct bus route results
+route_cache = RouteResultCache(
+    get_settings().route_cache_size, get_settings().route_cache_ttl
+)
@@ -0,0 +1,160 @@
+# server/services/spatial_grid.py
+
+from typing import Optional, Tuple
+
+import numpy as np  # For vectorised distance and index computations
+
+EARTH_RADIUS_METERS = 6371008.8  # Mean Earth radius
+METERS_PER_DEGREE = 111320.0  # Approximate length of one degree of latitude
+
+
+def haversine_meters(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Vectorised haversine distance in meters.
+
+    Accepts scalars or NumPy arrays (broadcast against each other) in degrees.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def grid_pairs(
+    lat_a: np.ndarray,
+    lon_a: np.ndarray,
+    lat_b: np.ndarray,
+    lon_b: np.ndarray,
+    radius_m: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find all pairs of points (one from A, one from B) within `radius_m` meters.
+
+    Points of B are bucketed into a uniform grid whose cells are `radius_m`
+    wide, so each point of A only needs to be compared with the points of B in
+    its own and the 8 neighbouring cells. The join is fully vectorised: cells
+    are encoded as sorted integer keys and neighbour ranges are found with
+    binary search.
+
+    Args:
+        lat_a (np.ndarray): Latitudes of the points of A.
+        lon_a (np.ndarray): Longitudes of the points of A.
+        lat_b (np.ndarray): Latitudes of the points of B.
+        lon_b (np.ndarray): Longitudes of the points of B.
+        radius_m (float): Maximum distance in meters.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Indices into A, indices into
+        B and distances in meters of the matching pairs. For a self-join (A is
+        B) pairs of a point with itself are included; filter on `i != j` if
+        they are not wanted.
+    """
+    lat_a, lon_a = np.asarray(lat_a, dtype=np.float64), np.asarray(
+        lon_a, dtype=np.float64
+    )
+    lat_b, lon_b = np.asarray(lat_b, dtype=np.float64), np.asarray(
+        lon_b, dtype=np.float64
+    )
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(lat_a) == 0 or len(lat_b) == 0:
+        return empty
+
+    # Grid cells are at least radius_m wide; longitude is scaled at the
+    # highest absolute latitude, where a degree of longitude is shortest
+    # 1% margin for the varying degree length
+    cell_deg = 1.01 * radius_m / METERS_PER_DEGREE
+    max_abs_lat = max(np.abs(lat_a).max(), np.abs(lat_b).max())
+    lon_scale = max(np.cos(np.radians(max_abs_lat)), 1e-6)
+    min_y = min(lat_a.min(), lat_b.min())
+    min_x = min(lon_a.min(), lon_b.min()) * lon_scale
+    cy_a = np.floor((lat_a - min_y) / cell_deg).astype(np.int64) + 1
+    cx_a = np.floor((lon_a * lon_scale - min_x) / cell_deg).astype(np.int64) + 1
+    cy_b = np.floor((lat_b - min_y) / cell_deg).astype(np.int64) + 1
+    cx_b = np.floor((lon_b * lon_scale - min_x) / cell_deg).astype(np.int64) + 1
+    width = int(max(cx_a.max(), cx_b.max())) + 2
+
+    keys_b = cy_b * width + cx_b
+    order_b = np.argsort(keys_b, kind="stable")
+    sorted_keys_b = keys_b[order_b]
+    keys_a = cy_a * width + cx_a
+
+    pair_a, pair_b = [], []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            neighbour = keys_a + dy * width + dx
+            start = np.searchsorted(sorted_keys_b, neighbour, side="left")
+            stop = np.searchsorted(sorted_keys_b, neighbour, side="right")
+            counts = stop - start
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Expand every [start, stop) range into explicit positions
+            a_idx = np.repeat(np.arange(len(keys_a)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            pair_a.append(a_idx)
+            pair_b.append(order_b[np.repeat(start, counts) + offsets])
+
+    if not pair_a:
+        return empty
+    i = np.concatenate(pair_a)
+    j = np.concatenate(pair_b)
+    distances = haversine_meters(lat_a[i], lon_a[i], lat_b[j], lon_b[j])
+    within = distances <= radius_m
+    return i[within], j[within], distances[within]
+
+
+def cluster_points(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    radius_m: float,
+    groups: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Cluster points that are within `radius_m` of each other (single linkage).
+
+    Points that carry a group id (e.g. a GTFS parent_station) are clustered by
+    that id; the others are merged with every ungrouped point within
+    `radius_m`, transitively. Components are found by vectorised union-find
+    (min-label propagation with pointer jumping) over the `grid_pairs` edges.
+
+    Args:
+        lat (np.ndarray): Latitudes of the points.
+        lon (np.ndarray): Longitudes of the points.
+        radius_m (float): Merge distance in meters.
+        groups (np.ndarray, optional): Group id per point; "" (or None) for none.
+
+    Returns:
+        np.ndarray: Cluster id per point, numbered 0..n_clusters-1.
+    """
+    n = len(lat)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    if groups is None:
+        grouped = np.zeros(n, dtype=bool)
+    else:
+        groups = np.asarray(["" if g is None else str(g) for g in groups], dtype=object)
+        grouped = groups != ""
+
+    i, j, _ = grid_pairs(lat, lon, lat, lon, radius_m)
+    keep = (i < j) & ~grouped[i] & ~grouped[j]
+    edges_a, edges_b = [i[keep]], [j[keep]]
+    if grouped.any():
+        # Chain the members of each group together
+        members = np.flatnonzero(grouped)
+        members = members[np.argsort(groups[members].astype(str), kind="stable")]
+        same = groups[members[1:]] == groups[members[:-1]]
+        edges_a.append(members[:-1][same])
+        edges_b.append(members[1:][same])
+    edges_a, edges_b = np.concatenate(edges_a), np.concatenate(edges_b)
+
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, edges_a, labels[edges_b])
+        np.minimum.at(labels, edges_b, labels[edges_a])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return np.unique(labels, return_inverse=True)[1].astype(np.int64)
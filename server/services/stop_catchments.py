@@ -0,0 +1,218 @@
+# server/services/stop_catchments.py
+
+import logging  # For logging build and load events
+import os  # For checking the catchment file
+import threading  # For guarding the shared index
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # For the CSR catchment arrays
+
+from config.settings import get_settings  # For the catchment path
+from services.bus_network import BusNetwork, get_bus_network
+from services.spatial_grid import grid_pairs  # For the stop-place join
+
+logger = logging.getLogger(__name__)
+
+# Arrays of a catchment table. Stop row r (`stop_lines[r]`, `stop_numbers[r]`,
+# one per bus_stops row) has the places `stop_offsets[r]:[r + 1]` of
+# `place_ids` / `meters`, closest first. The reverse index lists, for place
+# `reverse_place_ids[p]` (sorted), the stop rows `reverse_offsets[p]:[p + 1]`
+# of `reverse_stops` / `reverse_meters`, closest first.
+CATCHMENT_FIELDS = (
+    "radius_meters",
+    "stop_lines",
+    "stop_numbers",
+    "stop_offsets",
+    "place_ids",
+    "meters",
+    "reverse_place_ids",
+    "reverse_offsets",
+    "reverse_stops",
+    "reverse_meters",
+)
+
+
+def build_stop_catchments(
+    network: BusNetwork,
+    place_ids: Sequence[int],
+    place_lat: Sequence[float],
+    place_lon: Sequence[float],
+    radius_meters: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Find the places within walking distance of every bus stop row.
+
+    Stops and places are joined through the grid index of `grid_pairs`, so
+    only places in neighbouring cells are distance-tested.
+
+    Args:
+        network (BusNetwork): The bus network whose stop rows are indexed.
+        place_ids (Sequence[int]): Database ids of the places.
+        place_lat (Sequence[float]): Latitudes of the places.
+        place_lon (Sequence[float]): Longitudes of the places.
+        radius_meters (float): Walk radius in meters.
+
+    Returns:
+        Dict[str, np.ndarray]: The arrays listed in `CATCHMENT_FIELDS`.
+    """
+    place_ids = np.asarray(place_ids, dtype=np.int64)
+    stop_idx, place_idx, meters = grid_pairs(
+        network.stop_lat, network.stop_lon, place_lat, place_lon, radius_meters
+    )
+
+    order = np.lexsort((meters, stop_idx))
+    stop_idx, place_idx, meters = stop_idx[order], place_idx[order], meters[order]
+    stop_offsets = np.r_[
+        0, np.cumsum(np.bincount(stop_idx, minlength=network.stop_count))
+    ]
+
+    pair_place_ids = place_ids[place_idx]
+    reverse = np.lexsort((meters, pair_place_ids))
+    reverse_place_ids, starts = np.unique(pair_place_ids[reverse], return_index=True)
+    return {
+        "radius_meters": np.array(radius_meters, dtype=np.float64),
+        "stop_lines": np.asarray(network.line_names, dtype=str)[network.stop_line],
+        "stop_numbers": network.stop_number.astype(str),
+        "stop_offsets": stop_offsets.astype(np.int64),
+        "place_ids": pair_place_ids,
+        "meters": meters.astype(np.float32),
+        "reverse_place_ids": reverse_place_ids,
+        "reverse_offsets": np.r_[starts, len(reverse)].astype(np.int64),
+        "reverse_stops": stop_idx[reverse].astype(np.int64),
+        "reverse_meters": meters[reverse].astype(np.float32),
+    }
+
+
+def save_stop_catchments(table: Dict[str, np.ndarray], path: str) -> None:
+    """
+    Save a catchment table as a compressed .npz file.
+
+    The catchment service reloads whenever the file changes, so the archive is
+    completed under a staging name first and only then renamed over `path`.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    staging_path = f"{path}.tmp"
+    with open(staging_path, "wb") as table_file:
+        np.savez_compressed(table_file, **table)
+    os.replace(staging_path, path)
+
+
+def load_stop_catchments(path: str) -> Dict[str, np.ndarray]:
+    """Load a catchment table written by `save_stop_catchments`."""
+    with np.load(path) as data:
+        return {name: data[name] for name in CATCHMENT_FIELDS}
+
+
+class StopCatchmentIndex:
+    """
+    A catchment table resolved against the current bus network.
+
+    Table rows are matched to network stop rows by (line, stop number), so a
+    table built before a network reload stays usable; stops missing from the
+    table have empty catchments.
+    """
+
+    def __init__(self, table: Dict[str, np.ndarray], network: BusNetwork):
+        self.network = network
+        self.table = table
+        self.radius_meters = float(table["radius_meters"])
+        table_rows = {
+            key: row
+            for row, key in enumerate(
+                zip(table["stop_lines"].tolist(), table["stop_numbers"].tolist())
+            )
+        }
+        network_lines = (
+            np.asarray(network.line_names, dtype=object)[network.stop_line]
+            if network.stop_count
+            else np.empty(0, dtype=object)
+        )
+        self.table_row = np.array(
+            [
+                table_rows.get(key, -1)
+                for key in zip(network_lines.tolist(), network.stop_number.tolist())
+            ],
+            dtype=np.int64,
+        )
+        self.network_row = np.full(len(table["stop_numbers"]), -1, dtype=np.int64)
+        matched = np.flatnonzero(self.table_row >= 0)
+        self.network_row[self.table_row[matched]] = matched
+        # Network stop rows of every stop number (one row per line serving the stop)
+        self.stop_number_rows: Dict[str, List[int]] = {}
+        for row, number in enumerate(network.stop_number.tolist()):
+            self.stop_number_rows.setdefault(number, []).append(row)
+
+    def stop_rows(self, stop_number: str) -> List[int]:
+        """Network stop rows with a stop number, empty if the stop is unknown."""
+        return self.stop_number_rows.get(str(stop_number), [])
+
+    def places_near_stop(self, stop_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Places within the walk radius of a network stop row.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Place ids and distances in meters,
+                closest first.
+        """
+        row = int(self.table_row[stop_index])
+        if row < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        offsets = self.table["stop_offsets"]
+        start, end = offsets[row], offsets[row + 1]
+        return self.table["place_ids"][start:end], self.table["meters"][start:end]
+
+    def stops_near_place(self, place_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Network stop rows within the walk radius of a place.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Stop row indices and distances in meters,
+                closest first.
+        """
+        ids = self.table["reverse_place_ids"]
+        k = int(np.searchsorted(ids, place_id))
+        if k == len(ids) or ids[k] != place_id:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        offsets = self.table["reverse_offsets"]
+        start, end = offsets[k], offsets[k + 1]
+        rows = self.network_row[self.table["reverse_stops"][start:end]]
+        found = rows >= 0
+        return rows[found], self.table["reverse_meters"][start:end][found]
+
+
+class StopCatchmentService:
+    """
+    Loads the catchment table built by scripts/build_stop_catchments.py and
+    resolves it against the current bus network. Building the table needs the
+    places from the database, so there is no in-memory fallback.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._index: Optional[StopCatchmentIndex] = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def index(self) -> Optional[StopCatchmentIndex]:
+        """The catchment index of the current network, or None without a table."""
+        path = (
+            self.path if self.path is not None else get_settings().stop_catchment_path
+        )
+        if not os.path.exists(path):
+            return None
+        network = get_bus_network()
+        stat = os.stat(path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if (
+                self._index is None
+                or self._index.network is not network
+                or self._signature != signature
+            ):
+                self._index = StopCatchmentIndex(load_stop_catchments(path), network)
+                self._signature = signature
+            return self._index
+
+
+# Shared service instance
+stop_catchment_service = StopCatchmentService()
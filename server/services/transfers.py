@@ -0,0 +1,303 @@
+# server/services/transfers.py
+
+import logging  # For logging build and load events
+import os  # For checking the table file
+import threading  # For guarding the shared table
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # For the compact transfer table
+
+from config.settings import get_settings  # For the table path
+from services.bus_network import METERS_PER_MILE, BusNetwork, get_bus_network
+from services.spatial_grid import grid_pairs  # For the stop self-join
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_RADIUS_METERS = 250  # Maximum walk between the two stops of a transfer
+MAX_TRANSFERS_PER_PAIR = 5  # Best transfer stop pairs kept per (from line, to line)
+
+# Arrays of a transfer table, one entry per transfer, sorted by
+# (from line, to line, meters)
+TABLE_FIELDS = (
+    "line_names",
+    "from_line",
+    "to_line",
+    "from_stop",
+    "to_stop",
+    "meters",
+    "pair_keys",
+    "pair_offsets",
+)
+
+
+def build_transfer_table(network: BusNetwork) -> Dict[str, np.ndarray]:
+    """
+    Build the line-to-line transfer table of a bus network.
+
+    All stops are self-joined within `TRANSFER_RADIUS_METERS` through a grid
+    index. For every ordered pair of lines, each stop of the first line keeps
+    only its closest stop of the second line, and the `MAX_TRANSFERS_PER_PAIR`
+    closest of those stop pairs are kept.
+
+    Args:
+        network (BusNetwork): The bus network.
+
+    Returns:
+        Dict[str, np.ndarray]: The arrays listed in `TABLE_FIELDS`. Stops are
+        stored as stop numbers so the table stays valid across network reloads.
+        Transfers of line pair (a, b) are `pair_offsets[i]:pair_offsets[i + 1]`
+        where `pair_keys[i] == a * len(line_names) + b`.
+    """
+    n_lines = len(network.line_names)
+    i, j, meters = grid_pairs(
+        network.stop_lat,
+        network.stop_lon,
+        network.stop_lat,
+        network.stop_lon,
+        TRANSFER_RADIUS_METERS,
+    )
+    from_line = network.stop_line[i].astype(np.int64)
+    to_line = network.stop_line[j].astype(np.int64)
+    keep = from_line != to_line
+    i, j, meters, from_line, to_line = (
+        i[keep],
+        j[keep],
+        meters[keep],
+        from_line[keep],
+        to_line[keep],
+    )
+
+    # Closest stop of the other line for each (stop, other line)
+    order = np.lexsort((meters, to_line, i))
+    i, j, meters, from_line, to_line = (
+        i[order],
+        j[order],
+        meters[order],
+        from_line[order],
+        to_line[order],
+    )
+    first = np.r_[True, (np.diff(i) != 0) | (np.diff(to_line) != 0)]
+    i, j, meters, from_line, to_line = (
+        i[first],
+        j[first],
+        meters[first],
+        from_line[first],
+        to_line[first],
+    )
+
+    # Best MAX_TRANSFERS_PER_PAIR stop pairs per (from line, to line)
+    keys = from_line * n_lines + to_line
+    order = np.lexsort((meters, keys))
+    i, j, meters, keys = i[order], j[order], meters[order], keys[order]
+    group_start = np.flatnonzero(np.r_[True, np.diff(keys) != 0])
+    rank = np.arange(len(keys)) - np.repeat(
+        group_start, np.diff(np.r_[group_start, len(keys)])
+    )
+    keep = rank < MAX_TRANSFERS_PER_PAIR
+    i, j, meters, keys = i[keep], j[keep], meters[keep], keys[keep]
+
+    pair_keys, pair_starts = np.unique(keys, return_index=True)
+    return {
+        "line_names": np.asarray(network.line_names, dtype=str),
+        "from_line": (
+            (keys // n_lines).astype(np.int32) if n_lines else keys.astype(np.int32)
+        ),
+        "to_line": (
+            (keys % n_lines).astype(np.int32) if n_lines else keys.astype(np.int32)
+        ),
+        "from_stop": network.stop_number[i].astype(str),
+        "to_stop": network.stop_number[j].astype(str),
+        "meters": meters.astype(np.float32),
+        "pair_keys": pair_keys.astype(np.int64),
+        "pair_offsets": np.r_[pair_starts, len(keys)].astype(np.int64),
+    }
+
+
+def save_transfer_table(table: Dict[str, np.ndarray], path: str) -> None:
+    """
+    Save a transfer table as a compressed .npz file.
+
+    The table goes to a staging file that is then moved over `path` with
+    `os.replace`, so the transfer service never opens a half-written file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    staging_path = f"{path}.tmp"
+    with open(staging_path, "wb") as table_file:
+        np.savez_compressed(table_file, **table)
+    os.replace(staging_path, path)
+
+
+def load_transfer_table(path: str) -> Dict[str, np.ndarray]:
+    """Load a transfer table written by `save_transfer_table`."""
+    with np.load(path) as data:
+        return {name: data[name] for name in TABLE_FIELDS}
+
+
+class TransferIndex:
+    """
+    A transfer table resolved against the current bus network.
+
+    Line names and stop numbers of the table are mapped to the network's line
+    codes and stop rows; transfers whose stops no longer exist are dropped.
+    """
+
+    def __init__(self, table: Dict[str, np.ndarray], network: BusNetwork):
+        self.network = network
+        line_codes = {name: code for code, name in enumerate(network.line_names)}
+        stop_rows = {
+            (line, number): row
+            for row, (line, number) in enumerate(
+                zip(network.stop_line.tolist(), network.stop_number.tolist())
+            )
+        }
+        table_lines = np.array(
+            [line_codes.get(str(name), -1) for name in table["line_names"]],
+            dtype=np.int64,
+        )
+        from_line = (
+            table_lines[table["from_line"]]
+            if len(table_lines)
+            else np.empty(0, np.int64)
+        )
+        to_line = (
+            table_lines[table["to_line"]] if len(table_lines) else np.empty(0, np.int64)
+        )
+        from_row = np.array(
+            [
+                stop_rows.get((line, stop), -1)
+                for line, stop in zip(from_line.tolist(), table["from_stop"].tolist())
+            ],
+            dtype=np.int64,
+        )
+        to_row = np.array(
+            [
+                stop_rows.get((line, stop), -1)
+                for line, stop in zip(to_line.tolist(), table["to_stop"].tolist())
+            ],
+            dtype=np.int64,
+        )
+        valid = (from_row >= 0) & (to_row >= 0)
+
+        self.from_line, self.to_line = from_line[valid], to_line[valid]
+        self.from_stop, self.to_stop = from_row[valid], to_row[valid]
+        self.meters = table["meters"][valid].astype(np.float64)
+        n_lines = len(network.line_names)
+        keys = self.from_line * n_lines + self.to_line
+        self.pair_keys, starts = np.unique(keys, return_index=True)
+        self.pair_offsets = np.r_[starts, len(keys)]
+
+    def transfers(self, from_line: str, to_line: str) -> List[Dict[str, Any]]:
+        """
+        Best transfer stop pairs from one line to another, closest first.
+
+        Args:
+            from_line (str): Line to transfer from.
+            to_line (str): Line to transfer to.
+
+        Returns:
+            List[Dict[str, Any]]: Transfer stops and the walking distance between them.
+        """
+        names = self.network.line_names
+        try:
+            key = names.index(str(from_line)) * len(names) + names.index(str(to_line))
+        except ValueError:
+            return []
+        k = int(np.searchsorted(self.pair_keys, key))
+        if k == len(self.pair_keys) or self.pair_keys[k] != key:
+            return []
+        return [
+            {
+                "from_stop": self._stop(int(self.from_stop[t])),
+                "to_stop": self._stop(int(self.to_stop[t])),
+                "walking_distance": round(float(self.meters[t]) / METERS_PER_MILE, 4),
+            }
+            for t in range(self.pair_offsets[k], self.pair_offsets[k + 1])
+        ]
+
+    def _stop(self, row: int) -> Dict[str, Any]:
+        stop = self.network.stop_match(row, 0.0)
+        return {
+            "stop_number": stop.STOPNUM,
+            "name": stop.STOPNAME,
+            "line": stop.LINE,
+            "coordinates": [stop.LONG, stop.LAT],
+        }
+
+    def best_transfer(
+        self, origin_walk: np.ndarray, destination_walk: np.ndarray
+    ) -> Optional[int]:
+        """
+        Index of the transfer minimising origin walk + transfer walk + destination walk.
+
+        Args:
+            origin_walk (np.ndarray): Walking distance (miles) from the origin to
+                each line, inf if out of reach.
+            destination_walk (np.ndarray): Walking distance (miles) from each line
+                to the destination.
+
+        Returns:
+            Optional[int]: The transfer index, or None if no transfer connects the
+                two points.
+        """
+        if len(self.meters) == 0:
+            return None
+        total = (
+            origin_walk[self.from_line]
+            + self.meters / METERS_PER_MILE
+            + destination_walk[self.to_line]
+        )
+        best = int(np.argmin(total))
+        return best if np.isfinite(total[best]) else None
+
+
+class TransferService:
+    """
+    Loads the transfer table built offline by scripts/build_transfer_table.py
+    for the current bus network.
+
+    The table is never built in the API process; it is resolved again when
+    the build job replaces the file or the network is reloaded, and transfer
+    lookups are unavailable while there is no file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._index: Optional[TransferIndex] = None
+        self._signature = None
+        self._warned = None
+        self._lock = threading.Lock()
+
+    def index(self) -> Optional[TransferIndex]:
+        """The transfer index of the current network, or None if there is no table."""
+        network = get_bus_network()
+        path = (
+            self.path if self.path is not None else get_settings().transfer_table_path
+        )
+        with self._lock:
+            if not os.path.exists(path):
+                if self._warned != path:
+                    logger.warning(
+                        f"Transfer table {path} not found, "
+                        "build it with scripts/build_transfer_table.py"
+                    )
+                    self._warned = path
+                self._index, self._signature = None, None
+                return None
+            stat = os.stat(path)
+            signature = (path, stat.st_mtime_ns, stat.st_size)
+            if (
+                self._index is None
+                or self._index.network is not network
+                or self._signature != signature
+            ):
+                self._index = TransferIndex(load_transfer_table(path), network)
+                self._signature = signature
+                logger.info(
+                    f"Loaded transfer table {path} "
+                    f"({len(self._index.meters)} transfers)"
+                )
+            return self._index
+
+
+# Shared service instance
+transfer_service = TransferService()
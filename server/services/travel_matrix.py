@@ -0,0 +1,525 @@
+# server/services/travel_matrix.py
+
+import logging  # For logging build and load events
+import os  # For checking the matrix file
+import threading  # For guarding the shared matrix
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # For the CSR leg arrays
+
+from config.settings import get_settings  # For the matrix path and radii
+from services.bus_network import METERS_PER_MILE, BusNetwork, get_bus_network
+from services.gtfs_timetable import (  # Walking speed and CSR expansion
+    WALK_SPEED_MPS,
+    csr_ranges,
+)
+from services.headways import (  # For expected waits
+    HeadwayTable,
+    headway_service,
+    time_band,
+)
+from services.nearest_bustops import AVERAGE_BUS_SPEED_MPH  # Direct router's bus speed
+from services.route_cache import CLUSTER_CELL_DEGREES, cluster_key  # Stop clusters
+from services.spatial_grid import (  # For the point-stop and point-point joins
+    grid_pairs,
+    haversine_meters,
+)
+
+logger = logging.getLogger(__name__)
+
+PAIR_CHUNK = 200_000  # Cluster pairs joined per pass when building the matrix
+
+# Arrays of a travel matrix. Cluster c (`cluster_keys[c]`, the route cache
+# cell of its points, centred on `cluster_lat[c]`, `cluster_lon[c]`) has the
+# bus legs `leg_offsets[c]:[c + 1]` to the clusters `leg_destinations`
+# (sorted), each with its door-to-door `bus_minutes`, line (`bus_lines` into
+# `line_names`) and stops (`board_stops` / `alight_stops` into `stop_numbers`
+# and `stop_names`). Pairs without a direct line, or farther apart than
+# `max_leg_miles`, have no leg and are walked.
+TRAVEL_MATRIX_FIELDS = (
+    "buffer_radius_miles",
+    "max_leg_miles",
+    "cluster_keys",
+    "cluster_lat",
+    "cluster_lon",
+    "leg_offsets",
+    "leg_destinations",
+    "bus_minutes",
+    "bus_lines",
+    "board_stops",
+    "alight_stops",
+    "line_names",
+    "stop_numbers",
+    "stop_names",
+)
+
+
+def _nearest_line_stops(
+    network: BusNetwork, lat: np.ndarray, lon: np.ndarray, radius_meters: float
+):
+    """
+    Closest stop of every line direction within the radius of each point.
+
+    Returns:
+        tuple: Keys (point * line directions + line direction, sorted), stop
+        rows and distances in meters of the matches.
+    """
+    directions = int(network.stop_line_direction.max()) + 1 if network.stop_count else 1
+    point_idx, stop_idx, meters = grid_pairs(
+        lat, lon, network.stop_lat, network.stop_lon, radius_meters
+    )
+    keys = (
+        point_idx.astype(np.int64) * directions + network.stop_line_direction[stop_idx]
+    )
+    order = np.lexsort((meters, keys))
+    first = (
+        order[np.r_[True, keys[order][1:] != keys[order][:-1]]] if len(order) else order
+    )
+    return keys[first], stop_idx[first], meters[first], directions
+
+
+def best_bus_legs(
+    network: BusNetwork,
+    lat: np.ndarray,
+    lon: np.ndarray,
+    origins: np.ndarray,
+    destinations: np.ndarray,
+    buffer_radius_miles: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the fastest direct bus leg between given pairs of points.
+
+    Like the direct router, a pair is served by a line direction with a stop
+    within the buffer of both points, on a variant that reaches the alighting
+    stop after the boarding stop (the variant closest to both stops is used).
+    A leg takes the walk to and from the stops plus the ride at
+    `AVERAGE_BUS_SPEED_MPH`; the fastest line of each pair is kept. All pairs
+    are joined in vectorised passes: stops per point through the grid index,
+    line directions shared by a pair through a sorted-key lookup and variants
+    through `BusNetwork.score_variants`.
+
+    Args:
+        network (BusNetwork): The bus network to route on.
+        lat (np.ndarray): Latitudes of the points.
+        lon (np.ndarray): Longitudes of the points.
+        origins (np.ndarray): Origin point of each pair.
+        destinations (np.ndarray): Destination point of each pair.
+        buffer_radius_miles (float): Search radius for bus stops around each point.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Door-to-door minutes of
+        each pair (inf without a direct line) and its boarding and alighting
+        stop rows (-1 without a direct line).
+    """
+    origins = np.asarray(origins, dtype=np.int64)
+    destinations = np.asarray(destinations, dtype=np.int64)
+
+    # Variants of every line, as CSR arrays over line codes
+    line_variants = [
+        network.route_variant_ids.get(name, []) for name in network.line_names
+    ]
+    variant_counts = [len(ids) for ids in line_variants]
+    variant_offsets = np.r_[0, np.cumsum(variant_counts)].astype(np.int64)
+    variant_ids = np.array([v for ids in line_variants for v in ids], dtype=np.int64)
+
+    stop_keys, stop_rows, stop_meters, directions = _nearest_line_stops(
+        network, lat, lon, buffer_radius_miles * METERS_PER_MILE
+    )
+    entry_start = np.searchsorted(stop_keys, np.arange(len(lat)) * directions)
+    entry_end = np.searchsorted(stop_keys, (np.arange(len(lat)) + 1) * directions)
+
+    best_minutes = np.full(len(origins), np.inf)
+    best_board = np.full(len(origins), -1, dtype=np.int64)
+    best_alight = np.full(len(origins), -1, dtype=np.int64)
+    for start in range(0, len(origins), PAIR_CHUNK):
+        pairs = np.arange(start, min(start + PAIR_CHUNK, len(origins)))
+
+        # Line directions near the origin that also have a stop near the destination
+        entries = csr_ranges(entry_start[origins[pairs]], entry_end[origins[pairs]])
+        pair = np.repeat(pairs, entry_end[origins[pairs]] - entry_start[origins[pairs]])
+        wanted = destinations[pair] * directions + stop_keys[entries] % directions
+        found = np.minimum(np.searchsorted(stop_keys, wanted), len(stop_keys) - 1)
+        shared = stop_keys[found] == wanted
+        pair, board, alight = (
+            pair[shared],
+            stop_rows[entries[shared]],
+            stop_rows[found[shared]],
+        )
+        walk_meters = stop_meters[entries[shared]] + stop_meters[found[shared]]
+
+        # Every variant of each shared line direction's line
+        line = network.stop_line[board]
+        counts = variant_offsets[line + 1] - variant_offsets[line]
+        candidate = np.repeat(np.arange(len(pair)), counts)
+        variants = variant_ids[
+            csr_ranges(variant_offsets[line], variant_offsets[line + 1])
+        ]
+        offsets, in_order = network.score_variants(
+            variants, board[candidate], alight[candidate]
+        )
+        candidate, variants, offsets = (
+            candidate[in_order],
+            variants[in_order],
+            offsets[in_order],
+        )
+
+        # Closest in-order variant per line direction, then the fastest per pair
+        order = np.lexsort((variants, offsets, candidate))
+        first = (
+            order[np.r_[True, candidate[order][1:] != candidate[order][:-1]]]
+            if len(order)
+            else order
+        )
+        candidate, variants = candidate[first], variants[first]
+        start_entry = network.variant_stop_start[variants]
+        ride_miles = np.abs(
+            network.stop_miles[start_entry + network.stop_line_rank[alight[candidate]]]
+            - network.stop_miles[start_entry + network.stop_line_rank[board[candidate]]]
+        )
+        minutes = (
+            walk_meters[candidate] / WALK_SPEED_MPS / 60
+            + ride_miles / AVERAGE_BUS_SPEED_MPH * 60
+        )
+
+        order = np.lexsort((minutes, pair[candidate]))
+        first = (
+            order[
+                np.r_[True, pair[candidate][order][1:] != pair[candidate][order][:-1]]
+            ]
+            if len(order)
+            else order
+        )
+        served = pair[candidate][first]
+        best_minutes[served] = minutes[first]
+        best_board[served] = board[candidate][first]
+        best_alight[served] = alight[candidate][first]
+    return best_minutes, best_board, best_alight
+
+
+def build_travel_matrix(
+    network: BusNetwork,
+    lat: Sequence[float],
+    lon: Sequence[float],
+    buffer_radius_miles: float,
+    max_leg_miles: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Find the best direct bus leg between every pair of point clusters.
+
+    Points are grouped into the route cache's clusters, and every pair of
+    clusters within `max_leg_miles` is routed from the cluster centres with
+    `best_bus_legs`.
+
+    Args:
+        network (BusNetwork): The bus network to route on.
+        lat (Sequence[float]): Latitudes of the points.
+        lon (Sequence[float]): Longitudes of the points.
+        buffer_radius_miles (float): Search radius for bus stops around each cluster.
+        max_leg_miles (float): Pairs farther apart than this get no bus leg.
+
+    Returns:
+        Dict[str, np.ndarray]: The arrays listed in `TRAVEL_MATRIX_FIELDS`.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    cells = (
+        np.floor(np.column_stack([lat, lon]) / CLUSTER_CELL_DEGREES)
+        .astype(np.int64)
+        .reshape(-1, 2)
+    )
+    keys, cluster = np.unique(cells, axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    sizes = np.bincount(cluster, minlength=len(keys))
+    cluster_lat = np.bincount(cluster, lat, minlength=len(keys)) / np.maximum(sizes, 1)
+    cluster_lon = np.bincount(cluster, lon, minlength=len(keys)) / np.maximum(sizes, 1)
+
+    # Candidate pairs of distinct clusters within the maximum leg length
+    origins, destinations, _ = grid_pairs(
+        cluster_lat,
+        cluster_lon,
+        cluster_lat,
+        cluster_lon,
+        max_leg_miles * METERS_PER_MILE,
+    )
+    distinct = origins != destinations
+    origins = origins[distinct].astype(np.int64)
+    destinations = destinations[distinct].astype(np.int64)
+    best_minutes, best_board, best_alight = best_bus_legs(
+        network, cluster_lat, cluster_lon, origins, destinations, buffer_radius_miles
+    )
+
+    served = np.flatnonzero(np.isfinite(best_minutes))
+    order = served[np.lexsort((destinations[served], origins[served]))]
+    return {
+        "buffer_radius_miles": np.array(buffer_radius_miles, dtype=np.float64),
+        "max_leg_miles": np.array(max_leg_miles, dtype=np.float64),
+        "cluster_keys": keys,
+        "cluster_lat": cluster_lat,
+        "cluster_lon": cluster_lon,
+        "leg_offsets": np.r_[
+            0, np.cumsum(np.bincount(origins[order], minlength=len(keys)))
+        ].astype(np.int64),
+        "leg_destinations": destinations[order],
+        "bus_minutes": best_minutes[order].astype(np.float32),
+        "bus_lines": network.stop_line[best_board[order]].astype(np.int32),
+        "board_stops": best_board[order].astype(np.int32),
+        "alight_stops": best_alight[order].astype(np.int32),
+        "line_names": np.asarray(network.line_names, dtype=str),
+        "stop_numbers": network.stop_number.astype(str),
+        "stop_names": network.stop_name.astype(str),
+    }
+
+
+def save_travel_matrix(table: Dict[str, np.ndarray], path: str) -> None:
+    """
+    Save a travel matrix as a compressed .npz file.
+
+    Writes go to `<path>.tmp` and are renamed into place once complete, as the
+    matrix service reloads the file as soon as it changes.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    staging_path = f"{path}.tmp"
+    with open(staging_path, "wb") as table_file:
+        np.savez_compressed(table_file, **table)
+    os.replace(staging_path, path)
+
+
+def load_travel_matrix(path: str) -> Dict[str, np.ndarray]:
+    """Load a travel matrix written by `save_travel_matrix`."""
+    with np.load(path) as data:
+        return {name: data[name] for name in TRAVEL_MATRIX_FIELDS}
+
+
+def _faster_leg(
+    walk_miles: float,
+    bus: Optional[Tuple[float, str, str, str, str, str]],
+    headways: Optional[HeadwayTable],
+    band: int,
+) -> Dict[str, Any]:
+    """
+    The faster of walking and a bus leg.
+
+    Args:
+        walk_miles (float): Walking distance between the two points.
+        bus (Optional[Tuple]): The bus leg as (minutes, line, boarding stop
+            number and name, alighting stop number and name), or None.
+        headways (Optional[HeadwayTable]): Adds the expected wait to the bus leg
+            when given.
+        band (int): Time band of the departure.
+
+    Returns:
+        Dict[str, Any]: The leg's mode, minutes and, for bus legs, its line and stops.
+    """
+    walk_minutes = walk_miles * METERS_PER_MILE / WALK_SPEED_MPS / 60
+    walk = {
+        "mode": "walk",
+        "minutes": round(walk_minutes, 1),
+        "route_number": None,
+        "board_stop": None,
+        "alight_stop": None,
+        "expected_wait_minutes": None,
+    }
+    if bus is None:
+        return walk
+
+    minutes, line, board_number, board_name, alight_number, alight_name = bus
+    wait = (
+        headways.expected_wait_minutes(line, board_number, band)
+        if headways is not None
+        else None
+    )
+    bus_minutes = minutes + (wait or 0.0)
+    if bus_minutes >= walk_minutes:
+        return walk
+    return {
+        "mode": "bus",
+        "minutes": round(bus_minutes, 1),
+        "route_number": line,
+        "board_stop": {"stop_number": board_number, "name": board_name},
+        "alight_stop": {"stop_number": alight_number, "name": alight_name},
+        "expected_wait_minutes": round(wait, 1) if wait is not None else None,
+    }
+
+
+class TravelMatrix:
+    """Lookups of walking and bus legs between the clusters of a travel matrix."""
+
+    def __init__(self, table: Dict[str, np.ndarray]):
+        self.table = table
+        self.rows = {
+            (int(a), int(b)): row
+            for row, (a, b) in enumerate(table["cluster_keys"].tolist())
+        }
+
+    def cluster_rows(self, lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+        """Row of each point's cluster, or -1 when the matrix does not cover it."""
+        return np.array(
+            [self.rows.get(cluster_key(a, b), -1) for a, b in zip(lat, lon)],
+            dtype=np.int64,
+        )
+
+    def bus_leg(self, origin: int, destination: int) -> Optional[int]:
+        """Index of the bus leg between two cluster rows, or None when there is none."""
+        offsets, destinations = (
+            self.table["leg_offsets"],
+            self.table["leg_destinations"],
+        )
+        start, end = offsets[origin], offsets[origin + 1]
+        k = start + int(np.searchsorted(destinations[start:end], destination))
+        if k < end and destinations[k] == destination:
+            return int(k)
+        return None
+
+    def leg(
+        self,
+        origin: int,
+        destination: int,
+        walk_miles: float,
+        headways: Optional[HeadwayTable] = None,
+        band: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        The faster of walking and the bus between two cluster rows.
+
+        Args:
+            origin (int): Cluster row of the origin.
+            destination (int): Cluster row of the destination.
+            walk_miles (float): Walking distance between the two points.
+            headways (Optional[HeadwayTable]): Adds the expected wait to bus legs
+                when given.
+            band (int): Time band of the departure.
+
+        Returns:
+            Dict[str, Any]: The leg's mode, minutes and, for bus legs, its line and
+                stops.
+        """
+        k = self.bus_leg(origin, destination)
+        if k is None:
+            return _faster_leg(walk_miles, None, headways, band)
+        table = self.table
+        board, alight = int(table["board_stops"][k]), int(table["alight_stops"][k])
+        bus = (
+            float(table["bus_minutes"][k]),
+            str(table["line_names"][table["bus_lines"][k]]),
+            str(table["stop_numbers"][board]),
+            str(table["stop_names"][board]),
+            str(table["stop_numbers"][alight]),
+            str(table["stop_names"][alight]),
+        )
+        return _faster_leg(walk_miles, bus, headways, band)
+
+
+class TravelMatrixService:
+    """
+    Loads the travel matrix built by scripts/build_travel_matrix.py and plans
+    legs with it. Only the legs it does not cover (normally the one from the
+    user's start location to the first visit) are routed at request time, in
+    one `best_bus_legs` call.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._matrix: Optional[TravelMatrix] = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def matrix(self) -> Optional[TravelMatrix]:
+        """The precomputed travel matrix, or None if the file is missing."""
+        path = self.path if self.path is not None else get_settings().travel_matrix_path
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._matrix is None or self._signature != signature:
+                self._matrix = TravelMatrix(load_travel_matrix(path))
+                self._signature = signature
+                logger.info(
+                    f"Loaded travel matrix {path} ({len(self._matrix.rows)} clusters)"
+                )
+            return self._matrix
+
+    def legs(
+        self,
+        lat: Sequence[float],
+        lon: Sequence[float],
+        departure_seconds: int = 9 * 3600,
+    ) -> List[Dict]:
+        """
+        Legs between consecutive points, walking or by direct bus.
+
+        Args:
+            lat (Sequence[float]): Latitudes of the points, in visiting order.
+            lon (Sequence[float]): Longitudes of the points, in visiting order.
+            departure_seconds (int): Departure time (seconds after midnight) for
+                expected waits.
+
+        Returns:
+            List[Dict]: One leg per consecutive pair of points.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        matrix = self.matrix()
+        rows = (
+            matrix.cluster_rows(lat, lon)
+            if matrix is not None
+            else np.full(len(lat), -1)
+        )
+        walk_miles = (
+            haversine_meters(lat[:-1], lon[:-1], lat[1:], lon[1:]) / METERS_PER_MILE
+        )
+
+        # Route only the legs the matrix does not cover, within the same leg length
+        settings = get_settings()
+        uncovered = np.flatnonzero(
+            ((rows[:-1] < 0) | (rows[1:] < 0))
+            & (walk_miles <= settings.travel_matrix_max_leg_miles)
+        )
+        routed = {}
+        if len(uncovered):
+            network = get_bus_network()
+            minutes, board, alight = best_bus_legs(
+                network,
+                lat,
+                lon,
+                uncovered,
+                uncovered + 1,
+                settings.travel_matrix_buffer_miles,
+            )
+            for k, leg_minutes, b, a in zip(
+                uncovered.tolist(), minutes.tolist(), board.tolist(), alight.tolist()
+            ):
+                if b >= 0:
+                    routed[k] = (
+                        leg_minutes,
+                        network.line_names[network.stop_line[b]],
+                        str(network.stop_number[b]),
+                        str(network.stop_name[b]),
+                        str(network.stop_number[a]),
+                        str(network.stop_name[a]),
+                    )
+
+        try:
+            headways = headway_service.table()
+        except Exception as e:
+            logger.warning(f"Headway table unavailable: {str(e)}")
+            headways = None
+        band = time_band(departure_seconds)
+
+        legs = []
+        for k in range(len(lat) - 1):
+            if rows[k] >= 0 and rows[k + 1] >= 0:
+                legs.append(
+                    matrix.leg(
+                        rows[k], rows[k + 1], float(walk_miles[k]), headways, band
+                    )
+                )
+            else:
+                legs.append(
+                    _faster_leg(float(walk_miles[k]), routed.get(k), headways, band)
+                )
+        return legs
+
+
+# Shared service instance
+travel_matrix_service = TravelMatrixService()
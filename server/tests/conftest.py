@@ -6,12 +6,17 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker  # For creating database sessions
 from fastapi.testclient import TestClient  # For testing FastAPI applications
 import os  # For environment variable access
+import json  # For writing the test bus lines GeoJSON
+import pandas as pd  # For writing the test stops CSV and GTFS files
 from dotenv import load_dotenv  # For loading environment variables from a .env file
 from yarl import URL as MultiHostUrl  # Utility for building database URLs
 
 from main import app  # The main FastAPI application instance
 from models.base import Base  # Base model for SQLAlchemy
 from config.database import get_db  # Dependency to get the database session
+from services import bus_network as bus_network_module  # Shared bus network service
+from services.bus_network import BusNetworkService  # Bus network loaded from test files
+from services.gtfs_timetable import build_timetable  # Timetable of the test feed
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -127,3 +132,170 @@ def client(async_db):
     # Use FastAPI TestClient for synchronous testing of the FastAPI app
     with TestClient(app) as test_client:
         yield test_client
+
+
+# Bus network and GTFS feed fixtures shared by the routing tests
+
+
+def _write_network(directory, lines):
+    """
+    Write a small bus network to `directory`.
+
+    Each entry of `lines` is (route number, direction, coordinates); a stop is
+    placed on every vertex of the line.
+    """
+    rows, features = [], []
+    stop_number = 100
+    for route_number, direction, coordinates in lines:
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "RouteNumber": route_number,
+                    "RouteName": f"Line {route_number}",
+                    "MetroBusType": "Local",
+                    "MetroCategory": "Bus",
+                },
+                "geometry": {"type": "LineString", "coordinates": coordinates},
+            }
+        )
+        for lon, lat in coordinates:
+            stop_number += 1
+            rows.append(
+                {
+                    "STOPNUM": stop_number,
+                    "LINE": route_number,
+                    "DIR": direction,
+                    "STOPNAME": f"Stop {stop_number}",
+                    "LAT": lat,
+                    "LONG": lon,
+                }
+            )
+
+    stops_path = os.path.join(directory, "bus_stops.csv")
+    lines_path = os.path.join(directory, "bus_lines.geojson")
+    pd.DataFrame(rows).to_csv(stops_path, index=False)
+    with open(lines_path, "w", encoding="utf-8") as geojson_file:
+        json.dump({"type": "FeatureCollection", "features": features}, geojson_file)
+    return stops_path, lines_path
+
+
+def _write_feed(directory):
+    """
+    Write a small GTFS feed to `directory`.
+
+    Line 1 runs east along latitude 34.00 through stops A1..A4; line 2 runs
+    north from B1 (about 45 m from A3) through B2 and B3. Line 3 is a slow
+    direct line from A1 to B3.
+    """
+    stops = pd.DataFrame(
+        [
+            ("A1", "A1", 34.00, -118.30),
+            ("A2", "A2", 34.00, -118.29),
+            ("A3", "A3", 34.00, -118.28),
+            ("A4", "A4", 34.00, -118.27),
+            ("B1", "B1", 34.0004, -118.28),
+            ("B2", "B2", 34.01, -118.28),
+            ("B3", "B3", 34.02, -118.28),
+        ],
+        columns=["stop_id", "stop_name", "stop_lat", "stop_lon"],
+    )
+    routes = pd.DataFrame(
+        [
+            ("R1", "1", "East Line", 3),
+            ("R2", "2", "North Line", 3),
+            ("R3", "3", "Slow Line", 3),
+        ],
+        columns=["route_id", "route_short_name", "route_long_name", "route_type"],
+    )
+
+    trips, stop_times = [], []
+
+    def add_trip(trip_id, route_id, stop_ids, start, step):
+        trips.append((route_id, "WK", trip_id))
+        for sequence, stop_id in enumerate(stop_ids):
+            seconds = start + sequence * step
+            hours, minutes = seconds // 3600, seconds % 3600 // 60
+            time = f"{hours:02d}:{minutes:02d}:{seconds % 60:02d}"
+            stop_times.append((trip_id, time, time, stop_id, sequence + 1))
+
+    for i in range(4):  # Line 1 every 10 minutes from 08:00
+        add_trip(f"T1_{i}", "R1", ["A1", "A2", "A3", "A4"], 8 * 3600 + i * 600, 120)
+    for i in range(4):  # Line 2 every 10 minutes from 08:05
+        add_trip(f"T2_{i}", "R2", ["B1", "B2", "B3"], 8 * 3600 + 300 + i * 600, 120)
+    add_trip("T3_0", "R3", ["A1", "B3"], 8 * 3600, 3600)
+
+    stops.to_csv(os.path.join(directory, "stops.txt"), index=False)
+    routes.to_csv(os.path.join(directory, "routes.txt"), index=False)
+    pd.DataFrame(trips, columns=["route_id", "service_id", "trip_id"]).to_csv(
+        os.path.join(directory, "trips.txt"), index=False
+    )
+    pd.DataFrame(
+        stop_times,
+        columns=[
+            "trip_id",
+            "arrival_time",
+            "departure_time",
+            "stop_id",
+            "stop_sequence",
+        ],
+    ).to_csv(os.path.join(directory, "stop_times.txt"), index=False)
+
+
+@pytest.fixture
+def bus_lines():
+    """
+    Fixture providing the coordinates of the two test bus lines by route number.
+
+    Lines 10 and 20 run north 0.01 degrees (roughly 0.6 miles) apart, from
+    latitude 34.00 to 34.10 with a vertex every 0.01 degrees.
+    """
+    return {
+        "10": [[-118.30, 34.00 + 0.01 * i] for i in range(11)],
+        "20": [[-118.29, 34.00 + 0.01 * i] for i in range(11)],
+    }
+
+
+@pytest.fixture
+def write_network():
+    """
+    Fixture providing a function that writes a small bus network to a directory.
+
+    The function takes (route number, direction, coordinates) entries and
+    returns the paths of the stops CSV and the lines GeoJSON it wrote.
+    """
+    return _write_network
+
+
+@pytest.fixture
+def network_service(tmp_path, monkeypatch, bus_lines):
+    """
+    Fixture providing a BusNetworkService loaded from a two-line test network.
+
+    The service is also installed as the shared instance used by the routing code.
+    """
+    stops_path, lines_path = _write_network(
+        str(tmp_path),
+        [("10", "N", bus_lines["10"]), ("20", "N", bus_lines["20"])],
+    )
+    service = BusNetworkService(stops_path, lines_path)
+    service.load()
+    monkeypatch.setattr(bus_network_module, "bus_network_service", service)
+    return service
+
+
+@pytest.fixture
+def write_feed():
+    """
+    Fixture providing a function that writes the small test GTFS feed to a directory.
+    """
+    return _write_feed
+
+
+@pytest.fixture
+def timetable(tmp_path):
+    """
+    Fixture providing a timetable built from the test feed.
+    """
+    _write_feed(str(tmp_path))
+    return build_timetable([str(tmp_path)])
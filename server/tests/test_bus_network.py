@@ -0,0 +1,468 @@
+# server/tests/test_bus_network.py
+
+import json  # For writing the test GeoJSON file
+import os  # For bumping file modification times
+
+import numpy as np  # For building test line coordinates
+import pandas as pd  # For writing the test stops CSV
+import pytest  # For defining and running tests
+from shapely.geometry import LineString, Point  # Reference geometries
+from shapely.ops import substring  # Reference implementation of trimming
+
+from services import bus_network as bus_network_module
+from services import nearest_bustops
+from services.bus_network import (
+    BusNetworkService,
+    StopMatch,
+    cumulative_distances,
+    load_bus_network,
+    slice_line,
+    tolerance_for_zoom,
+)
+from services.gtfs_timetable import build_timetable
+from services.headways import HeadwayTable
+
+
+def test_nearby_stops(network_service):
+    """
+    Test that nearby_stops returns exactly the stops within the radius.
+    """
+    network = network_service.network
+    stops = network.nearby_stops(34.05, -118.30, 0.1)
+
+    # Only the stop of line 10 at the query point is within 0.1 miles
+    assert [stop.LINE for stop in stops] == ["10"]
+    assert stops[0].distance == pytest.approx(0.0, abs=1e-6)
+
+
+def test_stations(tmp_path, write_network, bus_lines):
+    """
+    Test that nearby bays and parent stations are grouped and searched as stations.
+
+    Workflow:
+        1. Add a second bay of line 20 ~10 m from a line 10 stop, and give two
+           far apart stops the same PARENT_STATION.
+        2. Assert each pair forms one station and the station search returns
+           the same stops as the exhaustive search.
+    """
+    stops_path, lines_path = write_network(
+        str(tmp_path), [("10", "N", bus_lines["10"]), ("20", "N", bus_lines["20"])]
+    )
+    stops = pd.read_csv(stops_path, dtype=str)
+    bay = stops.iloc[[5]].assign(STOPNUM="900", LINE="20", LAT="34.0501")
+    stops = pd.concat([stops, bay], ignore_index=True)
+    stops["PARENT_STATION"] = ""
+    stops.loc[[0, 11], "PARENT_STATION"] = "P1"
+    stops.to_csv(stops_path, index=False)
+    network = bus_network_module.load_bus_network(stops_path, lines_path)
+
+    assert network.stop_station[5] == network.stop_station[len(stops) - 1]
+    assert network.stop_station[0] == network.stop_station[11]
+    assert len(network.station_lat) == len(stops) - 2
+    # Each station has its own radius; lone stops have none
+    assert network.station_radius_miles[network.stop_station[0]] > 0.1
+    assert network.station_radius_miles[network.stop_station[5]] < 0.01
+    assert network.station_radius_miles[network.stop_station[3]] == 0
+
+    for lat, lon in [(34.05, -118.295), (34.0, -118.295), (34.003, -118.30)]:
+        found = network.nearest_stop_per_direction(lat, lon, 0.5)
+        expected = nearest_bustops._nearest_stop_per_direction(
+            network.nearby_stops(lat, lon, 0.5)
+        )
+        assert sorted(stop.index for stop in found) == sorted(
+            stop.index for stop in expected.values()
+        )
+
+
+def test_find_direct_bus_lines(network_service):
+    """
+    Test that a direct route is found along a single line.
+
+    Workflow:
+        1. Query a trip that starts and ends on line 10.
+        2. Assert the route uses line 10 and its geometry runs between the two stops.
+    """
+    result = nearest_bustops.find_direct_bus_lines(34.01, -118.30, 34.08, -118.30, 0.2)
+
+    assert result["status"] == "success"
+    route = result["data"]
+    assert route["route_number"] == "10"
+    assert route["geometry"][0][1] == pytest.approx(34.01)
+    assert route["geometry"][-1][1] == pytest.approx(34.08)
+
+
+def test_route_travel_time(network_service, tmp_path, monkeypatch, bus_lines):
+    """
+    Test the in-vehicle distance and the estimated and scheduled travel times.
+
+    Workflow:
+        1. Query a 0.07 degree (~4.8 mile) ride on line 10 without a timetable.
+        2. Assert the ride distance and the speed-based estimate.
+        3. Add a GTFS timetable running line 10 at 3 minutes per stop and
+           assert the scheduled running time (7 stops, 21 minutes) is used.
+    """
+    monkeypatch.setattr(nearest_bustops, "get_timetable", lambda: None)
+    route = nearest_bustops.find_direct_bus_lines(34.01, -118.30, 34.08, -118.30, 0.2)[
+        "data"
+    ]
+
+    assert route["in_vehicle_distance"] == pytest.approx(4.836, abs=0.01)
+    assert route["in_vehicle_minutes"] == pytest.approx(
+        route["in_vehicle_distance"] / nearest_bustops.AVERAGE_BUS_SPEED_MPH * 60,
+        abs=0.1,
+    )
+    assert route["schedule_based"] is False
+
+    # Stops 101-111 of line 10 become GTFS stops served every 180 seconds
+    stop_ids = [str(101 + i) for i in range(11)]
+    pd.DataFrame(
+        {
+            "stop_id": stop_ids,
+            "stop_name": stop_ids,
+            "stop_lat": [lat for _, lat in bus_lines["10"]],
+            "stop_lon": [lon for lon, _ in bus_lines["10"]],
+        }
+    ).to_csv(tmp_path / "stops.txt", index=False)
+    pd.DataFrame(
+        {
+            "route_id": ["R10"],
+            "route_short_name": ["10"],
+            "route_long_name": ["Line 10"],
+            "route_type": [3],
+        }
+    ).to_csv(tmp_path / "routes.txt", index=False)
+    pd.DataFrame({"route_id": ["R10"], "service_id": ["WK"], "trip_id": ["T1"]}).to_csv(
+        tmp_path / "trips.txt", index=False
+    )
+    times = [f"08:{3 * i:02d}:00" for i in range(11)]
+    pd.DataFrame(
+        {
+            "trip_id": "T1",
+            "arrival_time": times,
+            "departure_time": times,
+            "stop_id": stop_ids,
+            "stop_sequence": range(1, 12),
+        }
+    ).to_csv(tmp_path / "stop_times.txt", index=False)
+    timetable = build_timetable([str(tmp_path)])
+    monkeypatch.setattr(nearest_bustops, "get_timetable", lambda: timetable)
+    nearest_bustops.route_cache.clear()
+
+    route = nearest_bustops.find_direct_bus_lines(34.01, -118.30, 34.08, -118.30, 0.2)[
+        "data"
+    ]
+
+    assert route["schedule_based"] is True
+    assert route["in_vehicle_minutes"] == pytest.approx(21.0)
+    assert route["travel_minutes"] == pytest.approx(21.0, abs=0.01)
+
+
+def test_schedule_failures_logged_once(network_service, monkeypatch, caplog):
+    """
+    Test that an unavailable timetable is reported once, not on every request.
+    """
+
+    def broken_timetable():
+        raise OSError("store unreadable")
+
+    monkeypatch.setattr(nearest_bustops, "get_timetable", broken_timetable)
+    monkeypatch.setattr(nearest_bustops, "_reported_failures", set())
+    for _ in range(3):
+        assert nearest_bustops._current_timetable() is None
+    assert [record.getMessage() for record in caplog.records].count(
+        "GTFS timetable unavailable, routing without it: store unreadable"
+    ) == 1
+
+
+def test_headway_aware_ranking(network_service, monkeypatch):
+    """
+    Test that an infrequent line ranks below a frequent one a short walk further.
+    """
+    headways = HeadwayTable(
+        {
+            "route_names": np.array(["10", "20"]),
+            "stop_ids": np.array(["102", "113"]),
+            # Hourly vs every 5 minutes
+            "headways": np.array([[3600.0] * 6, [300.0] * 6]),
+        }
+    )
+    # Closer to line 10, but within the buffer of both lines
+    query = (34.01, -118.297, 34.08, -118.297, 0.5)
+
+    monkeypatch.setattr(nearest_bustops, "_current_headways", lambda: None)
+    assert nearest_bustops.find_direct_bus_lines(*query)["data"]["route_number"] == "10"
+
+    monkeypatch.setattr(nearest_bustops, "_current_headways", lambda: headways)
+    route = nearest_bustops.find_direct_bus_lines(*query, departure_seconds=8 * 3600)[
+        "data"
+    ]
+
+    assert route["route_number"] == "20"
+    assert route["expected_wait_minutes"] == pytest.approx(2.5)
+
+
+def test_no_direct_route(network_service):
+    """
+    Test that no route is returned when the endpoints are not served by a common line.
+    """
+    result = nearest_bustops.find_direct_bus_lines(34.01, -118.30, 34.08, -118.29, 0.1)
+
+    assert result["status"] == "error"
+
+
+def test_direction_aware_matching(tmp_path, monkeypatch, write_network, bus_lines):
+    """
+    Test that stop pairs are only matched in the direction of travel.
+
+    Workflow:
+        1. Build line 10 with northbound stops on the line and southbound stops
+           ~30 m east of it; the geometry is drawn northwards.
+        2. Assert a northward trip boards a northbound stop and a southward trip
+           a southbound one, even though the other direction's stops are closer.
+        3. Assert a northward trip on northbound-only line 20 finds no southward route.
+    """
+    southbound = [[-118.2997, 34.10 - 0.01 * i] for i in range(11)]
+    northbound_only = [[-118.29, 34.00 + 0.01 * i] for i in range(11)]
+    stops_path, lines_path = write_network(
+        str(tmp_path),
+        [
+            ("10", "N", bus_lines["10"]),
+            ("10", "S", southbound),
+            ("20", "N", northbound_only),
+        ],
+    )
+    service = BusNetworkService(stops_path, lines_path)
+    service.load()
+    monkeypatch.setattr(bus_network_module, "bus_network_service", service)
+
+    # Closer to the southbound stops at both ends
+    north = nearest_bustops.find_direct_bus_lines(
+        34.01, -118.2998, 34.08, -118.2998, 0.2
+    )
+    south = nearest_bustops.find_direct_bus_lines(
+        34.08, -118.3001, 34.01, -118.3001, 0.2
+    )
+
+    assert north["data"]["direction"] == "N"
+    assert north["data"]["geometry"][0][1] < north["data"]["geometry"][-1][1]
+    assert south["data"]["direction"] == "S"
+    assert south["data"]["geometry"][0][1] > south["data"]["geometry"][-1][1]
+    assert (
+        nearest_bustops.find_direct_bus_lines(34.08, -118.29, 34.01, -118.29, 0.1)[
+            "status"
+        ]
+        == "error"
+    )
+
+
+def test_vectorised_scoring(tmp_path, write_network, bus_lines):
+    """
+    Test that `score_variants` agrees with the per-candidate offsets and order checks.
+    """
+    southbound = [[-118.2997, 34.10 - 0.01 * i] for i in range(11)]
+    stops_path, lines_path = write_network(
+        str(tmp_path), [("10", "N", bus_lines["10"]), ("10", "S", southbound)]
+    )
+    network = load_bus_network(stops_path, lines_path)
+
+    triples = [
+        (variant["id"], a, b)
+        for variant in network.variants
+        for a in variant["stop_ids"].tolist()
+        for b in variant["stop_ids"].tolist()
+        if a != b
+    ]
+    variant_ids, from_stops, to_stops = (np.array(column) for column in zip(*triples))
+    offsets, in_order = network.score_variants(variant_ids, from_stops, to_stops)
+
+    assert in_order.any() and not in_order.all()
+    for (v, a, b), offset, ordered in zip(triples, offsets, in_order):
+        assert offset == pytest.approx(
+            network.stop_offset(v, a) + network.stop_offset(v, b)
+        )
+        assert ordered == network.serves_in_order(v, a, b)
+
+
+def test_reload_if_changed(network_service, tmp_path, write_network, bus_lines):
+    """
+    Test that the service reloads only when the source files change.
+    """
+    assert network_service.reload_if_changed() is False
+
+    write_network(str(tmp_path), [("30", "N", bus_lines["10"])])
+    stat = os.stat(network_service.stops_path)
+    os.utime(
+        network_service.stops_path,
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000),
+    )
+
+    assert network_service.reload_if_changed() is True
+    assert network_service.network.line_names == ["30"]
+
+
+def test_slice_line_matches_substring():
+    """
+    Test that the array-based slice_line matches shapely's substring.
+    """
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        coords = np.cumsum(rng.random((20, 2)) - 0.3, axis=0)
+        line = LineString(coords)
+        start, end = sorted(rng.random(2) * line.length)
+
+        expected = np.array(substring(line, start, end).coords)
+        actual = np.array(slice_line(coords, cumulative_distances(coords), start, end))
+
+        assert actual.shape == expected.shape
+        assert np.allclose(actual, expected)
+
+
+def test_direct_bus_od_matrix(network_service):
+    """
+    Test the OD matrix against single-pair direct route queries.
+    """
+    origins = [(34.01, -118.30), (34.01, -118.29), (34.01, -118.20)]
+    destinations = [(34.08, -118.30), (34.09, -118.29)]
+    matrix = nearest_bustops.direct_bus_od_matrix(origins, destinations, 0.2)
+
+    assert matrix["route_numbers"] == [["10", None], [None, "20"], [None, None]]
+    for i, (lat1, lon1) in enumerate(origins):
+        for j, (lat2, lon2) in enumerate(destinations):
+            single = nearest_bustops.find_direct_bus_lines(lat1, lon1, lat2, lon2, 0.2)
+            if single["status"] == "success":
+                route = single["data"]
+                walk = route["origin"]["distance"] + route["destination"]["distance"]
+                assert matrix["route_numbers"][i][j] == route["route_number"]
+                assert matrix["walking_distance"][i][j] == pytest.approx(walk, abs=1e-3)
+            else:
+                assert matrix["walking_distance"][i][j] is None
+
+
+def test_simplified_trim(tmp_path, monkeypatch, write_network):
+    """
+    Test that simplified geometries keep their endpoints and drop vertices.
+    """
+    # A dense, slightly wiggly northbound line
+    wiggly = [[-118.30 + 0.00002 * (i % 2), 34.00 + 0.0001 * i] for i in range(1001)]
+    stops_path, lines_path = write_network(str(tmp_path), [("10", "N", wiggly[::100])])
+    with open(lines_path, "w", encoding="utf-8") as geojson_file:
+        json.dump(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {"RouteNumber": "10"},
+                        "geometry": {"type": "LineString", "coordinates": wiggly},
+                    }
+                ],
+            },
+            geojson_file,
+        )
+    service = BusNetworkService(stops_path, lines_path)
+    service.load()
+    monkeypatch.setattr(bus_network_module, "bus_network_service", service)
+
+    full = nearest_bustops.find_direct_bus_lines(34.01, -118.30, 34.09, -118.30, 0.1)[
+        "data"
+    ]
+    overview = nearest_bustops.find_direct_bus_lines(
+        34.01, -118.30, 34.09, -118.30, 0.1, tolerance_for_zoom(10)
+    )["data"]
+
+    assert len(full["geometry"]) > 700
+    assert len(overview["geometry"]) == 2
+    assert overview["geometry"][0] == full["geometry"][0]
+    assert overview["geometry"][-1] == full["geometry"][-1]
+
+
+def test_top_k_routes(network_service):
+    """
+    Test that alternatives come from distinct lines and are ranked by distance.
+    """
+    result = nearest_bustops.find_direct_bus_lines(
+        34.01, -118.298, 34.08, -118.298, 0.5, top_k=3
+    )
+
+    routes = [result["data"]] + result["alternatives"]
+    assert [route["route_number"] for route in routes] == ["10", "20"]
+    assert routes[0]["total_distance"] <= routes[1]["total_distance"]
+
+
+def test_stop_pairing_matches_nested_loop():
+    """
+    Test that the hash join pairs the same stops as a nested loop over both sides.
+
+    Workflow:
+        1. Draw random user and target stops over a few lines and directions.
+        2. Pair them with a nested loop, keeping the shortest walk per line direction.
+        3. Assert the hash join keeps the same line directions and stop pairs.
+    """
+    rng = np.random.default_rng(0)
+
+    def random_stops(count):
+        return [
+            StopMatch(
+                i,
+                f"S{i}",
+                str(rng.integers(5)),
+                "NS"[rng.integers(2)],
+                f"Stop {i}",
+                34.0,
+                -118.3,
+                float(rng.random()),
+            )
+            for i in range(count)
+        ]
+
+    for _ in range(50):
+        user_stops, target_stops = random_stops(12), random_stops(12)
+
+        expected = {}
+        for user_stop in user_stops:
+            for target_stop in target_stops:
+                key = (user_stop.LINE, user_stop.DIR)
+                if key != (target_stop.LINE, target_stop.DIR):
+                    continue
+                walking = user_stop.distance + target_stop.distance
+                if key not in expected or walking < expected[key][0]:
+                    expected[key] = (walking, user_stop, target_stop)
+
+        user_by_key = nearest_bustops._nearest_stop_per_direction(user_stops)
+        target_by_key = nearest_bustops._nearest_stop_per_direction(target_stops)
+        keys = user_by_key.keys() & target_by_key.keys()
+
+        assert keys == expected.keys()
+        for key in keys:
+            assert (user_by_key[key], target_by_key[key]) == expected[key][1:]
+
+
+def test_variants_near_matches_brute_force(tmp_path, write_network, bus_lines):
+    """
+    Test that the STRtree variant lookup matches a distance check on every variant.
+    """
+    diagonal = [[-118.31 + 0.004 * i, 34.00 + 0.01 * i] for i in range(11)]
+    stops_path, lines_path = write_network(
+        str(tmp_path),
+        [
+            ("10", "N", bus_lines["10"]),
+            ("20", "N", bus_lines["20"]),
+            ("30", "N", diagonal),
+        ],
+    )
+    network = load_bus_network(stops_path, lines_path)
+
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(-118.32, -118.26, 200)
+    lats = rng.uniform(33.99, 34.11, 200)
+    for max_distance in (0.001, 0.003, 0.01):
+        nearby = network.variants_near(lons, lats, max_distance)
+        for lon, lat, variants in zip(lons, lats, nearby):
+            point = Point(lon, lat)
+            expected = {
+                v
+                for v, line in enumerate(network.variant_lines)
+                if line.distance(point) <= max_distance
+            }
+            assert variants == expected
+        assert any(nearby) and not all(nearby)
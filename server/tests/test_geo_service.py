@@ -0,0 +1,74 @@
+# server/tests/test_geo_service.py
+
+import pytest  # For defining and running tests
+
+from models.place_rating import PlaceRating  # Precomputed per-place review aggregates
+from schemas.place import Place  # Place schema returned by nearest_places
+
+# geo_service imports the Spark-backed place services
+geo_service = pytest.importorskip("services.geo_service")
+
+
+class _Result:
+    """Stand-in for an executed query returning (PlaceRating, name) rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class _Session:
+    """Stand-in for the database session of the attraction plan."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, query):
+        return _Result(self.rows)
+
+
+async def test_visit_plan_ratings(monkeypatch):
+    """
+    Test that each visit of an attraction plan carries its own place's rating.
+
+    Workflow:
+        1. Return three nearby places, two of them rated, one with a mock id
+           that collides with a rated place under another name.
+        2. Assert the rated places report their average rating and review
+           count, and the mock place none.
+    """
+    places = [
+        Place(id=1, name="Museum", latitude=34.01, longitude=-118.30,
+              address="1 Main St", distance=0.7),
+        Place(id=2, name="Garden", latitude=34.02, longitude=-118.30,
+              address="2 Main St", distance=1.4),
+        Place(id=1, name="Sample Pier", latitude=34.00, longitude=-118.29,
+              address="3 Main St", distance=0.6),
+    ]
+
+    async def fake_nearest_places(db, lat, long):
+        return list(places)
+
+    monkeypatch.setattr(geo_service, "nearest_places", fake_nearest_places)
+    monkeypatch.setattr(
+        geo_service.travel_matrix_service,
+        "legs",
+        lambda lat, lon, departure_seconds: [{"minutes": 5.0}] * (len(lat) - 1),
+    )
+    rows = [
+        (PlaceRating(place_id=1, review_count=4, rating_sum=18), "Museum"),
+        (PlaceRating(place_id=2, review_count=2, rating_sum=6), "Garden"),
+    ]
+
+    plan = await geo_service.create_attraction_visit_plan(
+        _Session(rows), 34.0, -118.30, max_places=3)
+
+    visits = {visit["place"]["name"]: visit["place"] for visit in plan["itinerary"]}
+    assert visits["Museum"]["average_rating"] == pytest.approx(4.5)
+    assert visits["Museum"]["review_count"] == 4
+    assert visits["Garden"]["average_rating"] == pytest.approx(3.0)
+    assert visits["Garden"]["review_count"] == 2
+    assert visits["Sample Pier"]["average_rating"] is None
+    assert visits["Sample Pier"]["review_count"] == 0
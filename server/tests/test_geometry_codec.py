@@ -0,0 +1,64 @@
+# server/tests/test_geometry_codec.py
+
+import base64  # For decoding base64 geometries
+
+import numpy as np  # For building test lines
+
+from services.geometry_codec import (
+    decode_binary,
+    decode_polyline,
+    encode_binary,
+    encode_geometry,
+    encode_polyline,
+)
+
+
+def test_polyline_reference_example():
+    """
+    Test the encoder against the example from Google's polyline documentation.
+    """
+    coords = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+
+    assert encode_polyline(coords) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert np.allclose(decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@"), coords)
+
+
+def test_empty_geometries():
+    """
+    Test that empty encodings decode to no coordinates and round-trip.
+    """
+    assert decode_polyline("") == []
+    assert encode_polyline([]) == ""
+    assert decode_binary(b"") == []
+    assert decode_binary(encode_binary([[]])) == [[]]
+
+
+def test_binary_round_trip():
+    """
+    Test that the binary format round-trips several lines at its precision.
+    """
+    rng = np.random.default_rng(0)
+    line = np.c_[
+        -118.3 + np.cumsum(rng.normal(0, 1e-3, 500)),
+        34.0 + np.cumsum(rng.normal(0, 1e-3, 500)),
+    ]
+
+    decoded = decode_binary(encode_binary([line, line[:2]]))
+
+    assert [len(d) for d in decoded] == [500, 2]
+    assert np.allclose(decoded[0], line, atol=1e-6)
+
+
+def test_encoded_geometry_is_smaller_than_json():
+    """
+    Test that the encoded formats are smaller than the JSON coordinate list.
+    """
+    line = [[-118.25 + 0.0001 * i, 34.05 + 0.00005 * i] for i in range(1000)]
+    json_size = len(str(line))
+
+    polyline = encode_geometry(line, "polyline")
+    binary = encode_geometry(line, "base64")
+
+    assert len(polyline) < json_size / 5
+    assert len(binary) < json_size / 5
+    assert np.allclose(decode_binary(base64.b64decode(binary))[0], line)
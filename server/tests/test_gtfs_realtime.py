@@ -0,0 +1,110 @@
+# server/tests/test_gtfs_realtime.py
+
+import os  # For building feed file paths
+from datetime import datetime  # For realtime event times
+from zoneinfo import ZoneInfo  # For local realtime event times
+
+import pytest  # For defining and running tests
+
+from services.gtfs_realtime import (
+    DelayTable,
+    RealtimeIngester,
+    StopTimeEvent,
+    apply_realtime_delays,
+)
+from services.raptor import plan_transit_journey
+
+
+def test_realtime_delays(timetable):
+    """
+    Test that trip updates propagate downstream and reach the journey legs.
+
+    Workflow:
+        1. Delay T1_0 by 2 minutes from A2, and by 3 minutes from A4.
+        2. Assert earlier stops keep no delay and an older update is ignored.
+        3. Assert the journey's line 1 leg alights at A3 two minutes late.
+    """
+    delays = DelayTable(timetable)
+    assert delays.apply_trip_update("T1_0", [("A2", 120), ("A4", 180)], timestamp=100)
+    assert [delays.delay("T1_0", stop) for stop in ("A1", "A2", "A3", "A4")] == [
+        0,
+        120,
+        120,
+        180,
+    ]
+    assert delays.delay("T1_1", "A3") == 0
+    assert delays.delay("T1_0", "B1") is None
+    assert not delays.apply_trip_update("T1_0", [("A1", 600)], timestamp=50)
+    assert not delays.apply_trip_update("unknown", [("A1", 60)])
+
+    # Time-only events are measured against the schedule, with or without a start date
+    late = int(
+        datetime(2026, 3, 10, 8, 5, tzinfo=ZoneInfo("America/Los_Angeles")).timestamp()
+    )
+    assert delays.apply_trip_update(
+        "T1_1", [StopTimeEvent("A2", None, late + 600)], 100, "20260310"
+    )
+    assert delays.delay("T1_1", "A2") == 180
+    assert delays.apply_trip_update(
+        "T1_2", [StopTimeEvent("A2", None, late + 1200)], 100
+    )
+    assert delays.delay("T1_2", "A2") == 180
+
+    journey = plan_transit_journey(timetable, 34.00, -118.30, 34.02, -118.28, 8 * 3600)
+    journey = apply_realtime_delays(journey, delays)
+    first_ride = next(leg for leg in journey["legs"] if leg["mode"] == "transit")
+    assert first_ride["from"]["delay_minutes"] == 0
+    assert first_ride["to"]["delay_minutes"] == 2
+    assert first_ride["to"]["expected_time"] == "08:06"
+
+
+def test_realtime_time_only_events(timetable, tmp_path):
+    """
+    Test that a feed reporting only absolute stop times is ingested as delays, not 0.
+    """
+    gtfs_realtime_pb2 = pytest.importorskip("google.transit.gtfs_realtime_pb2")
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = 100
+    update = feed.entity.add(id="1").trip_update
+    update.trip.trip_id = "T1_0"
+    update.trip.start_date = "20260310"
+    stop_update = update.stop_time_update.add(stop_id="A2")
+    stop_update.arrival.time = int(
+        datetime(2026, 3, 10, 8, 5, tzinfo=ZoneInfo("America/Los_Angeles")).timestamp()
+    )
+    with open(os.path.join(str(tmp_path), "trip_updates.pb"), "wb") as feed_file:
+        feed_file.write(feed.SerializeToString())
+
+    ingester = RealtimeIngester(str(tmp_path))
+    ingester._table = DelayTable(timetable)
+    ingester.table = lambda: ingester._table
+    assert ingester.poll() == 1
+    assert ingester._table.delay("T1_0", "A2") == 180
+
+
+def test_poll_rereads_file_after_timetable_swap(timetable, tmp_path):
+    """
+    Test that a file ingested into a table swapped out mid-poll is read again.
+    """
+    path = os.path.join(str(tmp_path), "trip_updates.pb")
+    with open(path, "wb") as feed_file:
+        feed_file.write(b"")
+
+    ingester = RealtimeIngester(str(tmp_path))
+    ingester._table = DelayTable(timetable)
+    ingester.table = lambda: ingester._table
+    ingested_into = []
+
+    def swap_table(path, name, table):
+        ingested_into.append(table)
+        ingester._table = DelayTable(timetable)
+
+    ingester._ingest_file = swap_table
+    assert ingester.poll() == 1
+    assert path not in ingester._seen
+
+    ingester._ingest_file = lambda path, name, table: ingested_into.append(table)
+    assert ingester.poll() == 1
+    assert ingested_into[1] is ingester._table
+    assert ingester.poll() == 0
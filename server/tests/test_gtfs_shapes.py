@@ -0,0 +1,75 @@
+# server/tests/test_gtfs_shapes.py
+
+import json  # For writing the test GeoJSON file
+
+import pandas as pd  # For writing the test GTFS files
+import pytest  # For defining and running tests
+
+from services import bus_network as bus_network_module
+from services import nearest_bustops
+from services.bus_network import BusNetworkService
+from services.gtfs_shapes import build_shape_arrays, save_shape_store
+
+
+def test_gtfs_shape_store(tmp_path, monkeypatch, write_network, bus_lines):
+    """
+    Test that route geometries come from the GTFS shape store, not the GeoJSON.
+
+    Workflow:
+        1. Write a GTFS feed whose only shape follows line 10 and a GeoJSON
+           that only has line 20.
+        2. Build the shape store and load the network with it.
+        3. Assert the network routes along the shape, with its stored distances.
+    """
+    stops_path, lines_path = write_network(
+        str(tmp_path), [("10", "N", bus_lines["10"]), ("20", "N", bus_lines["20"])]
+    )
+    with open(lines_path, "w", encoding="utf-8") as geojson_file:
+        json.dump({"type": "FeatureCollection", "features": []}, geojson_file)
+
+    feed_dir = tmp_path / "gtfs"
+    feed_dir.mkdir()
+    pd.DataFrame(
+        {
+            "route_id": ["10-1", "20-1"],
+            "route_short_name": ["10", "20"],
+            "route_long_name": ["Line 10", "Line 20"],
+            "route_type": ["3", "3"],
+        }
+    ).to_csv(feed_dir / "routes.txt", index=False)
+    pd.DataFrame(
+        {
+            "route_id": ["10-1", "10-1", "20-1"],
+            "trip_id": ["t1", "t2", "t3"],
+            "shape_id": ["s10", "s10", None],
+        }
+    ).to_csv(feed_dir / "trips.txt", index=False)
+    # Points listed out of order to exercise the shape_pt_sequence sort
+    shape_points = list(enumerate(bus_lines["10"]))[::-1]
+    pd.DataFrame(
+        {
+            "shape_id": "s10",
+            "shape_pt_lat": [lat for _, (lon, lat) in shape_points],
+            "shape_pt_lon": [lon for _, (lon, lat) in shape_points],
+            "shape_pt_sequence": [i for i, _ in shape_points],
+        }
+    ).to_csv(feed_dir / "shapes.txt", index=False)
+
+    store_dir = str(tmp_path / "shapes")
+    arrays = build_shape_arrays([str(feed_dir)])
+    save_shape_store(arrays, store_dir, [str(feed_dir)])
+    assert list(arrays["shape_ids"]) == ["s10"]
+    assert arrays["cumdist"][-1] == pytest.approx(0.1)
+
+    service = BusNetworkService(stops_path, lines_path, store_dir)
+    service.load()
+    monkeypatch.setattr(bus_network_module, "bus_network_service", service)
+
+    assert list(service.network.route_lookup) == ["10"]
+    route = nearest_bustops.find_direct_bus_lines(34.01, -118.30, 34.08, -118.30, 0.2)[
+        "data"
+    ]
+    assert route["route_name"] == "Line 10"
+    assert route["category"] == "Bus"
+    assert route["geometry"][0][1] == pytest.approx(34.01)
+    assert route["geometry"][-1][1] == pytest.approx(34.08)
@@ -0,0 +1,78 @@
+# server/tests/test_gtfs_timetable.py
+
+import os  # For building store paths
+from datetime import date  # For service days
+
+import numpy as np  # For comparing timetable arrays
+import pytest  # For defining and running tests
+
+from services.gtfs_timetable import (
+    Timetable,
+    TimetableService,
+    build_timetable_arrays,
+    clock_seconds,
+    load_timetable_store,
+    save_timetable_store,
+)
+from services.raptor import plan_transit_journey
+
+
+def test_clock_seconds():
+    """
+    Test that "HH:MM" departure times are parsed and malformed ones rejected.
+    """
+    assert clock_seconds("9:05") == 9 * 3600 + 5 * 60
+    assert clock_seconds("23:59") == 23 * 3600 + 59 * 60
+    assert 0 <= clock_seconds() < 24 * 3600
+    for malformed in ("abc", "24:00", "9:5", "09:30:00"):
+        with pytest.raises(ValueError):
+            clock_seconds(malformed)
+
+
+def test_timetable_store_round_trip(timetable, tmp_path):
+    """
+    Test that the memory-mapped store routes exactly like the in-memory timetable.
+    """
+    feed_dir = str(tmp_path)
+    store_dir = os.path.join(feed_dir, "store")
+    save_timetable_store(build_timetable_arrays([feed_dir]), store_dir)
+
+    stored = load_timetable_store(store_dir)
+    assert isinstance(stored.arrivals, np.memmap)
+    for name in Timetable.FIELDS:
+        assert np.array_equal(getattr(stored, name), getattr(timetable, name))
+
+    expected = plan_transit_journey(timetable, 34.00, -118.30, 34.02, -118.28, 8 * 3600)
+    assert (
+        plan_transit_journey(stored, 34.00, -118.30, 34.02, -118.28, 8 * 3600)
+        == expected
+    )
+
+
+def test_timetable_service_uses_store_only(timetable, tmp_path):
+    """
+    Test that the service serves the store, even for another day, and never builds.
+
+    Workflow:
+        1. Assert the service has no timetable while the store is missing,
+           although the feed is on disk.
+        2. Build a store for a past service day and assert it is served.
+        3. Replace the store and assert the service reloads it.
+    """
+    feed_dir = str(tmp_path)
+    store_dir = os.path.join(feed_dir, "store")
+    service = TimetableService(store_dir)
+    assert service.timetable is None
+
+    save_timetable_store(
+        build_timetable_arrays([feed_dir]), store_dir, date(2020, 1, 1), [feed_dir]
+    )
+    stale = service.timetable
+    assert stale is not None and np.array_equal(stale.arrivals, timetable.arrivals)
+    assert service.timetable is stale
+
+    save_timetable_store(
+        build_timetable_arrays([feed_dir]), store_dir, None, [feed_dir]
+    )
+    os.utime(os.path.join(store_dir, "metadata.json"), ns=(0, 0))
+    assert service.timetable is not stale
@@ -0,0 +1,80 @@
+# server/tests/test_headways.py
+
+import os  # For building table paths
+
+import pytest  # For defining and running tests
+
+from services.gtfs_timetable import build_timetable
+from services.headways import (
+    HeadwayService,
+    HeadwayTable,
+    build_headway_table,
+    save_headway_table,
+    time_band,
+)
+
+
+def test_headway_table(timetable):
+    """
+    Test the departures per time band and the expected wait derived from them.
+    """
+    headways = HeadwayTable(build_headway_table(timetable))
+    am_peak = time_band(8 * 3600)
+
+    # Line 1 leaves A1 four times in the three-hour AM peak: one bus per 45 minutes
+    assert headways.expected_wait_minutes("1", "A1", am_peak) == pytest.approx(22.5)
+    # The line does not run in the evening, and line 2 does not serve A1
+    assert headways.expected_wait_minutes("1", "A1", time_band(20 * 3600)) == 60.0
+    assert headways.expected_wait_minutes("2", "A1", am_peak) is None
+
+
+def test_headway_after_midnight(tmp_path, write_feed):
+    """
+    Test that departures after 24:00 count in the band of their clock time.
+
+    Workflow:
+        1. Add four line 3 trips from A1 between 24:30 and 26:00.
+        2. Assert a query at 01:00 sees them (one bus per 90 minutes in the
+           six-hour early band).
+    """
+    feed_dir = str(tmp_path)
+    write_feed(feed_dir)
+    with open(os.path.join(feed_dir, "trips.txt"), "a") as trips_file:
+        trips_file.writelines(f"R3,WK,T3_L{i}\n" for i in range(4))
+    with open(os.path.join(feed_dir, "stop_times.txt"), "a") as stop_times_file:
+        for i in range(4):
+            start = 24 * 3600 + 1800 + i * 1800
+            for sequence, (stop_id, seconds) in enumerate(
+                [("A1", start), ("B3", start + 600)]
+            ):
+                time = f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:00"
+                stop_times_file.write(
+                    f"T3_L{i},{time},{time},{stop_id},{sequence + 1}\n"
+                )
+
+    headways = HeadwayTable(build_headway_table(build_timetable([feed_dir])))
+    assert headways.expected_wait_minutes("3", "A1", time_band(3600)) == pytest.approx(
+        45.0
+    )
+
+
+def test_headway_service_reloads(timetable, tmp_path):
+    """
+    Test that the service only loads the built file, and reloads it when it changes.
+    """
+    path = os.path.join(str(tmp_path), "headways.npz")
+    service = HeadwayService(path)
+    assert service.table() is None
+
+    table = build_headway_table(timetable)
+    save_headway_table(table, path)
+    first = service.table()
+    assert first is not None and service.table() is first
+
+    table["headways"] = table["headways"] / 2
+    save_headway_table(table, path)
+    os.utime(path, ns=(0, 0))
+    assert service.table() is not first
+    assert service.table().expected_wait_minutes(
+        "1", "A1", time_band(8 * 3600)
+    ) == pytest.approx(11.25)
@@ -0,0 +1,33 @@
+# server/tests/test_isochrone.py
+
+import numpy as np  # For locating test stops
+from shapely.geometry import shape  # For measuring the reachable area
+
+from services import isochrone
+
+
+def test_transit_isochrone(network_service):
+    """
+    Test that the isochrone grows with the budget, follows the bus line and is cached.
+    """
+    small = isochrone.transit_isochrone(34.0, -118.30, 10)
+    large = isochrone.transit_isochrone(34.0, -118.30, 30)
+
+    assert shape(large["geometry"]).area > shape(small["geometry"]).area
+    # Riding line 10 north reaches well beyond walking distance
+    assert shape(large["geometry"]).bounds[3] > 34.05
+    assert "10" in large["properties"]["reachable_lines"]
+    # Nearby origins share the cached result of their cell
+    assert isochrone.transit_isochrone(34.0001, -118.30, 30) is large
+
+    # Northbound lines are only ridden north, and the boarding wait is only
+    # charged when a bus is taken
+    index = isochrone.get_isochrone_index()
+    network = index.network
+    reached = index.reachable_stops(34.05, -118.30, 30 * 60)
+    lats = network.stop_lat[list(reached)]
+    assert lats.max() > 34.09 and lats.min() > 34.04
+    origin = int(
+        np.argmin(np.abs(network.stop_lat - 34.05) + np.abs(network.stop_lon + 118.30))
+    )
+    assert reached[origin] < isochrone.BOARDING_WAIT_SECONDS
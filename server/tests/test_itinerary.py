@@ -0,0 +1,76 @@
+# server/tests/test_itinerary.py
+
+import itertools  # For the brute-force reference order
+
+import numpy as np  # For random test points
+import pytest  # For defining and running tests
+
+from services.itinerary import (
+    distance_matrix_miles,
+    nearest_neighbour_order,
+    path_length,
+    plan_visit_order,
+    select_candidates,
+)
+
+
+def test_plan_visit_order():
+    """
+    Test that the planned order is a valid open path no longer than the
+    nearest-neighbour path and close to the optimum.
+
+    Workflow:
+        1. Plan the order of 7 random places from a start point, 30 times.
+        2. Compare it with the nearest-neighbour path and every permutation.
+    """
+    rng = np.random.default_rng(0)
+    gaps = []
+    for _ in range(30):
+        lat = 34.0 + rng.random(8) * 0.2
+        lon = -118.4 + rng.random(8) * 0.2
+        order, legs = plan_visit_order(lat, lon)
+        distances = distance_matrix_miles(lat, lon)
+
+        assert order[0] == 0 and sorted(order.tolist()) == list(range(8))
+        assert legs.sum() == pytest.approx(path_length(distances, order))
+        assert (
+            legs.sum()
+            <= path_length(distances, nearest_neighbour_order(distances)) + 1e-9
+        )
+        optimum = min(
+            path_length(distances, (0,) + rest)
+            for rest in itertools.permutations(range(1, 8))
+        )
+        gaps.append(legs.sum() / optimum - 1)
+    assert np.mean(gaps) < 0.05
+
+
+def test_plan_visit_order_on_a_line():
+    """
+    Test that places along a street are visited in order instead of zig-zagging.
+    """
+    lon = [-118.30, -118.26, -118.29, -118.27, -118.28]
+    order, legs = plan_visit_order([34.0] * 5, lon)
+    assert order.tolist() == [0, 2, 4, 3, 1]
+    assert legs.sum() == pytest.approx(
+        distance_matrix_miles([34.0, 34.0], [-118.30, -118.26])[0, 1]
+    )
+
+
+def test_select_candidates():
+    """
+    Test that candidates are picked on distance and shrunk review ratings.
+    """
+    distances = [0.1, 0.5, 0.5, 1.0]
+    rating_sums = [0, 5, 460, 500]
+    review_counts = [0, 1, 100, 100]
+
+    # Distance only: nearest first
+    picked = select_candidates(distances, rating_sums, review_counts, 4, 0.0)
+    assert picked.tolist() == [0, 1, 2, 3]
+    # Rating only: one 5-star review ranks below a hundred 4.6-star ones
+    picked = select_candidates(distances, rating_sums, review_counts, 2, 1.0)
+    assert picked.tolist() == [3, 2]
+    # Balanced: the well-reviewed place beats the equally near single review
+    picked = select_candidates(distances, rating_sums, review_counts, 3)
+    assert picked.tolist() == [0, 2, 1]
@@ -0,0 +1,59 @@
+# server/tests/test_places_index.py
+
+from collections import namedtuple  # For place rows as returned by the database
+
+import pytest  # For defining and running tests
+
+from services.places_index import PlaceIndex
+
+PlaceRow = namedtuple(
+    "PlaceRow", ["id", "name", "address", "types", "latitude", "longitude"]
+)
+
+# A route running east along latitude 34.00 from -118.30 to -118.26
+ROUTE = [[-118.30, 34.00], [-118.28, 34.00], [-118.26, 34.00]]
+
+
+@pytest.fixture
+def index():
+    """
+    Fixture providing a place index with places at known distances from `ROUTE`.
+    """
+    tourist = "tourist attraction"
+    return PlaceIndex(
+        [
+            PlaceRow(1, "Far East", "", tourist, 34.0005, -118.265),  # ~55 m north
+            PlaceRow(2, "West", "", tourist, 33.9990, -118.295),  # ~111 m south
+            PlaceRow(3, "Middle Cafe", "", "cafe", 34.0002, -118.28),  # ~22 m north
+            PlaceRow(4, "Too Far", "", tourist, 34.0100, -118.28),  # ~1.1 km north
+            PlaceRow(5, "Past The End", "", tourist, 34.00, -118.25),  # ~920 m east
+        ]
+    )
+
+
+def test_places_along_route(index):
+    """
+    Test that places near the route are found in the order they are passed.
+
+    Workflow:
+        1. Query places within 200 m of the eastbound route.
+        2. Assert the far places are excluded and the rest are ordered west to east.
+        3. Assert the type filter and the reversed route order.
+    """
+    places = index.places_along(ROUTE, 200)
+    assert [place["id"] for place in places] == [2, 3, 1]
+    assert places[0]["distance_from_route"] == pytest.approx(111, abs=2)
+    assert (
+        places[0]["along_route_miles"]
+        < places[1]["along_route_miles"]
+        < places[2]["along_route_miles"]
+    )
+
+    assert [
+        place["id"] for place in index.places_along(ROUTE, 200, "Tourist Attraction")
+    ] == [2, 1]
+    assert [place["id"] for place in index.places_along(ROUTE[::-1], 200, limit=2)] == [
+        1,
+        3,
+    ]
+    assert index.places_along(ROUTE[:1], 200) == []
@@ -0,0 +1,46 @@
+# server/tests/test_raptor.py
+
+from services.raptor import plan_transit_journey
+
+
+def test_transfer_journey(timetable):
+    """
+    Test that a one-transfer journey beats the slow direct line.
+
+    Workflow:
+        1. Depart from A1 at 08:00.
+        2. Assert the journey rides line 1 to A3, walks to B1 and rides line 2 to B3.
+    """
+    journey = plan_transit_journey(timetable, 34.00, -118.30, 34.02, -118.28, 8 * 3600)
+
+    transit = [leg for leg in journey["legs"] if leg["mode"] == "transit"]
+    assert [leg["route_number"] for leg in transit] == ["1", "2"]
+    assert transit[0]["from"]["stop_id"] == "A1"
+    assert transit[0]["to"]["stop_id"] == "A3"
+    assert transit[1]["from"]["stop_id"] == "B1"
+    assert transit[1]["from"]["time"] == "08:05"
+    assert journey["arrival"] == "08:09"
+    assert journey["transfers"] == 1
+
+
+def test_max_transfers(timetable):
+    """
+    Test that limiting transfers falls back to the direct line.
+    """
+    journey = plan_transit_journey(
+        timetable, 34.00, -118.30, 34.02, -118.28, 8 * 3600, max_transfers=0
+    )
+
+    transit = [leg for leg in journey["legs"] if leg["mode"] == "transit"]
+    assert [leg["route_number"] for leg in transit] == ["3"]
+    assert journey["arrival"] == "09:00"
+
+
+def test_no_journey_after_last_trip(timetable):
+    """
+    Test that no journey is returned after the last departure.
+    """
+    assert (
+        plan_transit_journey(timetable, 34.00, -118.30, 34.02, -118.28, 10 * 3600)
+        is None
+    )
@@ -0,0 +1,63 @@
+# server/tests/test_route_cache.py
+
+import os  # For bumping file modification times
+
+import pytest  # For defining and running tests
+
+from services import nearest_bustops, route_cache
+
+
+def test_route_cache(network_service, tmp_path, write_network, bus_lines):
+    """
+    Test that nearby queries share a cached result with their own walking distances.
+
+    Workflow:
+        1. Query a route, then a second one from points ~20 m away in the same clusters.
+        2. Assert the second is a cache hit with walking distances from its own points.
+        3. Reload the network and assert the cache is invalidated.
+    """
+    cache = nearest_bustops.route_cache
+    first = nearest_bustops.find_direct_bus_lines(
+        34.0101, -118.3001, 34.0801, -118.3001, 0.2
+    )["data"]
+    hits = cache.hits
+    second = nearest_bustops.find_direct_bus_lines(
+        34.0103, -118.3003, 34.0803, -118.3003, 0.2
+    )["data"]
+
+    assert cache.hits == hits + 1
+    assert second["geometry"] is first["geometry"]
+    assert second["origin"]["distance"] > first["origin"]["distance"]
+    walk_change = (
+        second["origin"]["distance"]
+        + second["destination"]["distance"]
+        - first["origin"]["distance"]
+        - first["destination"]["distance"]
+    )
+    assert second["total_distance"] == pytest.approx(
+        first["total_distance"] + walk_change
+    )
+    # Endpoints are keyed by their nearest station: a point ~180 m from the
+    # same stop shares the entry, but its stop lies outside a 0.1 mile
+    # radius, so it is searched afresh
+    nearest_bustops.find_direct_bus_lines(34.0101, -118.3001, 34.0801, -118.3001, 0.1)
+    hits = cache.hits
+    narrow = nearest_bustops.find_direct_bus_lines(
+        34.0116, -118.3000, 34.0801, -118.3001, 0.1
+    )
+    assert cache.hits == hits + 1
+    assert narrow["status"] == "error"
+    # Points far from every station are keyed by their grid cell
+    assert route_cache.endpoint_key(network_service.network, 34.5, -118.0)[0] == "cell"
+
+    write_network(str(tmp_path), [("10", "N", bus_lines["10"])])
+    stat = os.stat(network_service.stops_path)
+    os.utime(
+        network_service.stops_path,
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000),
+    )
+    network_service.reload_if_changed()
+    misses = cache.misses
+    nearest_bustops.find_direct_bus_lines(34.0103, -118.3003, 34.0803, -118.3003, 0.2)
+
+    assert cache.misses == misses + 1
@@ -0,0 +1,65 @@
+# server/tests/test_stop_catchments.py
+
+import os  # For building table paths
+
+import numpy as np  # For comparing catchment arrays
+
+from services import bus_network as bus_network_module
+from services.spatial_grid import haversine_meters
+from services.stop_catchments import (
+    StopCatchmentIndex,
+    build_stop_catchments,
+    load_stop_catchments,
+    save_stop_catchments,
+)
+
+
+def test_stop_catchments(network_service, tmp_path):
+    """
+    Test the stop -> places CSR index and its place -> stops reverse index.
+
+    Workflow:
+        1. Scatter places around the two-line network and build 300 m catchments.
+        2. Assert every stop's places match a brute-force haversine scan, closest first.
+        3. Assert the reverse index lists the same pairs after a save/load round trip.
+    """
+    network = network_service.network
+    rng = np.random.default_rng(0)
+    place_lat = 34.00 + rng.random(300) * 0.1
+    place_lon = -118.305 + rng.random(300) * 0.02
+    place_ids = np.arange(1000, 1300)
+    path = os.path.join(str(tmp_path), "catchments.npz")
+    save_stop_catchments(
+        build_stop_catchments(network, place_ids, place_lat, place_lon, 300), path
+    )
+    index = StopCatchmentIndex(load_stop_catchments(path), network)
+
+    pairs = set()
+    for stop in range(network.stop_count):
+        ids, meters = index.places_near_stop(stop)
+        expected = haversine_meters(
+            network.stop_lat[stop], network.stop_lon[stop], place_lat, place_lon
+        )
+        assert sorted(ids.tolist()) == sorted(place_ids[expected <= 300].tolist())
+        assert np.all(np.diff(meters) >= 0)
+        pairs.update((stop, place_id) for place_id in ids.tolist())
+
+    reverse = set()
+    for place_id in place_ids.tolist():
+        stops, meters = index.stops_near_place(place_id)
+        assert np.all(np.diff(meters) >= 0)
+        reverse.update((stop, place_id) for stop in stops.tolist())
+    assert pairs and reverse == pairs
+    assert len(index.stops_near_place(1)[0]) == 0
+
+    # Stop rows by number, and the same table from the stops alone
+    assert [network.stop_number[row] for row in index.stop_rows("105")] == ["105"]
+    assert index.stop_rows("missing") == []
+    stops_only = build_stop_catchments(
+        bus_network_module.load_bus_stops(network_service.stops_path),
+        place_ids,
+        place_lat,
+        place_lon,
+        300,
+    )
+    assert np.array_equal(stops_only["place_ids"], index.table["place_ids"])
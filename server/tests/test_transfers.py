@@ -0,0 +1,102 @@
+# server/tests/test_transfers.py
+
+import os  # For bumping file modification times
+
+import numpy as np  # For filtering the transfer table
+import pytest  # For defining and running tests
+
+from services import bus_network as bus_network_module
+from services import nearest_bustops, transfers
+
+
+def test_one_transfer_route(tmp_path, monkeypatch, write_network, bus_lines):
+    """
+    Test the transfer table and the one-transfer route built from it.
+
+    Workflow:
+        1. Cross line 10 with east-west line 30, one stop ~20 m from a line 10 stop.
+        2. Build and save the transfer table, and look up the 10 -> 30 transfer.
+        3. Assert a trip from line 10 to the far end of line 30 rides both lines.
+    """
+    eastbound = [[-118.30 + 0.01 * i, 34.0502] for i in range(11)]
+    stops_path, lines_path = write_network(
+        str(tmp_path), [("10", "N", bus_lines["10"]), ("30", "E", eastbound)]
+    )
+    service = bus_network_module.BusNetworkService(stops_path, lines_path)
+    service.load()
+    monkeypatch.setattr(bus_network_module, "bus_network_service", service)
+
+    table_path = str(tmp_path / "transfer_table.npz")
+    transfers.save_transfer_table(
+        transfers.build_transfer_table(service.network), table_path
+    )
+    monkeypatch.setattr(
+        nearest_bustops, "transfer_service", transfers.TransferService(table_path)
+    )
+
+    lookup = nearest_bustops.transfer_service.index().transfers("10", "30")
+    assert len(lookup) == 1
+    assert lookup[0]["from_stop"]["coordinates"] == [-118.30, 34.05]
+    assert lookup[0]["walking_distance"] == pytest.approx(0.0138, abs=1e-3)
+
+    result = nearest_bustops.find_one_transfer_route(
+        34.01, -118.30, 34.0502, -118.22, 0.2
+    )
+
+    assert result["status"] == "success"
+    route = result["data"]
+    assert route["first_leg"]["route_number"] == "10"
+    assert route["second_leg"]["route_number"] == "30"
+    assert route["second_leg"]["geometry"][-1] == pytest.approx([-118.22, 34.0502])
+
+
+def test_transfer_service_loads_only_file(
+    tmp_path, monkeypatch, write_network, bus_lines
+):
+    """
+    Test that the transfer table is only loaded from its file, never built in process.
+
+    Workflow:
+        1. Assert a missing table gives no index and no one-transfer route.
+        2. Save the table and assert it is loaded, then replace it and assert
+           the replacement is picked up.
+    """
+    eastbound = [[-118.30 + 0.01 * i, 34.0502] for i in range(11)]
+    stops_path, lines_path = write_network(
+        str(tmp_path), [("10", "N", bus_lines["10"]), ("30", "E", eastbound)]
+    )
+    service = bus_network_module.BusNetworkService(stops_path, lines_path)
+    service.load()
+    monkeypatch.setattr(bus_network_module, "bus_network_service", service)
+    table_path = str(tmp_path / "transfer_table.npz")
+    transfer_service = transfers.TransferService(table_path)
+    monkeypatch.setattr(nearest_bustops, "transfer_service", transfer_service)
+
+    assert transfer_service.index() is None
+    result = nearest_bustops.find_one_transfer_route(
+        34.01, -118.30, 34.0502, -118.22, 0.2
+    )
+    assert result["status"] == "error"
+
+    table = transfers.build_transfer_table(service.network)
+    transfers.save_transfer_table(table, table_path)
+    assert len(transfer_service.index().meters) == 2
+    assert not os.path.exists(table_path + ".tmp")
+
+    one_way = table["from_line"] == 0
+    offsets = np.array([0, int(one_way.sum())])
+    transfers.save_transfer_table(
+        {
+            **{
+                name: table[name][one_way]
+                for name in ("from_line", "to_line", "from_stop", "to_stop", "meters")
+            },
+            "line_names": table["line_names"],
+            "pair_keys": table["pair_keys"][:1],
+            "pair_offsets": offsets,
+        },
+        table_path,
+    )
+    stat = os.stat(table_path)
+    os.utime(table_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert len(transfer_service.index().meters) == 1
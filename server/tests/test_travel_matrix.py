@@ -0,0 +1,77 @@
+# server/tests/test_travel_matrix.py
+
+import os  # For building table paths
+
+import pytest  # For defining and running tests
+
+from services import nearest_bustops, travel_matrix
+from services.travel_matrix import (
+    TravelMatrix,
+    TravelMatrixService,
+    build_travel_matrix,
+    load_travel_matrix,
+    save_travel_matrix,
+)
+
+
+def test_travel_matrix(network_service, tmp_path, monkeypatch):
+    """
+    Test that the travel matrix holds the direct router's bus legs between clusters.
+
+    Workflow:
+        1. Build a matrix over two points on line 10 and one on line 20.
+        2. Assert every pair has a bus leg exactly when `find_direct_bus_lines`
+           finds a route, with the same travel time and boarding stop.
+        3. Plan legs from a start location the matrix does not cover, and
+           assert only that start leg is routed at request time.
+    """
+    network = network_service.network
+    lat = [34.01, 34.08, 34.05]
+    lon = [-118.30, -118.30, -118.2905]
+    path = os.path.join(str(tmp_path), "travel_matrix.npz")
+    save_travel_matrix(build_travel_matrix(network, lat, lon, 0.2, 10.0), path)
+    matrix = TravelMatrix(load_travel_matrix(path))
+    rows = matrix.cluster_rows(lat, lon)
+    assert sorted(rows.tolist()) == [0, 1, 2]
+
+    for a in range(3):
+        for b in range(3):
+            if a == b:
+                continue
+            k = matrix.bus_leg(rows[a], rows[b])
+            result = nearest_bustops.find_direct_bus_lines(
+                lat[a], lon[a], lat[b], lon[b], 0.2
+            )
+            assert (k is not None) == (result["status"] == "success")
+            if k is None:
+                continue
+            route = result["data"]
+            assert matrix.table["bus_minutes"][k] == pytest.approx(
+                route["travel_minutes"], abs=0.06
+            )
+            assert (
+                matrix.table["stop_numbers"][matrix.table["board_stops"][k]]
+                == route["origin"]["stop_number"]
+            )
+
+    routed = []
+
+    def recording_best_bus_legs(
+        network, lat, lon, origins, destinations, buffer_radius_miles
+    ):
+        routed.extend(zip(origins.tolist(), destinations.tolist()))
+        return best_bus_legs(
+            network, lat, lon, origins, destinations, buffer_radius_miles
+        )
+
+    best_bus_legs = travel_matrix.best_bus_legs
+    monkeypatch.setattr(travel_matrix, "best_bus_legs", recording_best_bus_legs)
+    legs = TravelMatrixService(path).legs(
+        [34.009, 34.01, 34.08, 34.0801], [-118.30, -118.30, -118.30, -118.3]
+    )
+    assert [leg["mode"] for leg in legs] == ["walk", "bus", "walk"]
+    assert legs[1]["route_number"] == "10"
+    assert routed == [(0, 1)]
+    assert legs[1]["minutes"] == pytest.approx(
+        float(matrix.table["bus_minutes"][matrix.bus_leg(rows[0], rows[1])]), abs=0.06
+    )